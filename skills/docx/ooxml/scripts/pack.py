@@ -2,6 +2,9 @@
 """
 Tool to pack a directory into a .docx, .pptx, or .xlsx file with XML formatting undone.
 
+Parts that were not edited since unpack.py are written back byte-for-byte from the
+original file; edited parts are condensed.
+
 Example usage:
     python pack.py <input_directory> <office_file> [--force]
 """
@@ -15,6 +18,11 @@ import defusedxml.minidom
 import zipfile
 from pathlib import Path
 
+try:
+    from .parts import MANIFEST_NAME, pristine_parts
+except ImportError:
+    from parts import MANIFEST_NAME, pristine_parts
+
 
 def main():
     parser = argparse.ArgumentParser(description="Pack a directory into an Office file")
@@ -66,16 +74,23 @@ def pack_document(input_dir, output_file, validate=False):
         temp_content_dir = Path(temp_dir) / "content"
         shutil.copytree(input_dir, temp_content_dir)
 
+        # Parts never edited since unpacking get their original bytes back
+        pristine = pristine_parts(input_dir)
+
         # Process XML files to remove pretty-printing whitespace
         for pattern in ["*.xml", "*.rels"]:
             for xml_file in temp_content_dir.rglob(pattern):
-                condense_xml(xml_file)
+                part = xml_file.relative_to(temp_content_dir).as_posix()
+                if part in pristine:
+                    xml_file.write_bytes(pristine[part])
+                else:
+                    condense_xml(xml_file)
 
         # Create final Office file as zip archive
         output_file.parent.mkdir(parents=True, exist_ok=True)
         with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zf:
             for f in temp_content_dir.rglob("*"):
-                if f.is_file():
+                if f.is_file() and f.name != MANIFEST_NAME:
                     zf.write(f, f.relative_to(temp_content_dir))
 
         # Validate if requested
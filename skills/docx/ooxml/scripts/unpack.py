@@ -1,29 +1,101 @@
 #!/usr/bin/env python3
-"""Unpack and format XML contents of Office files (.docx, .pptx, .xlsx)"""
+"""Unpack and format XML contents of Office files (.docx, .pptx, .xlsx)
 
+Example usage:
+    python unpack.py <office_file> <output_dir>
+    python unpack.py <office_file> <output_dir> --lazy
+    python unpack.py <office_file> <output_dir> --pretty "ppt/slides/*.xml"
+
+In lazy mode parts are extracted as-is and pretty-printed the first time they are
+opened with XMLEditor. --pretty formats only the matching parts up front and
+implies --lazy for the rest. Either way a manifest of part hashes is written so
+that pack.py can restore the original bytes of parts that were never edited.
+"""
+
+import argparse
+import fnmatch
 import random
-import sys
-import defusedxml.minidom
 import zipfile
 from pathlib import Path
 
-# Get command line arguments
-assert len(sys.argv) == 3, "Usage: python unpack.py <office_file> <output_dir>"
-input_file, output_dir = sys.argv[1], sys.argv[2]
-
-# Extract and format
-output_path = Path(output_dir)
-output_path.mkdir(parents=True, exist_ok=True)
-zipfile.ZipFile(input_file).extractall(output_path)
-
-# Pretty print all XML files
-xml_files = list(output_path.rglob("*.xml")) + list(output_path.rglob("*.rels"))
-for xml_file in xml_files:
-    content = xml_file.read_text(encoding="utf-8")
-    dom = defusedxml.minidom.parseString(content)
-    xml_file.write_bytes(dom.toprettyxml(indent="  ", encoding="ascii"))
-
-# For .docx files, suggest an RSID for tracked changes
-if input_file.endswith(".docx"):
-    suggested_rsid = "".join(random.choices("0123456789ABCDEF", k=8))
-    print(f"Suggested RSID for edit session: {suggested_rsid}")
+from parts import build_manifest, pretty_print_files, save_manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Unpack and format an Office file")
+    parser.add_argument("input_file", help="Office file (.docx/.pptx/.xlsx)")
+    parser.add_argument("output_dir", help="Directory to unpack into")
+    parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="Extract raw parts and pretty-print each one on first open",
+    )
+    parser.add_argument(
+        "--pretty",
+        action="append",
+        metavar="GLOB",
+        help="Pretty-print only parts matching GLOB (repeatable, implies --lazy)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker processes for pretty-printing (default: CPU count)",
+    )
+    args = parser.parse_args()
+
+    unpack_document(
+        args.input_file,
+        args.output_dir,
+        lazy=args.lazy,
+        pretty_globs=args.pretty,
+        jobs=args.jobs,
+    )
+
+    # For .docx files, suggest an RSID for tracked changes
+    if args.input_file.endswith(".docx"):
+        suggested_rsid = "".join(random.choices("0123456789ABCDEF", k=8))
+        print(f"Suggested RSID for edit session: {suggested_rsid}")
+
+
+def unpack_document(input_file, output_dir, lazy=False, pretty_globs=None, jobs=None):
+    """Extract an Office file and pretty-print its XML parts.
+
+    Args:
+        input_file: Path to the Office file
+        output_dir: Directory to extract into
+        lazy: If True, leave parts raw until they are first opened
+        pretty_globs: Glob patterns of parts to format up front (implies lazy)
+        jobs: Number of worker processes for pretty-printing
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(input_file) as zf:
+        zf.extractall(output_path)
+
+    xml_parts = sorted(
+        f.relative_to(output_path).as_posix()
+        for pattern in ["*.xml", "*.rels"]
+        for f in output_path.rglob(pattern)
+    )
+
+    lazy = lazy or bool(pretty_globs)
+    if not lazy:
+        to_format = xml_parts
+    else:
+        to_format = [
+            part
+            for part in xml_parts
+            if any(fnmatch.fnmatch(part, pattern) for pattern in pretty_globs or [])
+        ]
+
+    pretty_print_files([output_path / part for part in to_format], jobs=jobs)
+
+    save_manifest(
+        output_path,
+        build_manifest(input_file, output_path, xml_parts, set(to_format)),
+    )
+
+
+if __name__ == "__main__":
+    main()
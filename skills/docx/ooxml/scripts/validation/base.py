@@ -7,6 +7,11 @@ from pathlib import Path
 
 import lxml.etree
 
+try:
+    from ..parts import MANIFEST_NAME, pristine_parts
+except ImportError:
+    from parts import MANIFEST_NAME, pristine_parts
+
 
 class BaseSchemaValidator:
     """Base validator with common validation logic for document files."""
@@ -120,6 +125,12 @@ class BaseSchemaValidator:
         if not self.xml_files:
             print(f"Warning: No XML files found in {self.unpacked_dir}")
 
+        # Parts unchanged since unpack.py cannot introduce new errors
+        self.pristine_files = {
+            self.unpacked_dir / part
+            for part in pristine_parts(self.unpacked_dir, self.original_file)
+        }
+
     def validate(self):
         """Run all validation checks and return True if all pass."""
         raise NotImplementedError("Subclasses must implement the validate method")
@@ -129,6 +140,8 @@ class BaseSchemaValidator:
         errors = []
 
         for xml_file in self.xml_files:
+            if xml_file in self.pristine_files:
+                continue
             try:
                 # Try to parse the XML file
                 lxml.etree.parse(str(xml_file))
@@ -288,12 +301,14 @@ class BaseSchemaValidator:
                 print("PASSED - No .rels files found")
             return True
 
-        # Get all files in the unpacked directory (excluding reference files)
+        # Get all files in the unpacked directory (excluding reference files and
+        # the unpack manifest, which pack.py leaves out of the document)
         all_files = []
         for file_path in self.unpacked_dir.rglob("*"):
             if (
                 file_path.is_file()
                 and file_path.name != "[Content_Types].xml"
+                and file_path.name != MANIFEST_NAME
                 and not file_path.name.endswith(".rels")
             ):  # This file is not referenced by .rels
                 all_files.append(file_path.resolve())
@@ -691,8 +706,13 @@ class BaseSchemaValidator:
         original_error_count = 0
         valid_count = 0
         skipped_count = 0
+        unchanged_count = 0
 
         for xml_file in self.xml_files:
+            if xml_file in self.pristine_files:
+                unchanged_count += 1
+                continue
+
             relative_path = str(xml_file.relative_to(self.unpacked_dir))
             is_valid, new_file_errors = self.validate_file_against_xsd(
                 xml_file, verbose=False
@@ -722,6 +742,7 @@ class BaseSchemaValidator:
             print(f"Validated {len(self.xml_files)} files:")
             print(f"  - Valid: {valid_count}")
             print(f"  - Skipped (no schema): {skipped_count}")
+            print(f"  - Unchanged since unpack (skipped): {unchanged_count}")
             if original_error_count:
                 print(f"  - With original errors (ignored): {original_error_count}")
             print(
@@ -4,7 +4,8 @@ Utilities for editing OOXML documents.
 
 This module provides XMLEditor, a tool for manipulating XML files with support for
 line-number-based node finding and DOM manipulation. Each element is automatically
-annotated with its original line and column position during parsing.
+annotated with its original line and column position during parsing. Parts left
+raw by a lazy unpack (unpack.py --lazy) are pretty-printed when first opened.
 
 Example usage:
     editor = XMLEditor("document.xml")
@@ -36,6 +37,7 @@ from typing import Optional, Union
 
 import defusedxml.minidom
 import defusedxml.sax
+from ooxml.scripts.parts import ensure_pretty
 
 
 class XMLEditor:
@@ -66,6 +68,9 @@ class XMLEditor:
         if not self.xml_path.exists():
             raise ValueError(f"XML file not found: {xml_path}")
 
+        # Format parts from a lazy unpack so line numbers match the Read tool
+        ensure_pretty(self.xml_path)
+
         with open(self.xml_path, "rb") as f:
             header = f.read(200).decode("utf-8", errors="ignore")
         self.encoding = "ascii" if 'encoding="ascii"' in header else "utf-8"
@@ -0,0 +1,328 @@
+"""
+Helpers for the XML parts of an unpacked Office document.
+
+unpack.py records each part in a manifest file at the root of the unpacked
+directory: whether it has been pretty-printed yet (lazy mode), the hash of its
+bytes in the original file, and the hash of what was written to disk. A part whose
+file still matches the written hash was never edited, so pack.py can emit its
+original bytes and the validators can skip it.
+
+Example usage:
+    from ooxml.scripts.parts import ensure_pretty, pristine_parts, pretty_print_xml
+
+    ensure_pretty("unpacked/word/document.xml")  # Formats the part if still raw
+    unchanged = pristine_parts("unpacked")  # {part_name: original_bytes}
+    pretty = pretty_print_xml(raw_bytes)  # Same output as minidom.toprettyxml
+"""
+
+import hashlib
+import json
+import os
+import xml.sax.handler
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+import defusedxml.sax
+
+# Manifest recording the state of each part, stored at the unpacked root
+MANIFEST_NAME = ".ooxml-manifest.json"
+
+# Below this many parts, a process pool costs more than it saves
+PARALLEL_THRESHOLD = 16
+
+
+class _PrettyPrinter(xml.sax.handler.ContentHandler, xml.sax.handler.LexicalHandler):
+    """SAX handler that writes the same layout as minidom's toprettyxml.
+
+    Elements are written as events arrive instead of building a DOM first. Only
+    the text of the current element is buffered, which is enough to decide
+    whether it is written inline (<a>text</a>), self-closed (<a/>), or as a block.
+    CDATA sections are kept apart from the text around them and written back
+    unescaped, like minidom's CDATASection nodes.
+    """
+
+    def __init__(self, indent="  "):
+        super().__init__()
+        self.indent = indent
+        self.out = []
+        # Stack of [tag_name, has_children] for the open elements
+        self._stack = []
+        # Text since the last child node, as [is_cdata, data] segments
+        self._text = []
+        self._in_cdata = False
+        self._cdata_continue = False
+
+    def _segment(self, segment, depth=None):
+        """Render a text segment, as a line at depth or inline without one."""
+        is_cdata, data = segment
+        if is_cdata:
+            # minidom writes CDATA without indentation or newline
+            return f"<![CDATA[{data}]]>"
+        if depth is None:
+            return _escape(data)
+        return f"{self.indent * depth}{_escape(data)}\n"
+
+    def _write_text_line(self):
+        for segment in self._text:
+            self.out.append(self._segment(segment, len(self._stack)))
+        self._text.clear()
+
+    def _begin_child(self):
+        """Close the parent's start tag and flush its text before a child node."""
+        if not self._stack:
+            self._text.clear()
+            return
+        frame = self._stack[-1]
+        if not frame[1]:
+            self.out.append(">\n")
+            frame[1] = True
+        self._write_text_line()
+
+    def startElement(self, name, attrs):
+        self._begin_child()
+        parts = [f"{self.indent * len(self._stack)}<{name}"]
+        # minidom writes namespace declarations ahead of the other attributes
+        items = sorted(attrs.items(), key=lambda item: not _is_xmlns(item[0]))
+        for attr_name, value in items:
+            parts.append(f' {attr_name}="{_escape(value)}"')
+        self.out.append("".join(parts))
+        self._stack.append([name, False])
+
+    def endElement(self, name):
+        _, has_children = self._stack[-1]
+        if has_children:
+            self._write_text_line()
+            self._stack.pop()
+            self.out.append(f"{self.indent * len(self._stack)}</{name}>\n")
+        else:
+            if len(self._text) > 1:
+                # Text and CDATA side by side are separate nodes, written as a block
+                self.out.append(">\n")
+                self._write_text_line()
+                self._stack.pop()
+                self.out.append(f"{self.indent * len(self._stack)}</{name}>\n")
+                return
+            self._stack.pop()
+            if self._text:
+                self.out.append(f">{self._segment(self._text[0])}</{name}>\n")
+                self._text.clear()
+            else:
+                self.out.append("/>\n")
+
+    def characters(self, content):
+        if not self._stack:
+            return
+        if self._in_cdata:
+            if self._cdata_continue and self._text and self._text[-1][0]:
+                self._text[-1][1] += content
+            else:
+                self._text.append([True, content])
+                self._cdata_continue = True
+        elif self._text and not self._text[-1][0]:
+            self._text[-1][1] += content
+        else:
+            self._text.append([False, content])
+
+    def startCDATA(self):
+        self._in_cdata = True
+        self._cdata_continue = False
+
+    def endCDATA(self):
+        self._in_cdata = False
+        self._cdata_continue = False
+
+    def processingInstruction(self, target, data):
+        self._begin_child()
+        self.out.append(f"{self.indent * len(self._stack)}<?{target} {data}?>\n")
+
+    def comment(self, content):
+        self._begin_child()
+        self.out.append(f"{self.indent * len(self._stack)}<!--{content}-->\n")
+
+
+def _is_xmlns(attr_name):
+    return attr_name == "xmlns" or attr_name.startswith("xmlns:")
+
+
+def _escape(data):
+    """Escape text and attribute values the way minidom does."""
+    return (
+        data.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace('"', "&quot;")
+        .replace(">", "&gt;")
+    )
+
+
+def pretty_print_xml(content, indent="  "):
+    """Pretty-print XML bytes with a streaming SAX pass.
+
+    Produces the same layout as minidom's toprettyxml(indent, encoding="ascii"),
+    with non-ASCII characters written as character references.
+
+    Args:
+        content: Raw XML document (bytes)
+        indent: Indentation added per nesting level
+
+    Returns:
+        bytes: Pretty-printed XML with an ascii XML declaration
+    """
+    handler = _PrettyPrinter(indent)
+    parser = defusedxml.sax.make_parser()
+    parser.setContentHandler(handler)
+    parser.setProperty(xml.sax.handler.property_lexical_handler, handler)
+    parser.parse(BytesIO(content))
+
+    body = "".join(handler.out)
+    return b'<?xml version="1.0" encoding="ascii"?>\n' + body.encode(
+        "ascii", errors="xmlcharrefreplace"
+    )
+
+
+def pretty_print_file(xml_file):
+    """Pretty-print a single XML file in place."""
+    xml_file = Path(xml_file)
+    xml_file.write_bytes(pretty_print_xml(xml_file.read_bytes()))
+
+
+def pretty_print_files(xml_files, jobs=None):
+    """Pretty-print XML files in place, in parallel when there are many of them.
+
+    Args:
+        xml_files: Paths of the XML files to format
+        jobs: Number of worker processes (default: CPU count)
+    """
+    xml_files = [str(f) for f in xml_files]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(xml_files) < PARALLEL_THRESHOLD:
+        for xml_file in xml_files:
+            pretty_print_file(xml_file)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        chunksize = max(1, len(xml_files) // (jobs * 4))
+        list(executor.map(pretty_print_file, xml_files, chunksize=chunksize))
+
+
+def content_hash(data):
+    """Hash part contents for pristine checks."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def build_manifest(input_file, output_dir, xml_parts, formatted):
+    """Build the manifest for a freshly unpacked directory.
+
+    Args:
+        input_file: Path to the Office file that was unpacked
+        output_dir: Directory it was unpacked into
+        xml_parts: Names of all XML parts (posix paths relative to output_dir)
+        formatted: Names of the parts that were pretty-printed
+
+    Returns:
+        dict: Manifest ready for save_manifest
+    """
+    output_dir = Path(output_dir)
+    parts = {}
+    with zipfile.ZipFile(input_file) as zf:
+        for part in xml_parts:
+            parts[part] = {
+                "pretty": part in formatted,
+                "original": content_hash(zf.read(part)),
+                "written": content_hash((output_dir / part).read_bytes()),
+            }
+    return {"source": str(Path(input_file).resolve()), "parts": parts}
+
+
+def load_manifest(unpacked_dir):
+    """Load the manifest of an unpacked directory, or None if it has none."""
+    manifest_path = Path(unpacked_dir) / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    return json.loads(manifest_path.read_text(encoding="utf-8"))
+
+
+def save_manifest(unpacked_dir, manifest):
+    """Write the manifest to the root of an unpacked directory."""
+    manifest_path = Path(unpacked_dir) / MANIFEST_NAME
+    manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+
+
+def find_unpacked_root(path):
+    """Find the unpacked directory containing path by looking for its manifest.
+
+    Returns:
+        Path or None: The unpacked root, or None if path is not inside one
+    """
+    for parent in Path(path).resolve().parents:
+        if (parent / MANIFEST_NAME).exists():
+            return parent
+    return None
+
+
+def ensure_pretty(xml_file):
+    """Pretty-print a part on first use if it was unpacked lazily.
+
+    Does nothing for parts that are already formatted or that are not inside a
+    lazily unpacked directory.
+
+    Args:
+        xml_file: Path to an XML part inside an unpacked directory
+
+    Returns:
+        bool: True if the part was formatted by this call
+    """
+    xml_file = Path(xml_file).resolve()
+    root = find_unpacked_root(xml_file)
+    if root is None:
+        return False
+
+    manifest = load_manifest(root)
+    entry = manifest["parts"].get(xml_file.relative_to(root).as_posix())
+    if entry is None or entry["pretty"]:
+        return False
+
+    pretty_print_file(xml_file)
+    entry["pretty"] = True
+    entry["written"] = content_hash(xml_file.read_bytes())
+    save_manifest(root, manifest)
+    return True
+
+
+def pristine_parts(unpacked_dir, original_file=None):
+    """Find the parts that have not been edited since unpacking.
+
+    A part is pristine when its file still matches the hash recorded at unpack
+    time and the original file still holds the bytes it was unpacked from.
+
+    Args:
+        unpacked_dir: Path to an unpacked directory
+        original_file: Office file to read original bytes from
+                       (default: the file recorded in the manifest)
+
+    Returns:
+        dict: Part name -> original bytes, empty if the directory has no manifest
+    """
+    unpacked_dir = Path(unpacked_dir)
+    manifest = load_manifest(unpacked_dir)
+    if manifest is None:
+        return {}
+
+    original_file = Path(original_file or manifest.get("source", ""))
+    if not original_file.is_file():
+        return {}
+
+    pristine = {}
+    with zipfile.ZipFile(original_file) as zf:
+        names = set(zf.namelist())
+        for part, entry in manifest["parts"].items():
+            part_file = unpacked_dir / part
+            if part not in names or not part_file.is_file():
+                continue
+            if content_hash(part_file.read_bytes()) != entry.get("written"):
+                continue
+            original = zf.read(part)
+            if content_hash(original) == entry.get("original"):
+                pristine[part] = original
+    return pristine
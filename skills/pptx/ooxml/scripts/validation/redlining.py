@@ -7,6 +7,11 @@ import tempfile
 import zipfile
 from pathlib import Path
 
+try:
+    from ..parts import pristine_parts
+except ImportError:
+    from parts import pristine_parts
+
 
 class RedliningValidator:
     """Validator for tracked changes in Word documents."""
@@ -27,6 +32,12 @@ class RedliningValidator:
             print(f"FAILED - Modified document.xml not found at {modified_file}")
             return False
 
+        # An unedited document.xml cannot contain untracked changes
+        if "word/document.xml" in pristine_parts(self.unpacked_dir, self.original_docx):
+            if self.verbose:
+                print("PASSED - document.xml unchanged since unpacking.")
+            return True
+
         # First, check if there are any tracked changes by Claude to validate
         try:
             import xml.etree.ElementTree as ET
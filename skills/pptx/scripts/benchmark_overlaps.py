@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Benchmark overlap detection in inventory.py on synthetic slides.
+
+Generates slides of text boxes laid out like org charts and data tables (a grid
+with jittered positions, so neighbouring boxes overlap now and then), checks that
+the sweep-line engine finds the same overlaps as a pairwise comparison, and
+reports timings for both.
+
+Usage:
+    python benchmark_overlaps.py [--sizes 10,100,1000] [--repeat 5]
+"""
+
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from inventory import calculate_overlap, find_overlapping_pairs
+
+Rect = Tuple[float, float, float, float]
+
+
+def make_slide(n: int, seed: int = 0) -> List[Rect]:
+    """Create n text boxes on a 13.33" x 7.5" slide, rounded like ShapeData."""
+    rng = random.Random(seed)
+    cols = max(1, int(n**0.5 * 1.8))
+    rows = (n + cols - 1) // cols
+    cell_w, cell_h = 13.33 / cols, 7.5 / rows
+
+    rects = []
+    for k in range(n):
+        row, col = divmod(k, cols)
+        width = cell_w * rng.uniform(0.7, 1.2)
+        height = cell_h * rng.uniform(0.7, 1.2)
+        left = col * cell_w + rng.uniform(-0.1, 0.1) * cell_w
+        top = row * cell_h + rng.uniform(-0.1, 0.1) * cell_h
+        rects.append(
+            (round(left, 2), round(top, 2), round(width, 2), round(height, 2))
+        )
+    return rects
+
+
+def pairwise_overlaps(rects: List[Rect]) -> List[Tuple[int, int, float]]:
+    """Reference implementation comparing every pair of rectangles."""
+    pairs = []
+    for i in range(len(rects)):
+        for j in range(i + 1, len(rects)):
+            overlaps, overlap_area = calculate_overlap(rects[i], rects[j])
+            if overlaps:
+                pairs.append((i, j, overlap_area))
+    return pairs
+
+
+def best_time(func, rects: List[Rect], repeat: int) -> float:
+    """Return the fastest of repeat runs in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(rects)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark overlap detection")
+    parser.add_argument(
+        "--sizes",
+        default="10,100,1000",
+        help="Comma-separated shape counts per slide (default: 10,100,1000)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Runs per measurement (default: 5)"
+    )
+    args = parser.parse_args()
+
+    print(f"{'shapes':>8} {'overlaps':>9} {'pairwise ms':>12} {'sweep ms':>9} {'speedup':>8}")
+    for n in (int(size) for size in args.sizes.split(",")):
+        rects = make_slide(n)
+        expected = pairwise_overlaps(rects)
+        assert find_overlapping_pairs(rects) == expected, f"Mismatch for {n} shapes"
+
+        pairwise_ms = best_time(pairwise_overlaps, rects, args.repeat)
+        sweep_ms = best_time(find_overlapping_pairs, rects, args.repeat)
+        speedup = pairwise_ms / sweep_ms if sweep_ms else float("inf")
+        print(
+            f"{n:>8} {len(expected):>9} {pairwise_ms:>12.2f} {sweep_ms:>9.2f} {speedup:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -14,24 +14,36 @@ Classes:
     ParagraphData: Represents a text paragraph with formatting
     ShapeData: Represents a shape with position and text content
 
+Inventory levels:
+    geometry: Shape positions, sizes, and placeholder types only
+    text: Adds paragraphs, overlaps, slide overflow, and formatting warnings
+    full: Adds text frame overflow estimated with PIL (default)
+
 Main Functions:
     extract_text_inventory: Extract all text from a presentation
     save_inventory: Save extracted data to JSON
 
 Usage:
-    python inventory.py input.pptx output.json
+    python inventory.py input.pptx output.json [--level geometry|text|full] [--jobs N]
 """
 
 import argparse
+import copy
 import json
+import os
 import platform
+import shutil
+import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 from PIL import Image, ImageDraw, ImageFont
 from pptx import Presentation
+from pptx.enum.dml import MSO_FILL
 from pptx.enum.text import PP_ALIGN
 from pptx.shapes.base import BaseShape
 
@@ -46,6 +58,17 @@ InventoryData = Dict[
 ]  # Dict of slide_id -> {shape_id -> ShapeData}
 InventoryDict = Dict[str, Dict[str, ShapeDict]]  # JSON-serializable inventory
 
+# Inventory levels, from cheapest to most complete
+INVENTORY_LEVELS = ("geometry", "text", "full")
+
+# Marks lazily computed ShapeData fields that have not been computed yet
+_UNSET: Any = object()
+
+# On-disk font index cache, keyed by font directory mtimes (set to "" to disable)
+FONT_INDEX_CACHE = os.environ.get(
+    "PPTX_FONT_INDEX_CACHE", "~/.cache/pptx-skill/font-index.json"
+)
+
 
 def main():
     """Main entry point for command-line usage."""
@@ -60,6 +83,12 @@ Examples:
   python inventory.py presentation.pptx inventory.json --issues-only
     Extracts only text shapes that have overflow or overlap issues
 
+  python inventory.py presentation.pptx inventory.json --level geometry
+    Extracts only shape positions and sizes, skipping text measurement
+
+  python inventory.py presentation.pptx inventory.json --jobs 4
+    Splits the slides across 4 worker processes for large decks
+
 The output JSON includes:
   - All text content organized by slide and shape
   - Correct absolute positions for shapes in groups
@@ -76,6 +105,18 @@ The output JSON includes:
         action="store_true",
         help="Include only text shapes that have overflow or overlap issues",
     )
+    parser.add_argument(
+        "--level",
+        choices=INVENTORY_LEVELS,
+        default="full",
+        help="How much to extract: geometry, text, or full (default: full)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes to split slides across (default: 1)",
+    )
 
     args = parser.parse_args()
 
@@ -94,11 +135,13 @@ The output JSON includes:
             print(
                 "Filtering to include only text shapes with issues (overflow/overlap)"
             )
-        inventory = extract_text_inventory(input_path, issues_only=args.issues_only)
+        inventory = get_inventory_as_dict(
+            input_path, issues_only=args.issues_only, level=args.level, jobs=args.jobs
+        )
 
         output_path = Path(args.output)
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        save_inventory(inventory, output_path)
+        write_inventory_json(inventory, output_path)
 
         print(f"Output saved to: {args.output}")
 
@@ -134,9 +177,370 @@ class ShapeWithPosition:
     absolute_top: int  # in EMUs
 
 
+class FontIndex:
+    """Process-wide index of font files for resolving font names to paths.
+
+    Each font directory is listed once and the listing is reused for every lookup.
+    Listings are also saved to an optional JSON cache keyed by directory mtime, so
+    later runs only rescan directories that changed. Names that are not found in
+    the font directories fall back to the fontconfig family list when fc-list is
+    available.
+    """
+
+    def __init__(self, cache_path: Optional[str] = FONT_INDEX_CACHE):
+        """Initialize the index for the current platform.
+
+        Args:
+            cache_path: Path to the on-disk cache, or None/"" to disable it
+        """
+        self.system = platform.system()
+
+        # Define font directories and extensions by platform
+        if self.system == "Darwin":  # macOS
+            font_dirs = [
+                "/System/Library/Fonts/",
+                "/Library/Fonts/",
+                "~/Library/Fonts/",
+            ]
+            self.extensions = [".ttf", ".otf", ".ttc", ".dfont"]
+        else:  # Linux
+            font_dirs = [
+                "/usr/share/fonts/truetype/",
+                "/usr/local/share/fonts/",
+                "~/.fonts/",
+            ]
+            self.extensions = [".ttf", ".otf"]
+
+        self.font_dirs = [Path(font_dir).expanduser() for font_dir in font_dirs]
+        self.cache_path = Path(cache_path).expanduser() if cache_path else None
+        self._files = self._load_listings()
+        self._resolved: Dict[str, Optional[str]] = {}
+        self._fontconfig: Optional[Dict[str, str]] = None
+
+    def _load_listings(self) -> Dict[str, List[str]]:
+        """List the files of each font directory, reusing cached listings."""
+        cached = {}
+        if self.cache_path and self.cache_path.exists():
+            try:
+                cached = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                cached = {}
+
+        listings = {}
+        changed = False
+        for font_dir in self.font_dirs:
+            try:
+                mtime = font_dir.stat().st_mtime_ns
+            except OSError:
+                continue
+
+            entry = cached.get(str(font_dir))
+            if entry and entry.get("mtime") == mtime:
+                listings[str(font_dir)] = entry["files"]
+                continue
+
+            try:
+                files = [f.name for f in font_dir.iterdir() if f.is_file()]
+            except (OSError, PermissionError):
+                continue
+            listings[str(font_dir)] = files
+            cached[str(font_dir)] = {"mtime": mtime, "files": files}
+            changed = True
+
+        if changed and self.cache_path:
+            try:
+                self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+                self.cache_path.write_text(json.dumps(cached), encoding="utf-8")
+            except OSError:
+                pass
+        return listings
+
+    def _load_fontconfig(self) -> Dict[str, str]:
+        """Map lowercase family names to font files using fc-list."""
+        families: Dict[str, str] = {}
+        if not shutil.which("fc-list"):
+            return families
+
+        try:
+            result = subprocess.run(
+                ["fc-list", "--format", "%{family}\t%{style}\t%{file}\n"],
+                capture_output=True,
+                text=True,
+                timeout=10,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return families
+
+        regular = set()
+        extensions = tuple(self.extensions) + (".ttc",)
+        for line in result.stdout.splitlines():
+            parts = line.split("\t")
+            if len(parts) != 3 or not parts[2].lower().endswith(extensions):
+                continue
+            family_names, style, file_path = parts
+            is_regular = any(s in style for s in ("Regular", "Book", "Normal"))
+            for family in family_names.split(","):
+                key = family.strip().lower()
+                # Prefer the regular face of each family
+                if key not in families or (is_regular and key not in regular):
+                    families[key] = file_path
+                    if is_regular:
+                        regular.add(key)
+        return families
+
+    def find(self, font_name: str) -> Optional[str]:
+        """Resolve a font name to a font file path, or None if not found."""
+        if font_name not in self._resolved:
+            self._resolved[font_name] = self._find_uncached(font_name)
+        return self._resolved[font_name]
+
+    def _find_uncached(self, font_name: str) -> Optional[str]:
+        # Common font file variations to try
+        font_variations = [
+            font_name,
+            font_name.lower(),
+            font_name.replace(" ", ""),
+            font_name.replace(" ", "-"),
+        ]
+        font_name_lower = font_name.lower().replace(" ", "")
+        # macOS file systems are case-insensitive
+        fold_case = self.system == "Darwin"
+
+        for font_dir in self.font_dirs:
+            files = self._files.get(str(font_dir))
+            if files is None:
+                continue
+
+            # First try exact matches
+            names = {f.lower() for f in files} if fold_case else set(files)
+            for variant in font_variations:
+                for ext in self.extensions:
+                    candidate = f"{variant}{ext}"
+                    if (candidate.lower() if fold_case else candidate) in names:
+                        return str(font_dir / candidate)
+
+            # Then try fuzzy matching - find files containing the font name
+            for file_name in files:
+                file_name_lower = file_name.lower()
+                if font_name_lower in file_name_lower and any(
+                    file_name_lower.endswith(ext) for ext in self.extensions
+                ):
+                    return str(font_dir / file_name)
+
+        # Finally ask fontconfig, which also knows fonts in subdirectories
+        if self._fontconfig is None:
+            self._fontconfig = self._load_fontconfig()
+        return self._fontconfig.get(font_name.lower())
+
+
+@lru_cache(maxsize=1)
+def get_font_index() -> FontIndex:
+    """Return the process-wide font index, building it on first use."""
+    return FontIndex()
+
+
+@lru_cache(maxsize=256)
+def load_font(font_path: Optional[str], size: int) -> Any:
+    """Load a font for text measurement, falling back to PIL's default font.
+
+    Fonts are cached by (path, size) since the same few fonts are measured for
+    every paragraph in a deck.
+    """
+    if font_path:
+        try:
+            return ImageFont.truetype(font_path, size=size)
+        except Exception:
+            pass
+    return ImageFont.load_default()
+
+
+@lru_cache(maxsize=1)
+def get_measure_draw() -> Any:
+    """Return a shared ImageDraw used only for measuring text."""
+    return ImageDraw.Draw(Image.new("RGB", (1, 1)))
+
+
+class TextMeasurer:
+    """Measures and wraps text for one font using cached glyph advances.
+
+    Each character is measured with PIL once, and the width of a string is the
+    sum of its advances plus an optional kerning correction per character pair.
+    Prefix sums over a line then give the width of any substring in constant
+    time, so wrapping a paragraph no longer re-measures growing prefixes.
+    """
+
+    def __init__(self, font: Any, kerning: bool = True):
+        """Initialize for a loaded PIL font.
+
+        Args:
+            font: PIL font returned by load_font
+            kerning: If True, correct widths for kerning between character pairs
+        """
+        self.font = font
+        self.kerning = kerning
+        self._advances: Dict[str, float] = {}
+        self._kerns: Dict[str, float] = {}
+
+    def _advance(self, char: str) -> float:
+        advance = self._advances.get(char)
+        if advance is None:
+            advance = get_measure_draw().textlength(char, font=self.font)
+            self._advances[char] = advance
+        return advance
+
+    def _kern(self, pair: str) -> float:
+        kern = self._kerns.get(pair)
+        if kern is None:
+            pair_length = get_measure_draw().textlength(pair, font=self.font)
+            kern = pair_length - self._advance(pair[0]) - self._advance(pair[1])
+            self._kerns[pair] = kern
+        return kern
+
+    def _prefix_widths(self, text: str) -> Tuple[List[float], List[float]]:
+        """Return cumulative widths and the kerning applied before each character.
+
+        widths[i] is the width of text[:i]; kerns[i] is the kerning between
+        text[i - 1] and text[i] (0 for i == 0).
+        """
+        widths = [0.0]
+        kerns = [0.0]
+        total = 0.0
+        for i, char in enumerate(text):
+            if self.kerning and i > 0:
+                kern = self._kern(text[i - 1 : i + 1])
+                total += kern
+                kerns.append(kern)
+            elif i > 0:
+                kerns.append(0.0)
+            total += self._advance(char)
+            widths.append(total)
+        return widths, kerns
+
+    def textlength(self, text: str) -> float:
+        """Width of text in pixels, equivalent to ImageDraw.textlength."""
+        return self._prefix_widths(text)[0][-1]
+
+    def wrap(self, line: str, max_width_px: int) -> List[str]:
+        """Wrap a single line of text to fit within max_width_px.
+
+        Breaks greedily at spaces like a word processor: words are added to the
+        current line while it fits, and a word wider than the line keeps a line
+        of its own.
+        """
+        if not line:
+            return [""]
+
+        widths, kerns = self._prefix_widths(line)
+
+        def width(start: int, end: int) -> float:
+            # Kerning between line[start - 1] and line[start] is outside the slice
+            if end <= start:
+                return 0.0
+            return widths[end] - widths[start] - kerns[start]
+
+        if widths[-1] <= max_width_px:
+            return [line]
+
+        # Current line is always the slice line[start:end] of the original text
+        wrapped = []
+        start = end = 0
+        pos = 0
+        for word in line.split(" "):
+            word_start, word_end = pos, pos + len(word)
+            pos = word_end + 1
+            test_start = start if end > start else word_start
+            if width(test_start, word_end) <= max_width_px:
+                start, end = test_start, word_end
+            else:
+                if end > start:
+                    wrapped.append(line[start:end])
+                start, end = word_start, word_end
+
+        if end > start:
+            wrapped.append(line[start:end])
+
+        return wrapped
+
+
+@lru_cache(maxsize=256)
+def get_text_measurer(font_path: Optional[str], size: int) -> TextMeasurer:
+    """Return the shared TextMeasurer for a font path and size."""
+    return TextMeasurer(load_font(font_path, size))
+
+
+class InventoryContext:
+    """Per-presentation values shared by all ShapeData objects of an inventory.
+
+    Slide dimensions, layout placeholder font sizes, and master text style font
+    sizes are the same for every shape that shares a presentation, layout, or
+    master, so each is computed once and memoized here.
+    """
+
+    def __init__(self, prs: Any):
+        """Initialize from a Presentation object.
+
+        Args:
+            prs: The Presentation the inventory is extracted from
+        """
+        try:
+            self.slide_width: Optional[int] = prs.slide_width
+            self.slide_height: Optional[int] = prs.slide_height
+        except (AttributeError, TypeError):
+            self.slide_width, self.slide_height = None, None
+        # Keyed by part name, so copies of the same deck can share a context
+        self._layout_font_sizes: Dict[Any, Dict[Any, Optional[float]]] = {}
+        self._master_font_sizes: Dict[Tuple[Any, str], int] = {}
+
+    def layout_font_size(
+        self, slide_layout: Any, placeholder_type: Any
+    ) -> Optional[float]:
+        """Default font size of a layout placeholder, as in get_default_font_size."""
+        sizes = self._layout_font_sizes.get(slide_layout.part.partname)
+        if sizes is None:
+            sizes = {}
+            try:
+                for layout_placeholder in slide_layout.placeholders:
+                    ph_type = layout_placeholder.placeholder_format.type
+                    # Only the first placeholder of each type is consulted
+                    if ph_type not in sizes:
+                        sizes[ph_type] = ShapeData.get_placeholder_font_size(
+                            layout_placeholder
+                        )
+            except Exception:
+                pass
+            self._layout_font_sizes[slide_layout.part.partname] = sizes
+        return sizes.get(placeholder_type)
+
+    def master_font_size(self, slide_master: Any, style_name: str) -> int:
+        """Font size of a master text style, as in get_master_font_size."""
+        key = (slide_master.part.partname, style_name)
+        if key not in self._master_font_sizes:
+            self._master_font_sizes[key] = ShapeData.get_master_font_size(
+                slide_master, style_name
+            )
+        return self._master_font_sizes[key]
+
+
 class ParagraphData:
     """Data structure for paragraph properties extracted from a PowerPoint paragraph."""
 
+    __slots__ = (
+        "text",
+        "bullet",
+        "level",
+        "alignment",
+        "space_before",
+        "space_after",
+        "font_name",
+        "font_size",
+        "bold",
+        "italic",
+        "underline",
+        "color",
+        "theme_color",
+        "line_spacing",
+    )
+
     def __init__(self, paragraph: Any):
         """Initialize from a PowerPoint paragraph object.
 
@@ -206,18 +610,21 @@ class ParagraphData:
                 if font.underline is not None:
                     self.underline = font.underline
 
-                # Handle color - both RGB and theme colors
-                try:
-                    # Try RGB color first
-                    if font.color.rgb:
-                        self.color = str(font.color.rgb)
-                except (AttributeError, TypeError):
-                    # Fall back to theme color
+                # Handle color - both RGB and theme colors. Read the fill directly,
+                # since font.color adds an empty <a:solidFill/> to runs without one
+                if font.fill.type == MSO_FILL.SOLID:
+                    color = font.fill.fore_color
                     try:
-                        if font.color.theme_color:
-                            self.theme_color = font.color.theme_color.name
+                        # Try RGB color first
+                        if color.rgb:
+                            self.color = str(color.rgb)
                     except (AttributeError, TypeError):
-                        pass
+                        # Fall back to theme color
+                        try:
+                            if color.theme_color:
+                                self.theme_color = color.theme_color.name
+                        except (AttributeError, TypeError):
+                            pass
 
         # Add line spacing if set
         if hasattr(paragraph, "line_spacing") and paragraph.line_spacing is not None:
@@ -264,7 +671,36 @@ class ParagraphData:
 
 
 class ShapeData:
-    """Data structure for shape properties extracted from a PowerPoint shape."""
+    """Data structure for shape properties extracted from a PowerPoint shape.
+
+    Geometry is computed up front. Text frame overflow and formatting warnings
+    are computed on first access, so callers that only need positions never pay
+    for text measurement.
+    """
+
+    __slots__ = (
+        "shape",
+        "shape_id",
+        "context",
+        "level",
+        "slide_width_emu",
+        "slide_height_emu",
+        "placeholder_type",
+        "default_font_size",
+        "left",
+        "top",
+        "width",
+        "height",
+        "left_emu",
+        "top_emu",
+        "width_emu",
+        "height_emu",
+        "slide_overflow_right",
+        "slide_overflow_bottom",
+        "overlapping_shapes",
+        "_frame_overflow_bottom",
+        "_warnings",
+    )
 
     @staticmethod
     def emu_to_inches(emu: int) -> float:
@@ -286,61 +722,7 @@ class ShapeData:
         Returns:
             Path to the font file, or None if not found
         """
-        system = platform.system()
-
-        # Common font file variations to try
-        font_variations = [
-            font_name,
-            font_name.lower(),
-            font_name.replace(" ", ""),
-            font_name.replace(" ", "-"),
-        ]
-
-        # Define font directories and extensions by platform
-        if system == "Darwin":  # macOS
-            font_dirs = [
-                "/System/Library/Fonts/",
-                "/Library/Fonts/",
-                "~/Library/Fonts/",
-            ]
-            extensions = [".ttf", ".otf", ".ttc", ".dfont"]
-        else:  # Linux
-            font_dirs = [
-                "/usr/share/fonts/truetype/",
-                "/usr/local/share/fonts/",
-                "~/.fonts/",
-            ]
-            extensions = [".ttf", ".otf"]
-
-        # Try to find the font file
-        from pathlib import Path
-
-        for font_dir in font_dirs:
-            font_dir_path = Path(font_dir).expanduser()
-            if not font_dir_path.exists():
-                continue
-
-            # First try exact matches
-            for variant in font_variations:
-                for ext in extensions:
-                    font_path = font_dir_path / f"{variant}{ext}"
-                    if font_path.exists():
-                        return str(font_path)
-
-            # Then try fuzzy matching - find files containing the font name
-            try:
-                for file_path in font_dir_path.iterdir():
-                    if file_path.is_file():
-                        file_name_lower = file_path.name.lower()
-                        font_name_lower = font_name.lower().replace(" ", "")
-                        if font_name_lower in file_name_lower and any(
-                            file_name_lower.endswith(ext) for ext in extensions
-                        ):
-                            return str(file_path)
-            except (OSError, PermissionError):
-                continue
-
-        return None
+        return get_font_index().find(font_name)
 
     @staticmethod
     def get_slide_dimensions(slide: Any) -> tuple[Optional[int], Optional[int]]:
@@ -376,21 +758,62 @@ class ShapeData:
             shape_type = shape.placeholder_format.type  # type: ignore
             for layout_placeholder in slide_layout.placeholders:
                 if layout_placeholder.placeholder_format.type == shape_type:
-                    # Find first defRPr element with sz (size) attribute
-                    for elem in layout_placeholder.element.iter():
-                        if "defRPr" in elem.tag and (sz := elem.get("sz")):
-                            return float(sz) / 100.0  # Convert EMUs to points
-                    break
+                    return ShapeData.get_placeholder_font_size(layout_placeholder)
+        except Exception:
+            pass
+        return None
+
+    @staticmethod
+    def get_placeholder_font_size(layout_placeholder: Any) -> Optional[float]:
+        """Get the first defRPr font size defined on a layout placeholder.
+
+        Args:
+            layout_placeholder: Placeholder shape from a slide layout
+
+        Returns:
+            Font size in points, or None if not found
+        """
+        try:
+            # Find first defRPr element with sz (size) attribute
+            for elem in layout_placeholder.element.iter():
+                if "defRPr" in elem.tag and (sz := elem.get("sz")):
+                    return float(sz) / 100.0  # Convert EMUs to points
         except Exception:
             pass
         return None
 
+    @staticmethod
+    def get_master_font_size(slide_master: Any, style_name: str) -> int:
+        """Get the font size of a text style in the slide master.
+
+        Args:
+            slide_master: Slide master whose txStyles are searched
+            style_name: "titleStyle" or "bodyStyle"
+
+        Returns:
+            Font size in points, or 14 if not found
+        """
+        try:
+            # Find font size in theme styles
+            for child in slide_master.element.iter():
+                tag = child.tag.split("}")[-1] if "}" in child.tag else child.tag
+                if tag == style_name:
+                    for elem in child.iter():
+                        if "sz" in elem.attrib:
+                            return int(elem.attrib["sz"]) // 100
+        except Exception:
+            pass
+
+        return 14  # Conservative default for body text
+
     def __init__(
         self,
         shape: BaseShape,
         absolute_left: Optional[int] = None,
         absolute_top: Optional[int] = None,
         slide: Optional[Any] = None,
+        context: Optional[InventoryContext] = None,
+        level: str = "full",
     ):
         """Initialize from a PowerPoint shape object.
 
@@ -399,14 +822,22 @@ class ShapeData:
             absolute_left: Absolute left position in EMUs (for shapes in groups)
             absolute_top: Absolute top position in EMUs (for shapes in groups)
             slide: Optional slide object to get dimensions and layout information
+            context: Optional InventoryContext shared by all shapes of the presentation
+            level: Inventory level, one of INVENTORY_LEVELS (default: "full")
         """
         self.shape = shape  # Store reference to original shape
         self.shape_id: str = ""  # Will be set after sorting
+        self.context = context
+        self.level = level
 
-        # Get slide dimensions from slide object
-        self.slide_width_emu, self.slide_height_emu = (
-            self.get_slide_dimensions(slide) if slide else (None, None)
-        )
+        # Get slide dimensions from the shared context or the slide object
+        if context and slide:
+            self.slide_width_emu = context.slide_width
+            self.slide_height_emu = context.slide_height
+        else:
+            self.slide_width_emu, self.slide_height_emu = (
+                self.get_slide_dimensions(slide) if slide else (None, None)
+            )
 
         # Get placeholder type if applicable
         self.placeholder_type: Optional[str] = None
@@ -418,10 +849,15 @@ class ShapeData:
                 )
 
                 # Get default font size from layout
-                if slide and hasattr(slide, "slide_layout"):
-                    self.default_font_size = self.get_default_font_size(
-                        shape, slide.slide_layout
-                    )
+                if level != "geometry" and slide and hasattr(slide, "slide_layout"):
+                    if context:
+                        self.default_font_size = context.layout_font_size(
+                            slide.slide_layout, shape.placeholder_format.type  # type: ignore
+                        )
+                    else:
+                        self.default_font_size = self.get_default_font_size(
+                            shape, slide.slide_layout
+                        )
 
         # Get position information
         # Use absolute positions if provided (for shapes in groups), otherwise use shape's position
@@ -453,17 +889,55 @@ class ShapeData:
         self.width_emu = shape.width if hasattr(shape, "width") else 0
         self.height_emu = shape.height if hasattr(shape, "height") else 0
 
-        # Calculate overflow status
-        self.frame_overflow_bottom: Optional[float] = None
+        # Calculate overflow status (frame overflow and warnings are lazy)
+        self._frame_overflow_bottom: Optional[float] = _UNSET
+        self._warnings: List[str] = _UNSET
         self.slide_overflow_right: Optional[float] = None
         self.slide_overflow_bottom: Optional[float] = None
         self.overlapping_shapes: Dict[
             str, float
         ] = {}  # Dict of shape_id -> overlap area in sq inches
-        self.warnings: List[str] = []
-        self._estimate_frame_overflow()
-        self._calculate_slide_overflow()
-        self._detect_bullet_issues()
+        if level != "geometry":
+            self._calculate_slide_overflow()
+
+    @property
+    def frame_overflow_bottom(self) -> Optional[float]:
+        """Text overflow below the frame in inches, estimated on first access."""
+        if self._frame_overflow_bottom is _UNSET:
+            self._frame_overflow_bottom = None
+            if self.level == "full":
+                self._estimate_frame_overflow()
+        return self._frame_overflow_bottom
+
+    @property
+    def warnings(self) -> List[str]:
+        """Formatting warnings for the shape, detected on first access."""
+        if self._warnings is _UNSET:
+            self._warnings = []
+            if self.level != "geometry":
+                self._detect_bullet_issues()
+        return self._warnings
+
+    def reset_text_analysis(self) -> None:
+        """Forget the frame overflow and warnings computed so far.
+
+        Call after editing the shape's text; both are estimated again from the
+        current text frame on next access, while geometry is kept.
+        """
+        self._frame_overflow_bottom = _UNSET
+        self._warnings = _UNSET
+
+    def with_shape(self, shape: BaseShape) -> "ShapeData":
+        """Return a copy of this ShapeData bound to another shape.
+
+        Used for the same shape in another copy of the presentation: geometry and
+        layout information are kept, text analyses are computed again on access.
+        """
+        clone = copy.copy(self)
+        clone.shape = shape
+        clone.overlapping_shapes = dict(self.overlapping_shapes)
+        clone.reset_text_analysis()
+        return clone
 
     @property
     def paragraphs(self) -> List[ParagraphData]:
@@ -494,13 +968,9 @@ class ShapeData:
             if self.placeholder_type and "TITLE" in self.placeholder_type:
                 style_name = "titleStyle"
 
-            # Find font size in theme styles
-            for child in slide_master.element.iter():
-                tag = child.tag.split("}")[-1] if "}" in child.tag else child.tag
-                if tag == style_name:
-                    for elem in child.iter():
-                        if "sz" in elem.attrib:
-                            return int(elem.attrib["sz"]) // 100
+            if self.context:
+                return self.context.master_font_size(slide_master, style_name)
+            return self.get_master_font_size(slide_master, style_name)
         except Exception:
             pass
 
@@ -531,33 +1001,11 @@ class ShapeData:
             self.inches_to_pixels(usable_height),
         )
 
-    def _wrap_text_line(self, line: str, max_width_px: int, draw, font) -> List[str]:
+    def _wrap_text_line(
+        self, line: str, max_width_px: int, measurer: TextMeasurer
+    ) -> List[str]:
         """Wrap a single line of text to fit within max_width_px."""
-        if not line:
-            return [""]
-
-        # Use textlength for efficient width calculation
-        if draw.textlength(line, font=font) <= max_width_px:
-            return [line]
-
-        # Need to wrap - split into words
-        wrapped = []
-        words = line.split(" ")
-        current_line = ""
-
-        for word in words:
-            test_line = current_line + (" " if current_line else "") + word
-            if draw.textlength(test_line, font=font) <= max_width_px:
-                current_line = test_line
-            else:
-                if current_line:
-                    wrapped.append(current_line)
-                current_line = word
-
-        if current_line:
-            wrapped.append(current_line)
-
-        return wrapped
+        return measurer.wrap(line, max_width_px)
 
     def _estimate_frame_overflow(self) -> None:
         """Estimate if text overflows the shape bounds using PIL text measurement."""
@@ -573,10 +1021,6 @@ class ShapeData:
         if usable_width_px <= 0 or usable_height_px <= 0:
             return
 
-        # Set up PIL for text measurement
-        dummy_img = Image.new("RGB", (1, 1))
-        draw = ImageDraw.Draw(dummy_img)
-
         # Get default font size from placeholder or use conservative estimate
         default_font_size = self._get_default_font_size()
 
@@ -593,20 +1037,12 @@ class ShapeData:
             font_name = para_data.font_name or "Arial"
             font_size = int(para_data.font_size or default_font_size)
 
-            font = None
-            font_path = self.get_font_path(font_name)
-            if font_path:
-                try:
-                    font = ImageFont.truetype(font_path, size=font_size)
-                except Exception:
-                    font = ImageFont.load_default()
-            else:
-                font = ImageFont.load_default()
+            measurer = get_text_measurer(self.get_font_path(font_name), font_size)
 
             # Wrap all lines in this paragraph
             all_wrapped_lines = []
             for line in paragraph.text.split("\n"):
-                wrapped = self._wrap_text_line(line, usable_width_px, draw, font)
+                wrapped = self._wrap_text_line(line, usable_width_px, measurer)
                 all_wrapped_lines.extend(wrapped)
 
             if all_wrapped_lines:
@@ -634,7 +1070,7 @@ class ShapeData:
             overflow_px = total_height_px - usable_height_px
             overflow_inches = round(overflow_px / 96.0, 2)
             if overflow_inches > 0.05:  # Only report significant overflows
-                self.frame_overflow_bottom = overflow_inches
+                self._frame_overflow_bottom = overflow_inches
 
     def _calculate_slide_overflow(self) -> None:
         """Calculate if shape overflows the slide boundaries."""
@@ -673,7 +1109,7 @@ class ShapeData:
             text = paragraph.text.strip()
             # Check for manual bullet symbols
             if text and any(text.startswith(symbol + " ") for symbol in bullet_symbols):
-                self.warnings.append(
+                self._warnings.append(
                     "manual_bullet_symbol: use proper bullet formatting"
                 )
                 break
@@ -734,7 +1170,8 @@ class ShapeData:
             result["warnings"] = self.warnings
 
         # Add paragraphs after placeholder_type
-        result["paragraphs"] = [para.to_dict() for para in self.paragraphs]
+        if self.level != "geometry":
+            result["paragraphs"] = [para.to_dict() for para in self.paragraphs]
 
         return result
 
@@ -879,6 +1316,44 @@ def calculate_overlap(
     return False, 0
 
 
+def find_overlapping_pairs(
+    rects: List[Tuple[float, float, float, float]], tolerance: float = 0.05
+) -> List[Tuple[int, int, float]]:
+    """Find all pairs of overlapping rectangles with a sweep over the x axis.
+
+    Rectangles are visited in order of their left edge while keeping an active
+    list of those whose right edge is still more than tolerance past the current
+    left edge. Only active rectangles can overlap the current one, so dense slides
+    avoid comparing every pair. Candidates are checked with calculate_overlap,
+    giving the same results as the pairwise comparison.
+
+    Args:
+        rects: List of (left, top, width, height) rectangles in inches
+        tolerance: Minimum overlap in inches to consider as overlapping (default: 0.05")
+
+    Returns:
+        List of (i, j, overlap_area) with i < j, sorted by (i, j)
+    """
+    order = sorted(range(len(rects)), key=lambda k: rects[k][0])
+    active: List[Tuple[float, int]] = []  # (right edge, index)
+    pairs = []
+
+    for j in order:
+        left, _, width, _ = rects[j]
+        active = [(right, i) for right, i in active if right - left > tolerance]
+        for _, i in active:
+            first, second = min(i, j), max(i, j)
+            overlaps, overlap_area = calculate_overlap(
+                rects[first], rects[second], tolerance
+            )
+            if overlaps:
+                pairs.append((first, second, overlap_area))
+        active.append((left + width, j))
+
+    pairs.sort()
+    return pairs
+
+
 def detect_overlaps(shapes: List[ShapeData]) -> None:
     """Detect overlapping shapes and update their overlapping_shapes dictionaries.
 
@@ -888,31 +1363,26 @@ def detect_overlaps(shapes: List[ShapeData]) -> None:
     Args:
         shapes: List of ShapeData objects with shape_id attributes set
     """
-    n = len(shapes)
-
-    # Compare each pair of shapes
-    for i in range(n):
-        for j in range(i + 1, n):
-            shape1 = shapes[i]
-            shape2 = shapes[j]
-
-            # Ensure shape IDs are set
-            assert shape1.shape_id, f"Shape at index {i} has no shape_id"
-            assert shape2.shape_id, f"Shape at index {j} has no shape_id"
+    for i, shape in enumerate(shapes):
+        # Ensure shape IDs are set
+        assert shape.shape_id, f"Shape at index {i} has no shape_id"
 
-            rect1 = (shape1.left, shape1.top, shape1.width, shape1.height)
-            rect2 = (shape2.left, shape2.top, shape2.width, shape2.height)
+    rects = [(s.left, s.top, s.width, s.height) for s in shapes]
 
-            overlaps, overlap_area = calculate_overlap(rect1, rect2)
-
-            if overlaps:
-                # Add shape IDs with overlap area in square inches
-                shape1.overlapping_shapes[shape2.shape_id] = overlap_area
-                shape2.overlapping_shapes[shape1.shape_id] = overlap_area
+    # Pairs come back sorted, so each dict keeps the order of the pairwise scan
+    for i, j, overlap_area in find_overlapping_pairs(rects):
+        # Add shape IDs with overlap area in square inches
+        shapes[i].overlapping_shapes[shapes[j].shape_id] = overlap_area
+        shapes[j].overlapping_shapes[shapes[i].shape_id] = overlap_area
 
 
 def extract_text_inventory(
-    pptx_path: Path, prs: Optional[Any] = None, issues_only: bool = False
+    pptx_path: Path,
+    prs: Optional[Any] = None,
+    issues_only: bool = False,
+    level: str = "full",
+    slide_step: int = 1,
+    slide_offset: int = 0,
 ) -> InventoryData:
     """Extract text content from all slides in a PowerPoint presentation.
 
@@ -920,17 +1390,27 @@ def extract_text_inventory(
         pptx_path: Path to the PowerPoint file
         prs: Optional Presentation object to use. If not provided, will load from pptx_path.
         issues_only: If True, only include shapes that have overflow or overlap issues
+        level: One of INVENTORY_LEVELS. "geometry" skips text analysis and overlap
+               detection, "text" skips PIL overflow estimation (default: "full")
+        slide_step: Only process every slide_step-th slide (default: 1)
+        slide_offset: Index of the first slide to process (default: 0)
 
     Returns a nested dictionary: {slide-N: {shape-N: ShapeData}}
     Shapes are sorted by visual position (top-to-bottom, left-to-right).
     The ShapeData objects contain the full shape information and can be
     converted to dictionaries for JSON serialization using to_dict().
     """
+    if level not in INVENTORY_LEVELS:
+        raise ValueError(f"Unknown inventory level: {level}")
     if prs is None:
         prs = Presentation(str(pptx_path))
+    context = InventoryContext(prs)
     inventory: InventoryData = {}
 
     for slide_idx, slide in enumerate(prs.slides):
+        if slide_idx < slide_offset or (slide_idx - slide_offset) % slide_step:
+            continue
+
         # Collect all valid shapes from this slide with absolute positions
         shapes_with_positions = []
         for shape in slide.shapes:  # type: ignore
@@ -946,6 +1426,8 @@ def extract_text_inventory(
                 swp.absolute_left,
                 swp.absolute_top,
                 slide,
+                context,
+                level,
             )
             for swp in shapes_with_positions
         ]
@@ -956,7 +1438,7 @@ def extract_text_inventory(
             shape_data.shape_id = f"shape-{idx}"
 
         # Detect overlaps using the stable shape IDs
-        if len(sorted_shapes) > 1:
+        if level != "geometry" and len(sorted_shapes) > 1:
             detect_overlaps(sorted_shapes)
 
         # Filter for issues only if requested (after overlap detection)
@@ -974,30 +1456,78 @@ def extract_text_inventory(
     return inventory
 
 
-def get_inventory_as_dict(pptx_path: Path, issues_only: bool = False) -> InventoryDict:
+def _inventory_worker(
+    pptx_path: Path, issues_only: bool, level: str, jobs: int, worker_idx: int
+) -> Tuple[int, InventoryDict]:
+    """Extract the inventory of every jobs-th slide, starting at worker_idx.
+
+    Runs in a worker process with its own read-only copy of the presentation.
+    Shape IDs are assigned per slide, so they match a serial extraction.
+    """
+    inventory = extract_text_inventory(
+        pptx_path,
+        issues_only=issues_only,
+        level=level,
+        slide_step=jobs,
+        slide_offset=worker_idx,
+    )
+    return worker_idx, inventory_to_dict(inventory)
+
+
+def inventory_to_dict(inventory: InventoryData) -> InventoryDict:
+    """Convert ShapeData objects to dictionaries for JSON serialization."""
+    dict_inventory: InventoryDict = {}
+    for slide_key, shapes in inventory.items():
+        dict_inventory[slide_key] = {
+            shape_key: shape_data.to_dict() for shape_key, shape_data in shapes.items()
+        }
+    return dict_inventory
+
+
+def get_inventory_as_dict(
+    pptx_path: Path, issues_only: bool = False, level: str = "full", jobs: int = 1
+) -> InventoryDict:
     """Extract text inventory and return as JSON-serializable dictionaries.
 
     This is a convenience wrapper around extract_text_inventory that returns
     dictionaries instead of ShapeData objects, useful for testing and direct
     JSON serialization.
 
+    With jobs > 1, slides are split across worker processes that each open the
+    file read-only, and the results are merged back in slide order.
+
     Args:
         pptx_path: Path to the PowerPoint file
         issues_only: If True, only include shapes that have overflow or overlap issues
+        level: One of INVENTORY_LEVELS (default: "full")
+        jobs: Number of worker processes (default: 1, no workers)
 
     Returns:
         Nested dictionary with all data serialized for JSON
     """
-    inventory = extract_text_inventory(pptx_path, issues_only=issues_only)
+    if jobs <= 1:
+        inventory = extract_text_inventory(
+            pptx_path, issues_only=issues_only, level=level
+        )
+        return inventory_to_dict(inventory)
 
-    # Convert ShapeData objects to dictionaries
-    dict_inventory: InventoryDict = {}
-    for slide_key, shapes in inventory.items():
-        dict_inventory[slide_key] = {
-            shape_key: shape_data.to_dict() for shape_key, shape_data in shapes.items()
-        }
+    if level not in INVENTORY_LEVELS:
+        raise ValueError(f"Unknown inventory level: {level}")
 
-    return dict_inventory
+    merged: Dict[int, Dict[str, ShapeDict]] = {}
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                _inventory_worker, pptx_path, issues_only, level, jobs, worker_idx
+            )
+            for worker_idx in range(jobs)
+        ]
+        for future in futures:
+            _, partial = future.result()
+            for slide_key, shapes in partial.items():
+                merged[int(slide_key.split("-")[1])] = shapes
+
+    return {f"slide-{idx}": merged[idx] for idx in sorted(merged)}
 
 
 def save_inventory(inventory: InventoryData, output_path: Path) -> None:
@@ -1005,13 +1535,11 @@ def save_inventory(inventory: InventoryData, output_path: Path) -> None:
 
     Converts ShapeData objects to dictionaries for JSON serialization.
     """
-    # Convert ShapeData objects to dictionaries
-    json_inventory: InventoryDict = {}
-    for slide_key, shapes in inventory.items():
-        json_inventory[slide_key] = {
-            shape_key: shape_data.to_dict() for shape_key, shape_data in shapes.items()
-        }
+    write_inventory_json(inventory_to_dict(inventory), output_path)
+
 
+def write_inventory_json(json_inventory: InventoryDict, output_path: Path) -> None:
+    """Write an already serialized inventory to a JSON file."""
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(json_inventory, f, indent=2, ensure_ascii=False)
 
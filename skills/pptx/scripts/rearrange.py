@@ -12,11 +12,15 @@ Slides can be repeated (e.g., 34 appears twice).
 import argparse
 import shutil
 import sys
+from collections import Counter, defaultdict
 from copy import deepcopy
 from pathlib import Path
 
-import six
 from pptx import Presentation
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.packuri import PackURI
+from pptx.parts.slide import SlidePart
 
 
 def main():
@@ -72,84 +76,79 @@ Note: Slide indices are 0-based (first slide is 0, second is 1, etc.)
         sys.exit(1)
 
 
-def duplicate_slide(pres, index):
-    """Duplicate a slide in the presentation."""
-    source = pres.slides[index]
-
-    # Use source's layout to preserve formatting
-    new_slide = pres.slides.add_slide(source.slide_layout)
-
-    # Collect all image and media relationships from the source slide
-    image_rels = {}
-    for rel_id, rel in six.iteritems(source.part.rels):
-        if "image" in rel.reltype or "media" in rel.reltype:
-            image_rels[rel_id] = rel
-
-    # CRITICAL: Clear placeholder shapes to avoid duplicates
-    for shape in new_slide.shapes:
-        sp = shape.element
-        sp.getparent().remove(sp)
-
-    # Copy all shapes from source
-    for shape in source.shapes:
-        el = shape.element
-        new_el = deepcopy(el)
-        new_slide.shapes._spTree.insert_element_before(new_el, "p:extLst")
-
-        # Handle picture shapes - need to update the blip reference
-        # Look for all blip elements (they can be in pic or other contexts)
-        # Using the element's own xpath method without namespaces argument
-        blips = new_el.xpath(".//a:blip[@r:embed]")
-        for blip in blips:
-            old_rId = blip.get(
-                "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed"
-            )
-            if old_rId in image_rels:
-                # Create a new relationship in the destination slide for this image
-                old_rel = image_rels[old_rId]
-                # get_or_add returns the rId directly, or adds and returns new rId
-                new_rId = new_slide.part.rels.get_or_add(
-                    old_rel.reltype, old_rel._target
-                )
-                # Update the blip's embed reference to use the new relationship ID
-                blip.set(
-                    "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed",
-                    new_rId,
-                )
+# Relationships that belong to a single slide and are not shared with clones
+PER_SLIDE_RELTYPES = {RT.NOTES_SLIDE, RT.COMMENTS}
+
+R_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
 
-    # Copy any additional image/media relationships that might be referenced elsewhere
-    for rel_id, rel in image_rels.items():
-        try:
-            new_slide.part.rels.get_or_add(rel.reltype, rel._target)
-        except Exception:
-            pass  # Relationship might already exist
 
-    return new_slide
+def clone_slides(pres, source_indices):
+    """Clone slides in bulk, returning the presentation rId of each clone.
 
+    Each clone is a new slide part holding a deep copy of the source slide XML.
+    Its relationships point at the same layout, image, media and other parts as
+    the source, so media is shared by reference instead of being copied. Notes and
+    comments belong to a single slide and are not carried over. The clones are
+    not added to the slide list; the caller places their rIds.
+    """
+    package = pres.part.package
+    sources = [pres.slides[index].part for index in source_indices]
+
+    # Find free partnames once instead of rescanning the package for every clone
+    used = {str(part.partname) for part in package.iter_parts()}
+    number = 0
+
+    clone_rIds = []
+    for source in sources:
+        number += 1
+        while f"/ppt/slides/slide{number}.xml" in used:
+            number += 1
+
+        element = deepcopy(source._element)
+        clone = SlidePart(
+            partname=PackURI(f"/ppt/slides/slide{number}.xml"),
+            content_type=CT.PML_SLIDE,
+            element=element,
+            package=package,
+        )
 
-def delete_slide(pres, index):
-    """Delete a slide from the presentation."""
-    rId = pres.slides._sldIdLst[index].rId
-    pres.part.drop_rel(rId)
-    del pres.slides._sldIdLst[index]
+        rId_map = {}
+        for rId, rel in source.rels.items():
+            if rel.reltype in PER_SLIDE_RELTYPES:
+                continue
+            if rel.is_external:
+                rId_map[rId] = clone.relate_to(
+                    rel.target_ref, rel.reltype, is_external=True
+                )
+            else:
+                rId_map[rId] = clone.relate_to(rel.target_part, rel.reltype)
+        remap_relationship_ids(element, rId_map)
 
+        clone_rIds.append(pres.part.relate_to(clone, RT.SLIDE))
 
-def reorder_slides(pres, slide_index, target_index):
-    """Move a slide from one position to another."""
-    slides = pres.slides._sldIdLst
+    return clone_rIds
 
-    # Remove slide element from current position
-    slide_element = slides[slide_index]
-    slides.remove(slide_element)
 
-    # Insert at target position
-    slides.insert(target_index, slide_element)
+def remap_relationship_ids(element, rId_map):
+    """Rewrite r:id style attributes in element after relationships were renumbered."""
+    if all(old == new for old, new in rId_map.items()):
+        return
+    for node in element.iter():
+        if not isinstance(node.tag, str):
+            continue  # Comments and processing instructions
+        for name, value in node.attrib.items():
+            if name.startswith(R_NS) and value in rId_map:
+                node.set(name, rId_map[value])
 
 
 def rearrange_presentation(template_path, output_path, slide_sequence):
     """
     Create a new presentation with slides from template in specified order.
 
+    The first occurrence of each template slide uses the original, later
+    occurrences use clones made in one batch, and the slide list is rebuilt once
+    in the final order, so the work grows linearly with the sequence length.
+
     Args:
         template_path: Path to template PPTX file
         output_path: Path for output PPTX file
@@ -169,57 +168,49 @@ def rearrange_presentation(template_path, output_path, slide_sequence):
         if idx < 0 or idx >= total_slides:
             raise ValueError(f"Slide index {idx} out of range (0-{total_slides - 1})")
 
-    # Track original slides and their duplicates
-    slide_map = []  # List of actual slide indices for final presentation
-    duplicated = {}  # Track duplicates: original_idx -> [duplicate_indices]
+    sldIdLst = prs.slides._sldIdLst
+    template_ids = list(sldIdLst)
+    counts = Counter(slide_sequence)
 
-    # Step 1: DUPLICATE repeated slides
+    # Step 1: CLONE each repeated slide once per extra occurrence
+    clone_sources = [idx for idx, count in counts.items() for _ in range(count - 1)]
     print(f"Processing {len(slide_sequence)} slides from template...")
+    if clone_sources:
+        print(f"Creating {len(clone_sources)} duplicate(s)...")
+    pending = defaultdict(list)
+    for idx, rId in zip(clone_sources, clone_slides(prs, clone_sources)):
+        pending[idx].append(rId)
+    pending = {idx: iter(rIds) for idx, rIds in pending.items()}
+
+    # Step 2: ORDER the original slides and clones as in the sequence
+    final_order = []  # Original sldId elements, or rIds of clones
+    seen = set()
     for i, template_idx in enumerate(slide_sequence):
-        if template_idx in duplicated and duplicated[template_idx]:
-            # Already duplicated this slide, use the duplicate
-            slide_map.append(duplicated[template_idx].pop(0))
-            print(f"  [{i}] Using duplicate of slide {template_idx}")
-        elif slide_sequence.count(template_idx) > 1 and template_idx not in duplicated:
-            # First occurrence of a repeated slide - create duplicates
-            slide_map.append(template_idx)
-            duplicates = []
-            count = slide_sequence.count(template_idx) - 1
-            print(
-                f"  [{i}] Using original slide {template_idx}, creating {count} duplicate(s)"
-            )
-            for _ in range(count):
-                duplicate_slide(prs, template_idx)
-                duplicates.append(len(prs.slides) - 1)
-            duplicated[template_idx] = duplicates
-        else:
-            # Unique slide or first occurrence already handled, use original
-            slide_map.append(template_idx)
+        if template_idx not in seen:
+            seen.add(template_idx)
+            final_order.append(template_ids[template_idx])
             print(f"  [{i}] Using original slide {template_idx}")
+        else:
+            final_order.append(next(pending[template_idx]))
+            print(f"  [{i}] Using duplicate of slide {template_idx}")
 
-    # Step 2: DELETE unwanted slides (work backwards)
-    slides_to_keep = set(slide_map)
-    print(f"\nDeleting {len(prs.slides) - len(slides_to_keep)} unused slides...")
-    for i in range(len(prs.slides) - 1, -1, -1):
-        if i not in slides_to_keep:
-            delete_slide(prs, i)
-            # Update slide_map indices after deletion
-            slide_map = [idx - 1 if idx > i else idx for idx in slide_map]
-
-    # Step 3: REORDER to final sequence
-    print(f"Reordering {len(slide_map)} slides to final sequence...")
-    for target_pos in range(len(slide_map)):
-        # Find which slide should be at target_pos
-        current_pos = slide_map[target_pos]
-        if current_pos != target_pos:
-            reorder_slides(prs, current_pos, target_pos)
-            # Update slide_map: the move shifts other slides
-            for i in range(len(slide_map)):
-                if slide_map[i] > current_pos and slide_map[i] <= target_pos:
-                    slide_map[i] -= 1
-                elif slide_map[i] < current_pos and slide_map[i] >= target_pos:
-                    slide_map[i] += 1
-            slide_map[target_pos] = target_pos
+    # Step 3: DELETE unwanted slides by dropping their relationships
+    unused = [sldId for idx, sldId in enumerate(template_ids) if idx not in counts]
+    print(f"\nDeleting {len(unused)} unused slides...")
+    for sldId in unused:
+        prs.part.rels.pop(sldId.rId)
+
+    # Step 4: REBUILD the slide list in the final order
+    print(f"Reordering {len(final_order)} slides to final sequence...")
+    next_id = max((sldId.id for sldId in template_ids), default=255) + 1
+    for sldId in template_ids:
+        sldIdLst.remove(sldId)
+    for entry in final_order:
+        if isinstance(entry, str):
+            sldIdLst._add_sldId(id=next_id, rId=entry)
+            next_id += 1
+        else:
+            sldIdLst.append(entry)
 
     # Save the presentation
     prs.save(output_path)
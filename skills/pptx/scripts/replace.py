@@ -3,16 +3,22 @@
 
 Usage:
     python replace.py <input.pptx> <replacements.json> <output.pptx>
+    python replace.py <input.pptx> --batch <payloads...> --output-dir <dir> [--jobs N]
 
 The replacements JSON should have the structure output by inventory.py.
 ALL text shapes identified by inventory.py will have their text cleared
 unless "paragraphs" is specified in the replacements for that shape.
 """
 
+import argparse
 import json
 import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from inventory import InventoryData, extract_text_inventory
 from pptx import Presentation
@@ -20,6 +26,7 @@ from pptx.dml.color import RGBColor
 from pptx.enum.dml import MSO_THEME_COLOR
 from pptx.enum.text import PP_ALIGN
 from pptx.oxml.xmlchemy import OxmlElement
+from pptx.shapes.shapetree import SlideShapeFactory
 from pptx.util import Pt
 
 
@@ -211,39 +218,24 @@ def check_duplicate_keys(pairs):
     return result
 
 
-def apply_replacements(pptx_file: str, json_file: str, output_file: str):
-    """Apply text replacements from JSON to PowerPoint presentation."""
-
-    # Load presentation
-    prs = Presentation(pptx_file)
-
-    # Get inventory of all text shapes (returns ShapeData objects)
-    # Pass prs to use same Presentation instance
-    inventory = extract_text_inventory(Path(pptx_file), prs)
-
-    # Detect text overflow in original presentation
-    original_overflow = detect_frame_overflow(inventory)
-
-    # Load replacement data with duplicate key detection
+def load_replacements(json_file: str) -> Dict:
+    """Load replacement data from a JSON file with duplicate key detection."""
     with open(json_file, "r") as f:
-        replacements = json.load(f, object_pairs_hook=check_duplicate_keys)
+        return json.load(f, object_pairs_hook=check_duplicate_keys)
 
-    # Validate replacements
-    errors = validate_replacements(inventory, replacements)
-    if errors:
-        print("ERROR: Invalid shapes in replacement JSON:")
-        for error in errors:
-            print(f"  - {error}")
-        print("\nPlease check the inventory and update your replacement JSON.")
-        print(
-            "You can regenerate the inventory with: python inventory.py <input.pptx> <output.json>"
-        )
-        raise ValueError(f"Found {len(errors)} validation error(s)")
 
-    # Track statistics
-    shapes_processed = 0
-    shapes_cleared = 0
-    shapes_replaced = 0
+def fill_shapes(
+    prs: Any, inventory: InventoryData, replacements: Dict
+) -> Tuple[InventoryData, Dict[str, int]]:
+    """Clear every inventoried shape and add its replacement paragraphs.
+
+    Returns:
+        Tuple of (replaced_inventory, stats) where replaced_inventory holds the
+        shapes that received new text and stats counts processed, cleared and
+        replaced shapes
+    """
+    replaced_inventory: InventoryData = {}
+    stats = {"processed": 0, "cleared": 0, "replaced": 0}
 
     # Process each slide from inventory
     for slide_key, shapes_dict in inventory.items():
@@ -258,7 +250,7 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
 
         # Process each shape from inventory
         for shape_key, shape_data in shapes_dict.items():
-            shapes_processed += 1
+            stats["processed"] += 1
 
             # Get the shape directly from ShapeData
             shape = shape_data.shape
@@ -270,14 +262,15 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
             text_frame = shape.text_frame  # type: ignore
 
             text_frame.clear()  # type: ignore
-            shapes_cleared += 1
+            stats["cleared"] += 1
 
             # Check for replacement paragraphs
             replacement_shape_data = replacements.get(slide_key, {}).get(shape_key, {})
             if "paragraphs" not in replacement_shape_data:
                 continue
 
-            shapes_replaced += 1
+            stats["replaced"] += 1
+            replaced_inventory.setdefault(slide_key, {})[shape_key] = shape_data
 
             # Add replacement paragraphs
             for i, para_data in enumerate(replacement_shape_data["paragraphs"]):
@@ -288,20 +281,24 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
 
                 apply_paragraph_properties(p, para_data)
 
-    # Check for issues after replacements
-    # Save to a temporary file and reload to avoid modifying the presentation during inventory
-    # (extract_text_inventory accesses font.color which adds empty <a:solidFill/> elements)
-    import tempfile
+    return replaced_inventory, stats
 
-    with tempfile.NamedTemporaryFile(suffix=".pptx", delete=False) as tmp:
-        tmp_path = Path(tmp.name)
-        prs.save(str(tmp_path))
 
-    try:
-        updated_inventory = extract_text_inventory(tmp_path)
-        updated_overflow = detect_frame_overflow(updated_inventory)
-    finally:
-        tmp_path.unlink()  # Clean up temp file
+def find_replacement_issues(
+    original_overflow: Dict[str, Dict[str, float]], replaced_inventory: InventoryData
+) -> Tuple[List[str], List[str]]:
+    """Re-measure the replaced shapes and compare against the original overflow.
+
+    Only shapes that received new text are checked, in memory. Geometry is
+    unchanged, and cleared shapes no longer hold text.
+
+    Returns:
+        Tuple of (overflow_errors, warnings) as printable messages
+    """
+    for shapes_dict in replaced_inventory.values():
+        for shape_data in shapes_dict.values():
+            shape_data.reset_text_analysis()
+    updated_overflow = detect_frame_overflow(replaced_inventory)
 
     # Check if any text overflow got worse
     overflow_errors = []
@@ -320,12 +317,50 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
 
     # Collect warnings from updated shapes
     warnings = []
-    for slide_key, shapes_dict in updated_inventory.items():
+    for slide_key, shapes_dict in replaced_inventory.items():
         for shape_key, shape_data in shapes_dict.items():
             if shape_data.warnings:
                 for warning in shape_data.warnings:
                     warnings.append(f"{slide_key}/{shape_key}: {warning}")
 
+    return overflow_errors, warnings
+
+
+def apply_replacements(pptx_file: str, json_file: str, output_file: str):
+    """Apply text replacements from JSON to PowerPoint presentation."""
+
+    # Load presentation
+    prs = Presentation(pptx_file)
+
+    # Get inventory of all text shapes (returns ShapeData objects)
+    # Pass prs to use same Presentation instance
+    inventory = extract_text_inventory(Path(pptx_file), prs)
+
+    # Detect text overflow in original presentation
+    original_overflow = detect_frame_overflow(inventory)
+
+    # Load replacement data with duplicate key detection
+    replacements = load_replacements(json_file)
+
+    # Validate replacements
+    errors = validate_replacements(inventory, replacements)
+    if errors:
+        print("ERROR: Invalid shapes in replacement JSON:")
+        for error in errors:
+            print(f"  - {error}")
+        print("\nPlease check the inventory and update your replacement JSON.")
+        print(
+            "You can regenerate the inventory with: python inventory.py <input.pptx> <output.json>"
+        )
+        raise ValueError(f"Found {len(errors)} validation error(s)")
+
+    replaced_inventory, stats = fill_shapes(prs, inventory, replacements)
+
+    # Check for issues after replacements
+    overflow_errors, warnings = find_replacement_issues(
+        original_overflow, replaced_inventory
+    )
+
     # Fail if there are any issues
     if overflow_errors or warnings:
         print("\nERROR: Issues detected in replacement output:")
@@ -348,25 +383,263 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
     # Report results
     print(f"Saved updated presentation to: {output_file}")
     print(f"Processed {len(prs.slides)} slides")
-    print(f"  - Shapes processed: {shapes_processed}")
-    print(f"  - Shapes cleared: {shapes_cleared}")
-    print(f"  - Shapes replaced: {shapes_replaced}")
+    print(f"  - Shapes processed: {stats['processed']}")
+    print(f"  - Shapes cleared: {stats['cleared']}")
+    print(f"  - Shapes replaced: {stats['replaced']}")
 
 
-def main():
-    """Main entry point for command-line usage."""
-    if len(sys.argv) != 4:
-        print(__doc__)
-        sys.exit(1)
+class ReplacementTemplate:
+    """A template presentation parsed and inventoried once, then filled many times.
+
+    Each fill opens a fresh copy of the presentation from the template bytes in
+    memory and binds the template's ShapeData objects to the copy's shapes, so
+    geometry, layout lookups and the original overflow are computed only once.
+    """
+
+    def __init__(self, pptx_file: str):
+        """Load and inventory the template.
+
+        Args:
+            pptx_file: Path to the template PowerPoint file
+        """
+        self.data = Path(pptx_file).read_bytes()
+        prs = Presentation(BytesIO(self.data))
+        self.inventory = extract_text_inventory(Path(pptx_file), prs)
+        self.original_overflow = detect_frame_overflow(self.inventory)
+
+        # Child indices leading from each slide element to each inventoried shape
+        self.shape_paths: Dict[str, Dict[str, List[int]]] = {}
+        for slide_key, shapes_dict in self.inventory.items():
+            self.shape_paths[slide_key] = {
+                shape_key: element_path(shape_data.shape._element)  # type: ignore
+                for shape_key, shape_data in shapes_dict.items()
+            }
+
+    def bind(self, prs: Any) -> InventoryData:
+        """Map the template inventory onto the shapes of a copy of the template."""
+        inventory: InventoryData = {}
+        for slide_key, paths in self.shape_paths.items():
+            slide = prs.slides[int(slide_key.split("-")[1])]
+            shapes_dict = {}
+            for shape_key, path in paths.items():
+                element = slide._element
+                for index in path:
+                    element = element[index]
+                shape = SlideShapeFactory(element, slide.shapes)
+                template_data = self.inventory[slide_key][shape_key]
+                shapes_dict[shape_key] = template_data.with_shape(shape)
+            inventory[slide_key] = shapes_dict
+        return inventory
+
+    def fill(self, replacements: Dict) -> Tuple[Any, Dict[str, int]]:
+        """Apply one replacement payload to a fresh copy of the template.
+
+        Returns:
+            Tuple of (presentation, stats) as returned by fill_shapes
+
+        Raises:
+            ValueError: If the payload names unknown shapes, or if the new text
+                        overflows more than the template or has formatting warnings
+        """
+        errors = validate_replacements(self.inventory, replacements)
+        if errors:
+            raise ValueError("Invalid shapes in replacement JSON: " + "; ".join(errors))
+
+        prs = Presentation(BytesIO(self.data))
+        replaced_inventory, stats = fill_shapes(prs, self.bind(prs), replacements)
+
+        overflow_errors, warnings = find_replacement_issues(
+            self.original_overflow, replaced_inventory
+        )
+        if overflow_errors or warnings:
+            raise ValueError("; ".join(overflow_errors + warnings))
+
+        return prs, stats
+
+
+def element_path(element: Any) -> List[int]:
+    """Return the child indices leading from the slide root down to element."""
+    path = []
+    parent = element.getparent()
+    while parent is not None:
+        path.append(parent.index(element))
+        element, parent = parent, parent.getparent()
+    return path[::-1]
+
+
+def iter_payloads(payload_files: List[str]) -> Iterator[Tuple[str, Dict]]:
+    """Yield (name, replacements) for each payload.
+
+    A .json file holds one payload named after the file. A .jsonl file, or "-"
+    for standard input, holds one payload per line named <stem>-<line number>.
+    """
+    for payload_file in payload_files:
+        if payload_file != "-" and not payload_file.endswith(".jsonl"):
+            yield Path(payload_file).stem, load_replacements(payload_file)
+            continue
+
+        stem = "payload" if payload_file == "-" else Path(payload_file).stem
+        f = sys.stdin if payload_file == "-" else open(payload_file, "r")
+        try:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    replacements = json.loads(
+                        line, object_pairs_hook=check_duplicate_keys
+                    )
+                    yield f"{stem}-{line_number}", replacements
+        finally:
+            if f is not sys.stdin:
+                f.close()
 
-    input_pptx = Path(sys.argv[1])
-    replacements_json = Path(sys.argv[2])
-    output_pptx = Path(sys.argv[3])
 
+# Template of the current batch worker process, loaded once by _init_batch_worker
+_batch_template: Optional[ReplacementTemplate] = None
+
+
+def _init_batch_worker(template_file: str) -> None:
+    global _batch_template
+    _batch_template = ReplacementTemplate(template_file)
+
+
+def _fill_batch_item(item: Tuple[str, Dict, str]) -> Tuple[str, Optional[str]]:
+    """Fill and save one payload. Returns (name, error message or None)."""
+    name, replacements, output_file = item
+    try:
+        prs, _ = _batch_template.fill(replacements)  # type: ignore
+        prs.save(output_file)
+    except Exception as e:
+        return name, str(e)
+    return name, None
+
+
+def apply_replacements_batch(
+    pptx_file: str, payload_files: List[str], output_dir: str, jobs: int = 1
+) -> List[Tuple[str, str]]:
+    """Fill one template with many replacement payloads.
+
+    Each worker process parses and inventories the template once, then fills a
+    fresh in-memory copy for every payload it receives and saves it as
+    <output_dir>/<payload name>.pptx.
+
+    Args:
+        pptx_file: Path to the template PowerPoint file
+        payload_files: Replacement .json files, .jsonl files, or "-" for stdin
+        output_dir: Directory for the filled presentations
+        jobs: Number of worker processes (default: 1, no workers)
+
+    Returns:
+        List of (payload name, error message) for the payloads that failed
+
+    Raises:
+        ValueError: If two payloads have the same name, e.g. a/deck.json and
+                    b/deck.json, since their outputs would overwrite each other
+    """
+    payloads = list(iter_payloads(payload_files))
+    names = Counter(name for name, _ in payloads)
+    duplicates = sorted(name for name, count in names.items() if count > 1)
+    if duplicates:
+        raise ValueError(
+            "Payloads with the same name would overwrite each other's output: "
+            + ", ".join(f"{name}.pptx" for name in duplicates)
+        )
+
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    items = [
+        (name, replacements, str(output_path / f"{name}.pptx"))
+        for name, replacements in payloads
+    ]
+
+    start = time.perf_counter()
+    if jobs <= 1:
+        _init_batch_worker(pptx_file)
+        results = list(map(_fill_batch_item, items))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_batch_worker, initargs=(pptx_file,)
+        ) as executor:
+            results = list(executor.map(_fill_batch_item, items))
+    elapsed = time.perf_counter() - start
+
+    failures = [(name, error) for name, error in results if error is not None]
+    for name, error in failures:
+        print(f"FAILED {name}: {error}")
+
+    saved = len(results) - len(failures)
+    rate = saved / elapsed if elapsed else 0.0
+    print(f"Saved {saved} of {len(results)} presentations to: {output_dir}")
+    print(f"  - {elapsed:.2f}s total, {rate:.1f} decks/s")
+    return failures
+
+
+def main():
+    """Main entry point for command-line usage."""
+    parser = argparse.ArgumentParser(
+        description="Apply text replacements to a PowerPoint presentation.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python replace.py template.pptx replacements.json output.pptx
+    Fills one presentation
+
+  python replace.py template.pptx --batch payloads.jsonl --output-dir out/ --jobs 4
+    Fills the template once per payload line, writing out/payloads-<line>.pptx
+""",
+    )
+    parser.add_argument("input", help="Input PowerPoint file (.pptx)")
+    parser.add_argument("replacements", nargs="?", help="Replacements JSON file")
+    parser.add_argument("output", nargs="?", help="Output PowerPoint file (.pptx)")
+    parser.add_argument(
+        "--batch",
+        nargs="+",
+        metavar="PAYLOAD",
+        help='Replacement .json or .jsonl files ("-" for JSONL on stdin)',
+    )
+    parser.add_argument(
+        "--output-dir", help="Directory for the presentations filled in batch mode"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for batch mode (default: 1)",
+    )
+    args = parser.parse_args()
+
+    if args.batch:
+        if not args.output_dir or args.replacements:
+            parser.error("--batch takes the template and --output-dir only")
+    elif not args.replacements or not args.output:
+        parser.error("replacements and output are required without --batch")
+
+    input_pptx = Path(args.input)
     if not input_pptx.exists():
         print(f"Error: Input file '{input_pptx}' not found")
         sys.exit(1)
 
+    if args.batch:
+        for payload_file in args.batch:
+            if payload_file != "-" and not Path(payload_file).exists():
+                print(f"Error: Replacements JSON file '{payload_file}' not found")
+                sys.exit(1)
+
+        try:
+            failures = apply_replacements_batch(
+                str(input_pptx), args.batch, args.output_dir, args.jobs
+            )
+        except Exception as e:
+            print(f"Error applying replacements: {e}")
+            import traceback
+
+            traceback.print_exc()
+            sys.exit(1)
+        if failures:
+            sys.exit(1)
+        return
+
+    replacements_json = Path(args.replacements)
+    output_pptx = Path(args.output)
+
     if not replacements_json.exists():
         print(f"Error: Replacements JSON file '{replacements_json}' not found")
         sys.exit(1)
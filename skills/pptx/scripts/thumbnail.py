@@ -19,7 +19,8 @@ Grid limits by column count:
 - 6 cols: max 42 slides per grid (6×7)
 
 Usage:
-    python thumbnail.py input.pptx [output_prefix] [--cols N] [--outline-placeholders]
+    python thumbnail.py input.pptx [output_prefix] [--cols N] [--slides RANGES]
+                        [--outline-placeholders]
 
 Examples:
     python thumbnail.py presentation.pptx
@@ -38,24 +39,37 @@ Examples:
 
     python thumbnail.py template.pptx analysis --outline-placeholders
     # Creates thumbnail grids with red outlines around text placeholders
+
+    python thumbnail.py large-deck.pptx grid --slides 0-9,34
+    # Creates a grid of slides 0 to 9 and 34 only (0-based, as in the labels)
+
+Slides are rasterized directly at the thumbnail width, and only the selected
+slides are rendered. Rendered slides are cached per slide (see RASTER_CACHE), so
+repeated runs on an edited deck only render the slides that changed.
 """
 
 import argparse
+import hashlib
+import os
+import shutil
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from inventory import extract_text_inventory
 from PIL import Image, ImageDraw, ImageFont
 from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
 
 # Constants
 THUMBNAIL_WIDTH = 300  # Fixed thumbnail width in pixels
-CONVERSION_DPI = 100  # DPI for PDF to image conversion
 MAX_COLS = 6  # Maximum number of columns
 DEFAULT_COLS = 5  # Default number of columns
 JPEG_QUALITY = 95  # JPEG compression quality
+DECODE_WORKERS = min(8, os.cpu_count() or 1)  # Threads decoding slide images
+RASTER_WORKERS = os.cpu_count() or 1  # Parallel pdftoppm processes
 
 # Grid layout constants
 GRID_PADDING = 20  # Padding between thumbnails
@@ -63,6 +77,18 @@ BORDER_WIDTH = 2  # Border width around thumbnails
 FONT_SIZE_RATIO = 0.12  # Font size as fraction of thumbnail width
 LABEL_PADDING_RATIO = 0.4  # Label padding as fraction of font size
 
+# Per-slide raster cache, keyed by slide content hashes (set to "" to disable)
+RASTER_CACHE = os.environ.get("PPTX_THUMBNAIL_CACHE", "~/.cache/pptx-skill/thumbnails")
+
+# Relationships whose targets do not change how a slide renders
+NON_RENDERING_RELTYPES = {
+    RT.NOTES_SLIDE,
+    RT.SLIDE,
+    RT.COMMENTS,
+    RT.NOTES_MASTER,
+    RT.HANDOUT_MASTER,
+}
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -81,6 +107,10 @@ def main():
         default=DEFAULT_COLS,
         help=f"Number of columns (default: {DEFAULT_COLS}, max: {MAX_COLS})",
     )
+    parser.add_argument(
+        "--slides",
+        help="Slides to include as 0-based indices and ranges, e.g. 0-9,34 (default: all)",
+    )
     parser.add_argument(
         "--outline-placeholders",
         action="store_true",
@@ -100,6 +130,15 @@ def main():
         print(f"Error: Invalid PowerPoint file: {args.input}")
         sys.exit(1)
 
+    # Parse slide selection
+    slides = None
+    if args.slides:
+        try:
+            slides = parse_slide_selection(args.slides)
+        except ValueError:
+            print(f"Error: Invalid slide selection: {args.slides}")
+            sys.exit(1)
+
     # Construct output path (always JPG)
     output_path = Path(f"{args.output_prefix}.jpg")
 
@@ -119,7 +158,9 @@ def main():
                     print(f"Found placeholders on {len(placeholder_regions)} slides")
 
             # Convert slides to images
-            slide_images = convert_to_images(input_path, Path(temp_dir), CONVERSION_DPI)
+            slide_numbers, slide_images = convert_to_images(
+                input_path, Path(temp_dir), THUMBNAIL_WIDTH, slides=slides
+            )
             if not slide_images:
                 print("Error: No slides found")
                 sys.exit(1)
@@ -134,6 +175,7 @@ def main():
                 output_path,
                 placeholder_regions,
                 slide_dimensions,
+                slide_numbers,
             )
 
             # Print saved files
@@ -146,11 +188,33 @@ def main():
         sys.exit(1)
 
 
+def parse_slide_selection(spec):
+    """Parse a slide selection such as "0-9,34" into sorted 0-based indices.
+
+    Raises:
+        ValueError: If a part is not an index or an ascending range
+    """
+    indices = set()
+    for part in spec.split(","):
+        first, dash, last = part.strip().partition("-")
+        if dash and not (first and last):
+            raise ValueError(f"Invalid slide range: {part}")
+        try:
+            first = int(first)
+            last = int(last) if dash else first
+        except ValueError:
+            raise ValueError(f"Invalid slide range: {part}")
+        if first < 0 or last < first:
+            raise ValueError(f"Invalid slide range: {part}")
+        indices.update(range(first, last + 1))
+    return sorted(indices)
+
+
 def create_hidden_slide_placeholder(size):
     """Create placeholder image for hidden slides."""
     img = Image.new("RGB", size, color="#F0F0F0")
     draw = ImageDraw.Draw(img)
-    line_width = max(5, min(size) // 100)
+    line_width = max(2, min(size) // 100)
     draw.line([(0, 0), size], fill="#CCCCCC", width=line_width)
     draw.line([(size[0], 0), (0, size[1])], fill="#CCCCCC", width=line_width)
     return img
@@ -165,7 +229,7 @@ def get_placeholder_regions(pptx_path):
     slide_dimensions is a tuple of (width_inches, height_inches).
     """
     prs = Presentation(str(pptx_path))
-    inventory = extract_text_inventory(pptx_path, prs)
+    inventory = extract_text_inventory(pptx_path, prs, level="geometry")
     placeholder_regions = {}
 
     # Get actual slide dimensions in inches (EMU to inches conversion)
@@ -194,8 +258,79 @@ def get_placeholder_regions(pptx_path):
     return placeholder_regions, (slide_width_inches, slide_height_inches)
 
 
-def convert_to_images(pptx_path, temp_dir, dpi):
-    """Convert PowerPoint to images via PDF, handling hidden slides."""
+def slide_cache_keys(prs, visible, width):
+    """Compute raster cache keys for the visible slides.
+
+    Each key hashes the slide part together with everything it renders from: its
+    layout, master, theme, and media, found by following relationships. Slides that
+    show their own slide number also include their position in the deck and in the
+    PDF.
+
+    Args:
+        prs: Presentation object
+        visible: Visible slide indices, in deck order
+        width: Rendered image width in pixels
+
+    Returns:
+        Dict mapping slide index to a hex key
+    """
+    digests = {}
+
+    def part_digest(part):
+        partname = str(part.partname)
+        if partname in digests:
+            return digests[partname]
+        digests[partname] = ""  # Guard against relationship cycles
+
+        digest = hashlib.sha256(part.blob)
+        is_master = partname.startswith("/ppt/slideMasters/")
+        for rId, rel in sorted(part.rels.items()):
+            if rel.reltype in NON_RENDERING_RELTYPES:
+                continue
+            if is_master and rel.reltype == RT.SLIDE_LAYOUT:
+                continue  # Masters list all of their layouts
+            target = rel.target_ref if rel.is_external else part_digest(rel.target_part)
+            digest.update(f"{rId} {rel.reltype} {target}\n".encode())
+
+        digests[partname] = digest.hexdigest()
+        return digests[partname]
+
+    slides = prs.slides
+    deck = f"{width}px {prs.slide_width}x{prs.slide_height}"
+    keys = {}
+    for page, idx in enumerate(visible, 1):
+        slide = slides[idx]
+        position = f" #{idx}/{page}" if shows_slide_number(slide) else ""
+        key = f"{deck}{position} {part_digest(slide.part)}"
+        keys[idx] = hashlib.sha256(key.encode()).hexdigest()
+    return keys
+
+
+def shows_slide_number(slide):
+    """Check if a slide contains a slide number field."""
+    return bool(slide.element.xpath(".//a:fld[@type='slidenum']"))
+
+
+def convert_to_images(pptx_path, temp_dir, width, cache_dir=RASTER_CACHE, slides=None):
+    """Convert PowerPoint to images via PDF, handling hidden slides.
+
+    Slide images are looked up in the raster cache first, and only selected slides
+    missing from it are rendered, at the given width. Newly rendered slides are
+    added to the cache. Hidden slides are shown as a placeholder image.
+
+    Args:
+        pptx_path: Path to the PowerPoint file
+        temp_dir: Directory for intermediate files
+        width: Rendered image width in pixels
+        cache_dir: Raster cache directory (empty to disable)
+        slides: Optional sorted 0-based slide indices to include (default: all)
+
+    Returns:
+        Tuple of (slide indices, image paths) in deck order
+
+    Raises:
+        ValueError: If a selected slide does not exist
+    """
     # Detect hidden slides
     print("Analyzing presentation...")
     prs = Presentation(str(pptx_path))
@@ -212,7 +347,95 @@ def convert_to_images(pptx_path, temp_dir, dpi):
     if hidden_slides:
         print(f"Hidden slides: {sorted(hidden_slides)}")
 
-    pdf_path = temp_dir / f"{pptx_path.stem}.pdf"
+    if slides is None:
+        selected = list(range(total_slides))
+    else:
+        missing = [idx for idx in slides if idx >= total_slides]
+        if missing:
+            raise ValueError(f"Slides out of range: {missing}")
+        selected = slides
+
+    visible = [idx for idx in range(total_slides) if idx + 1 not in hidden_slides]
+    wanted = [idx for idx in selected if idx + 1 not in hidden_slides]
+
+    # Reuse cached images of unchanged slides
+    cache = Path(cache_dir).expanduser() if cache_dir else None
+    keys = slide_cache_keys(prs, visible, width) if cache else {}
+    images = {}
+    if cache:
+        for idx in wanted:
+            cached_path = cache / f"{keys[idx]}.jpg"
+            if cached_path.exists():
+                images[idx] = cached_path
+        if images:
+            print(f"Reusing {len(images)} cached slide image(s)")
+
+    to_render = [idx for idx in wanted if idx not in images]
+    if to_render:
+        rendered = render_slides(pptx_path, prs, to_render, visible, temp_dir, width)
+        for idx, image_path in zip(to_render, rendered):
+            images[idx] = image_path
+            if cache:
+                store_cached_image(image_path, cache / f"{keys[idx]}.jpg")
+
+    # Create full list with placeholders for hidden slides
+    all_images = []
+
+    # Get placeholder dimensions from first rendered slide
+    if images:
+        with Image.open(images[wanted[0]]) as img:
+            placeholder_size = img.size
+    else:
+        placeholder_size = (width, width * 9 // 16)
+
+    # All hidden slides share one placeholder image
+    placeholder_path = temp_dir / "hidden.jpg"
+    for idx in selected:
+        if idx + 1 in hidden_slides:
+            if not placeholder_path.exists():
+                placeholder_img = create_hidden_slide_placeholder(placeholder_size)
+                placeholder_img.save(placeholder_path, "JPEG")
+            all_images.append(placeholder_path)
+        else:
+            # Use the actual visible slide image
+            all_images.append(images[idx])
+
+    return selected, all_images
+
+
+def render_slides(pptx_path, prs, slide_indices, visible, temp_dir, width):
+    """Render visible slides to JPEG files via PDF.
+
+    When only some slides are needed, they are rendered from a reduced copy of the
+    deck. Slide numbers would be wrong in that copy, so if a needed slide shows its
+    number the full deck is converted and only the needed pages are rasterized.
+
+    Args:
+        pptx_path: Path to the PowerPoint file
+        prs: Presentation loaded from pptx_path (modified when reducing the deck)
+        slide_indices: Visible slide indices to render, in deck order
+        visible: All visible slide indices, in deck order
+        temp_dir: Directory for intermediate files
+        width: Rendered image width in pixels
+
+    Returns:
+        List of image paths in the order of slide_indices
+    """
+    if len(slide_indices) == len(visible):
+        source = pptx_path
+        pages = list(range(1, len(visible) + 1))
+    elif any(shows_slide_number(prs.slides[idx]) for idx in slide_indices):
+        source = pptx_path
+        page_numbers = {idx: page for page, idx in enumerate(visible, 1)}
+        pages = [page_numbers[idx] for idx in slide_indices]
+    else:
+        source = temp_dir / f"{pptx_path.stem}-selected.pptx"
+        write_reduced_deck(prs, slide_indices, source)
+        pages = list(range(1, len(slide_indices) + 1))
+
+    if len(slide_indices) < len(visible):
+        print(f"Rendering {len(slide_indices)} of {len(visible)} visible slide(s)")
+    pdf_path = temp_dir / f"{source.stem}.pdf"
 
     # Convert to PDF
     print("Converting to PDF...")
@@ -224,7 +447,7 @@ def convert_to_images(pptx_path, temp_dir, dpi):
             "pdf",
             "--outdir",
             str(temp_dir),
-            str(pptx_path),
+            str(source),
         ],
         capture_output=True,
         text=True,
@@ -233,42 +456,90 @@ def convert_to_images(pptx_path, temp_dir, dpi):
         raise RuntimeError("PDF conversion failed")
 
     # Convert PDF to images
-    print(f"Converting to images at {dpi} DPI...")
-    result = subprocess.run(
-        ["pdftoppm", "-jpeg", "-r", str(dpi), str(pdf_path), str(temp_dir / "slide")],
-        capture_output=True,
-        text=True,
-    )
-    if result.returncode != 0:
-        raise RuntimeError("Image conversion failed")
+    print(f"Converting to images {width}px wide...")
+    return rasterize_pages(pdf_path, pages, temp_dir, width)
 
-    visible_images = sorted(temp_dir.glob("slide-*.jpg"))
 
-    # Create full list with placeholders for hidden slides
-    all_images = []
-    visible_idx = 0
+def write_reduced_deck(prs, slide_indices, output_path):
+    """Save a copy of the presentation that keeps only the given slides."""
+    keep = set(slide_indices)
+    sldIdLst = prs.slides._sldIdLst
+    for idx, sldId in enumerate(list(sldIdLst)):
+        if idx not in keep:
+            prs.part.rels.pop(sldId.rId)
+            sldIdLst.remove(sldId)
+    prs.save(str(output_path))
 
-    # Get placeholder dimensions from first visible slide
-    if visible_images:
-        with Image.open(visible_images[0]) as img:
-            placeholder_size = img.size
-    else:
-        placeholder_size = (1920, 1080)
-
-    for slide_num in range(1, total_slides + 1):
-        if slide_num in hidden_slides:
-            # Create placeholder image for hidden slide
-            placeholder_path = temp_dir / f"hidden-{slide_num:03d}.jpg"
-            placeholder_img = create_hidden_slide_placeholder(placeholder_size)
-            placeholder_img.save(placeholder_path, "JPEG")
-            all_images.append(placeholder_path)
+
+def rasterize_pages(pdf_path, pages, temp_dir, width, workers=RASTER_WORKERS):
+    """Rasterize PDF pages to JPEG files scaled to the given width.
+
+    Consecutive pages are grouped into runs, and runs are split into chunks so
+    that up to workers pdftoppm processes run in parallel.
+
+    Returns:
+        List of image paths in the order of pages
+    """
+    # Group consecutive pages into runs of (first, last)
+    runs = []
+    for page in pages:
+        if runs and page == runs[-1][1] + 1:
+            runs[-1][1] = page
         else:
-            # Use the actual visible slide image
-            if visible_idx < len(visible_images):
-                all_images.append(visible_images[visible_idx])
-                visible_idx += 1
+            runs.append([page, page])
+
+    # Split runs into chunks of at most chunk_size pages
+    chunk_size = max(1, -(-len(pages) // workers))
+    chunks = [
+        (start, min(start + chunk_size - 1, last))
+        for first, last in runs
+        for start in range(first, last + 1, chunk_size)
+    ]
+
+    def rasterize_chunk(chunk):
+        first, last = chunk
+        prefix = temp_dir / f"page{first}"
+        result = subprocess.run(
+            [
+                "pdftoppm",
+                "-jpeg",
+                "-scale-to-x",
+                str(width),
+                "-scale-to-y",
+                "-1",
+                "-f",
+                str(first),
+                "-l",
+                str(last),
+                str(pdf_path),
+                str(prefix),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError("Image conversion failed")
+        return sorted(temp_dir.glob(f"{prefix.name}-*.jpg"))
 
-    return all_images
+    with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+        images = [
+            path for paths in executor.map(rasterize_chunk, chunks) for path in paths
+        ]
+
+    if len(images) != len(pages):
+        raise RuntimeError("Image conversion failed")
+    return images
+
+
+def store_cached_image(image_path, cached_path):
+    """Copy a rendered slide into the raster cache, ignoring write failures."""
+    try:
+        cached_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cached_path.with_suffix(f".{os.getpid()}.tmp")
+        shutil.copyfile(image_path, temp_path)
+        os.replace(temp_path, cached_path)
+    except OSError:
+        pass
 
 
 def create_grids(
@@ -278,8 +549,17 @@ def create_grids(
     output_path,
     placeholder_regions=None,
     slide_dimensions=None,
+    slide_numbers=None,
 ):
-    """Create multiple thumbnail grids from slide images, max cols×(cols+1) images per grid."""
+    """Create multiple thumbnail grids from slide images, max cols×(cols+1) images per grid.
+
+    Grids are built and saved one at a time, so memory use does not grow with the
+    number of slides. slide_numbers gives the label of each image (default: its
+    position).
+    """
+    if slide_numbers is None:
+        slide_numbers = list(range(len(image_paths)))
+
     # Maximum images per grid is cols × (cols + 1) for better proportions
     max_images_per_grid = cols * (cols + 1)
     grid_files = []
@@ -288,32 +568,41 @@ def create_grids(
         f"Creating grids with {cols} columns (max {max_images_per_grid} images per grid)"
     )
 
-    # Split images into chunks
-    for chunk_idx, start_idx in enumerate(
-        range(0, len(image_paths), max_images_per_grid)
-    ):
-        end_idx = min(start_idx + max_images_per_grid, len(image_paths))
-        chunk_images = image_paths[start_idx:end_idx]
-
-        # Create grid for this chunk
-        grid = create_grid(
-            chunk_images, cols, width, start_idx, placeholder_regions, slide_dimensions
-        )
-
-        # Generate output filename
-        if len(image_paths) <= max_images_per_grid:
-            # Single grid - use base filename without suffix
-            grid_filename = output_path
-        else:
-            # Multiple grids - insert index before extension with dash
-            stem = output_path.stem
-            suffix = output_path.suffix
-            grid_filename = output_path.parent / f"{stem}-{chunk_idx + 1}{suffix}"
+    with ThreadPoolExecutor(max_workers=DECODE_WORKERS) as executor:
+        # Split images into chunks
+        for chunk_idx, start_idx in enumerate(
+            range(0, len(image_paths), max_images_per_grid)
+        ):
+            end_idx = min(start_idx + max_images_per_grid, len(image_paths))
+            chunk_images = image_paths[start_idx:end_idx]
+
+            # Create grid for this chunk
+            grid = create_grid(
+                chunk_images,
+                cols,
+                width,
+                start_idx,
+                placeholder_regions,
+                slide_dimensions,
+                executor,
+                slide_numbers[start_idx:end_idx],
+            )
 
-        # Save grid
-        grid_filename.parent.mkdir(parents=True, exist_ok=True)
-        grid.save(str(grid_filename), quality=JPEG_QUALITY)
-        grid_files.append(str(grid_filename))
+            # Generate output filename
+            if len(image_paths) <= max_images_per_grid:
+                # Single grid - use base filename without suffix
+                grid_filename = output_path
+            else:
+                # Multiple grids - insert index before extension with dash
+                stem = output_path.stem
+                suffix = output_path.suffix
+                grid_filename = output_path.parent / f"{stem}-{chunk_idx + 1}{suffix}"
+
+            # Save grid
+            grid_filename.parent.mkdir(parents=True, exist_ok=True)
+            grid.save(str(grid_filename), quality=JPEG_QUALITY)
+            grid.close()
+            grid_files.append(str(grid_filename))
 
     return grid_files
 
@@ -325,8 +614,18 @@ def create_grid(
     start_slide_num=0,
     placeholder_regions=None,
     slide_dimensions=None,
+    executor=None,
+    slide_numbers=None,
 ):
-    """Create thumbnail grid from slide images with optional placeholder outlining."""
+    """Create thumbnail grid from slide images with optional placeholder outlining.
+
+    Thumbnails are decoded and resized by load_thumbnail, on the threads of
+    executor when one is given. Images are labeled with slide_numbers, or
+    numbered from start_slide_num.
+    """
+    if slide_numbers is None:
+        slide_numbers = range(start_slide_num, start_slide_num + len(image_paths))
+
     font_size = int(width * FONT_SIZE_RATIO)
     label_padding = int(font_size * LABEL_PADDING_RATIO)
 
@@ -352,8 +651,18 @@ def create_grid(
         # Fall back to basic default font if size parameter not supported
         font = ImageFont.load_default()
 
+    def thumbnail_for(item):
+        i, img_path = item
+        regions = (placeholder_regions or {}).get(slide_numbers[i])
+        return load_thumbnail(img_path, width, height, regions, slide_dimensions)
+
+    items = list(enumerate(image_paths))
+    thumbnails = (
+        executor.map(thumbnail_for, items) if executor else map(thumbnail_for, items)
+    )
+
     # Place thumbnails
-    for i, img_path in enumerate(image_paths):
+    for (i, img_path), img in zip(items, thumbnails):
         row, col = i // cols, i % cols
         x = col * width + (col + 1) * GRID_PADDING
         y_base = (
@@ -361,7 +670,7 @@ def create_grid(
         )
 
         # Add label with actual slide number
-        label = f"{start_slide_num + i}"
+        label = f"{slide_numbers[i]}"
         bbox = draw.textbbox((0, 0), label, font=font)
         text_w = bbox[2] - bbox[0]
         draw.text(
@@ -374,77 +683,80 @@ def create_grid(
         # Add thumbnail below label with proportional spacing
         y_thumbnail = y_base + label_padding + font_size + label_padding
 
-        with Image.open(img_path) as img:
-            # Get original dimensions before thumbnail
-            orig_w, orig_h = img.size
-
-            # Apply placeholder outlines if enabled
-            if placeholder_regions and (start_slide_num + i) in placeholder_regions:
-                # Convert to RGBA for transparency support
-                if img.mode != "RGBA":
-                    img = img.convert("RGBA")
-
-                # Get the regions for this slide
-                regions = placeholder_regions[start_slide_num + i]
-
-                # Calculate scale factors using actual slide dimensions
-                if slide_dimensions:
-                    slide_width_inches, slide_height_inches = slide_dimensions
-                else:
-                    # Fallback: estimate from image size at CONVERSION_DPI
-                    slide_width_inches = orig_w / CONVERSION_DPI
-                    slide_height_inches = orig_h / CONVERSION_DPI
-
-                x_scale = orig_w / slide_width_inches
-                y_scale = orig_h / slide_height_inches
-
-                # Create a highlight overlay
-                overlay = Image.new("RGBA", img.size, (255, 255, 255, 0))
-                overlay_draw = ImageDraw.Draw(overlay)
-
-                # Highlight each placeholder region
-                for region in regions:
-                    # Convert from inches to pixels in the original image
-                    px_left = int(region["left"] * x_scale)
-                    px_top = int(region["top"] * y_scale)
-                    px_width = int(region["width"] * x_scale)
-                    px_height = int(region["height"] * y_scale)
-
-                    # Draw highlight outline with red color and thick stroke
-                    # Using a bright red outline instead of fill
-                    stroke_width = max(
-                        5, min(orig_w, orig_h) // 150
-                    )  # Thicker proportional stroke width
-                    overlay_draw.rectangle(
-                        [(px_left, px_top), (px_left + px_width, px_top + px_height)],
-                        outline=(255, 0, 0, 255),  # Bright red, fully opaque
-                        width=stroke_width,
-                    )
-
-                # Composite the overlay onto the image using alpha blending
-                img = Image.alpha_composite(img, overlay)
-                # Convert back to RGB for JPEG saving
-                img = img.convert("RGB")
-
-            img.thumbnail((width, height), Image.Resampling.LANCZOS)
-            w, h = img.size
-            tx = x + (width - w) // 2
-            ty = y_thumbnail + (height - h) // 2
-            grid.paste(img, (tx, ty))
-
-            # Add border
-            if BORDER_WIDTH > 0:
-                draw.rectangle(
-                    [
-                        (tx - BORDER_WIDTH, ty - BORDER_WIDTH),
-                        (tx + w + BORDER_WIDTH - 1, ty + h + BORDER_WIDTH - 1),
-                    ],
-                    outline="gray",
-                    width=BORDER_WIDTH,
-                )
+        w, h = img.size
+        tx = x + (width - w) // 2
+        ty = y_thumbnail + (height - h) // 2
+        grid.paste(img, (tx, ty))
+        img.close()
+
+        # Add border
+        if BORDER_WIDTH > 0:
+            draw.rectangle(
+                [
+                    (tx - BORDER_WIDTH, ty - BORDER_WIDTH),
+                    (tx + w + BORDER_WIDTH - 1, ty + h + BORDER_WIDTH - 1),
+                ],
+                outline="gray",
+                width=BORDER_WIDTH,
+            )
 
     return grid
 
 
+def load_thumbnail(img_path, width, height, regions=None, slide_dimensions=None):
+    """Decode a slide image and fit it within width×height, outlining regions.
+
+    JPEG images are decoded at the smallest reduced scale that still covers the
+    thumbnail (Image.draft), and outlines are drawn on the thumbnail itself.
+
+    Args:
+        img_path: Path to the slide image
+        width: Maximum thumbnail width in pixels
+        height: Maximum thumbnail height in pixels
+        regions: Optional list of regions (inches) to outline in red
+        slide_dimensions: Optional (width_inches, height_inches) of the slide
+
+    Returns:
+        RGB thumbnail image
+    """
+    with Image.open(img_path) as img:
+        # Get original dimensions before reduced decoding
+        orig_w, orig_h = img.size
+        img.draft("RGB", (width, height))
+        thumb = img.convert("RGB")
+    thumb.thumbnail((width, height), Image.Resampling.LANCZOS)
+
+    if regions:
+        # Calculate scale factors using actual slide dimensions
+        if slide_dimensions:
+            slide_width_inches, slide_height_inches = slide_dimensions
+        else:
+            # Fallback: assume the default 10" slide width
+            slide_width_inches = 10.0
+            slide_height_inches = slide_width_inches * orig_h / orig_w
+
+        x_scale = thumb.width / slide_width_inches
+        y_scale = thumb.height / slide_height_inches
+
+        # Stroke proportional to the thumbnail, at least one pixel wide
+        stroke_width = max(1, min(thumb.size) // 150)
+
+        draw = ImageDraw.Draw(thumb)
+        for region in regions:
+            # Convert from inches to pixels in the thumbnail
+            px_left = int(region["left"] * x_scale)
+            px_top = int(region["top"] * y_scale)
+            px_width = int(region["width"] * x_scale)
+            px_height = int(region["height"] * y_scale)
+
+            draw.rectangle(
+                [(px_left, px_top), (px_left + px_width, px_top + px_height)],
+                outline=(255, 0, 0),
+                width=stroke_width,
+            )
+
+    return thumb
+
+
 if __name__ == "__main__":
     main()
@@ -1,76 +1,279 @@
 #!/usr/bin/env python3
 """
 Price Tracker - Bulk monitor multiple products from CSV.
+
+With --format csv or jsonl, large catalogs are processed in batches: each batch
+of products is fetched at once, and margins and alerts are computed with NumPy
+across all products and platform pairs. Results are written as each batch
+finishes, so memory use does not grow with the catalog.
+
+With --daemon, the catalog is read once and every product is checked on its
+own schedule (see scheduler.py), emitting only the rows that changed.
 """
 
 import argparse
 import csv
+import json
+import sqlite3
 import sys
-from typing import Dict, List
+from datetime import datetime
+from itertools import chain, islice
+from typing import Callable, Dict, Iterator, List, Optional, TextIO
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Only needed for --format csv/jsonl
 
 # Import from track_product.py
 from track_product import (
     PLATFORMS,
-    mock_search_product,
-    calculate_margin,
+    search_platforms,
+    search_products,
+    iter_opportunities,
+    record_history,
+    format_alert_row,
 )
+from history_store import PriceStore
+from scheduler import FREQUENCIES, CheckScheduler, changed_alerts
 
 
-def load_products_from_csv(csv_path: str) -> List[Dict]:
-    """Load products to monitor from CSV file."""
-    products = []
+STREAM_FIELDS = ["type", "product", "buy_from", "buy_price", "sell_on", "sell_price", "margin", "alert"]
+DAEMON_FIELDS = STREAM_FIELDS + ["status", "checked_at"]
+
 
+def iter_products_from_csv(csv_path: str) -> Iterator[Dict]:
+    """Read products to monitor from CSV file, one row at a time."""
     with open(csv_path, "r", newline="") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            products.append(
-                {
-                    "name": row.get("product", ""),
-                    "platforms": [p.strip() for p in row.get("platforms", "").split(",")],
-                    "alert_below": float(row.get("alert_below", 0)),
-                    "alert_margin": float(row.get("alert_margin", 0)),
-                }
-            )
+            frequency = (row.get("frequency") or "").strip() or None
+            if frequency is not None and frequency not in FREQUENCIES:
+                raise ValueError(f"unknown frequency {frequency!r} for {row.get('product', '')!r}")
+            yield {
+                "name": row.get("product", ""),
+                "platforms": [p.strip() for p in row.get("platforms", "").split(",")],
+                "alert_below": float(row.get("alert_below", 0)),
+                "alert_margin": float(row.get("alert_margin", 0)),
+                "frequency": frequency,
+            }
+
 
-    return products
+def load_products_from_csv(csv_path: str) -> List[Dict]:
+    """Load products to monitor from CSV file."""
+    return list(iter_products_from_csv(csv_path))
 
 
-def monitor_product(product: Dict, margin_threshold: float) -> List[Dict]:
-    """Monitor a single product and find opportunities."""
+def monitor_product(product: Dict, margin_threshold: float, all_products: Optional[List[Dict]] = None) -> List[Dict]:
+    """Monitor a single product and find opportunities.
+
+    all_products are the product's search results, if already fetched.
+    """
     platforms = [p for p in product["platforms"] if p in PLATFORMS]
 
     if not platforms:
         return []
 
     # Search for product
-    all_products = []
-    for platform in platforms:
-        results = mock_search_product(product["name"], platform)
-        all_products.extend(results)
+    if all_products is None:
+        all_products = search_platforms(product["name"], platforms)
+    else:
+        all_products = [p for p in all_products if p["platform"] in platforms]
 
-    # Calculate arbitrage opportunities
+    # Calculate arbitrage opportunities above the threshold only
     opportunities = []
-    for i, buy in enumerate(all_products):
-        for j, sell in enumerate(all_products):
-            if i == j:
+    for margin, buy, sell in iter_opportunities(all_products, margin_threshold):
+        opportunities.append(
+            {
+                "product": product["name"],
+                "buy_from": buy["platform"],
+                "buy_price": buy["price"],
+                "sell_on": sell["platform"],
+                "sell_price": sell["price"],
+                "margin": margin,
+                "margin_percent": f"{margin * 100:.1f}%",
+            }
+        )
+
+    return opportunities
+
+
+def product_searches(products: List[Dict]) -> Dict[str, List[str]]:
+    """Platforms to search per product name, so each product is fetched once."""
+    searches = {}
+    for product in products:
+        platforms = searches.setdefault(product["name"], [])
+        platforms.extend(p for p in product["platforms"] if p in PLATFORMS and p not in platforms)
+    return searches
+
+
+def price_columns(batch: List[Dict], platforms: List[str], results: Dict[str, List[Dict]]):
+    """Lowest price, highest price and offer count per (product, platform), as arrays.
+
+    Missing offers have a NaN price and a count of 0.
+    """
+    column = {platform: k for k, platform in enumerate(platforms)}
+    low = np.full((len(batch), len(platforms)), np.nan)
+    high = np.full((len(batch), len(platforms)), np.nan)
+    count = np.zeros((len(batch), len(platforms)), dtype=np.int64)
+    for i, product in enumerate(batch):
+        wanted = set(product["platforms"])
+        for offer in results[product["name"]]:
+            if offer["platform"] not in wanted:
                 continue
+            k = column[offer["platform"]]
+            price = offer["price"]
+            if count[i, k] == 0 or price < low[i, k]:
+                low[i, k] = price
+            if count[i, k] == 0 or price > high[i, k]:
+                high[i, k] = price
+            count[i, k] += 1
+    return low, high, count
 
-            margin = calculate_margin(buy["price"], sell["price"], buy["platform"], sell["platform"])
-
-            if margin >= margin_threshold:
-                opportunities.append(
-                    {
-                        "product": product["name"],
-                        "buy_from": buy["platform"],
-                        "buy_price": buy["price"],
-                        "sell_on": sell["platform"],
-                        "sell_price": sell["price"],
-                        "margin": margin,
-                        "margin_percent": f"{margin * 100:.1f}%",
-                    }
-                )
 
-    return opportunities
+def batch_rows(batch: List[Dict], platforms: List[str], results: Dict[str, List[Dict]], margin_threshold: float) -> Iterator[Dict]:
+    """Alerts and opportunities for a batch of products, product by product.
+
+    For every buy and sell platform, the best pair buys the lowest offer and
+    sells the highest, so margins are computed from those for all products and
+    platform pairs at once, with the same arithmetic as calculate_margin.
+    """
+    low, high, count = price_columns(batch, platforms, results)
+    fee = np.array([PLATFORMS[p]["fee_rate"] for p in platforms])
+    alert_below = np.array([product["alert_below"] for product in batch])
+    alert_margin = np.array([product["alert_margin"] for product in batch])
+
+    # (product, buy platform, sell platform)
+    cost = (low + low * fee + 10.0)[:, :, None]
+    revenue = (high - high * fee)[:, None, :]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        margin = np.where(cost > 0, (revenue - cost) / cost, 0.0)
+    # Buying and selling on the same platform needs two different offers
+    valid = (count[:, :, None] > 0) & (count[:, None, :] > 0)
+    same = np.eye(len(platforms), dtype=bool)[None, :, :]
+    valid &= ~same | (count[:, :, None] > 1)
+    hits = valid & (margin >= margin_threshold)
+    drops = (count > 0) & (alert_below[:, None] > 0) & (low <= alert_below[:, None])
+
+    for i in np.flatnonzero(hits.any(axis=(1, 2)) | drops.any(axis=1)):
+        name = batch[i]["name"]
+        for k in np.flatnonzero(drops[i]):
+            yield {"type": "price_below", "product": name, "buy_from": platforms[k], "buy_price": float(low[i, k]), "alert": True}
+        buy_ks, sell_ks = np.nonzero(hits[i])
+        order = np.argsort(-margin[i][buy_ks, sell_ks], kind="stable")
+        for a, b in zip(buy_ks[order], sell_ks[order]):
+            value = float(margin[i, a, b])
+            yield {
+                "type": "arbitrage",
+                "product": name,
+                "buy_from": platforms[a],
+                "buy_price": float(low[i, a]),
+                "sell_on": platforms[b],
+                "sell_price": float(high[i, b]),
+                "margin": value,
+                "alert": bool(alert_margin[i] > 0 and value >= alert_margin[i]),
+            }
+
+
+def check_batch(
+    batch: List[Dict], margin_threshold: float, db_path: Optional[str] = None, store: Optional[PriceStore] = None, refresh: bool = False
+) -> Iterator[Dict]:
+    """Fetch a batch of products, record their prices and yield their rows (see batch_rows)."""
+    searches = product_searches(batch)
+    results = search_products(searches, refresh)
+    record_history(results, db_path, store)
+    platforms = list(dict.fromkeys(p for wanted in searches.values() for p in wanted))
+    return batch_rows(batch, platforms, results, margin_threshold)
+
+
+def row_writer(output_format: str, out: TextIO, fields: List[str]) -> Callable[[Dict], None]:
+    """Writer for result rows: a CSV row, a JSON line or a formatted alert line."""
+    if output_format == "csv":
+        writer = csv.DictWriter(out, fieldnames=fields)
+        # No second header when appending to an earlier run's file
+        if not out.seekable() or out.tell() == 0:
+            writer.writeheader()
+        return writer.writerow
+
+    def write(row: Dict):
+        out.write((json.dumps(row) if output_format == "jsonl" else format_alert_row(row)) + "\n")
+
+    return write
+
+
+def require_numpy():
+    if np is None:
+        print("Error: 'numpy' library not installed. Install with: pip3 install numpy")
+        sys.exit(1)
+
+
+def stream_monitor(csv_path: str, margin_threshold: float, output_format: str, out: TextIO, batch_size: int, db_path: Optional[str] = None) -> int:
+    """Monitor a catalog batch by batch, writing rows as each batch finishes.
+
+    Returns the number of rows written.
+    """
+    require_numpy()
+
+    products = iter_products_from_csv(csv_path)
+    batches = iter(lambda: list(islice(products, batch_size)), [])
+    # Read the first batch before writing anything, so a bad catalog leaves no output
+    first = next(batches, [])
+    write = row_writer(output_format, out, STREAM_FIELDS)
+
+    rows = 0
+    for batch in chain([first], batches):
+        batch = [p for p in batch if any(platform in PLATFORMS for platform in p["platforms"])]
+        if not batch:
+            continue
+
+        for row in check_batch(batch, margin_threshold, db_path):
+            write(row)
+            rows += 1
+        out.flush()
+    return rows
+
+
+def daemon_monitor(products: List[Dict], margin_threshold: float, frequency: str, output_format: str, out: TextIO, batch_size: int, db_path: Optional[str] = None):
+    """Check every product on its schedule until stopped, writing only rows that changed.
+
+    Products are checked at their CSV frequency, or frequency without one. Due
+    products are fetched together, at most batch_size at a time.
+    """
+    require_numpy()
+
+    products = [p for p in products if any(platform in PLATFORMS for platform in p["platforms"])]
+    scheduler = CheckScheduler()
+    scheduler.add_spread((i, FREQUENCIES[product["frequency"] or frequency]) for i, product in enumerate(products))
+    write = row_writer(output_format, out, DAEMON_FIELDS)
+    out.flush()
+
+    with PriceStore(db_path) as store:
+
+        def check(indexes: List[int]):
+            batch = [products[i] for i in indexes]
+            current: Dict[str, List[Dict]] = {product["name"]: [] for product in batch}
+            # Always search: the check is due, and its results refresh the cache for other runs
+            for row in check_batch(batch, margin_threshold, store=store, refresh=True):
+                current[row["product"]].append(row)
+
+            checked_at = datetime.now().isoformat(timespec="seconds")
+            try:
+                for name, rows in current.items():
+                    for row in changed_alerts(store, name, rows):
+                        row["checked_at"] = checked_at
+                        write(row)
+            except sqlite3.Error as e:
+                print(f"Warning: alerts not compared: {e}", file=sys.stderr)
+            out.flush()
+
+        scheduler.run_until_stopped(check, batch_size)
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
 
 
 def main():
@@ -79,9 +282,51 @@ def main():
     parser.add_argument("--margin-threshold", type=float, default=0.20, help="Minimum margin to report")
     parser.add_argument("--alert-frequency", choices=["hourly", "daily", "weekly"], default="daily", help="Frequency of alerts")
     parser.add_argument("--output", help="Output file for alerts")
+    parser.add_argument("--format", choices=["markdown", "csv", "jsonl"], default="markdown", help="Report format; csv and jsonl stream results batch by batch")
+    parser.add_argument("--batch-size", type=positive_int, default=1000, help="Products fetched and analyzed together with --format csv/jsonl")
+    parser.add_argument("--db", help="Price history database (default: $PRICE_TRACKER_DB or ~/.price-tracker/history.db)")
+    parser.add_argument("--daemon", action="store_true", help="Keep running, checking each product at its frequency and writing only changed rows")
 
     args = parser.parse_args()
 
+    if args.daemon:
+        try:
+            products = load_products_from_csv(args.csv)
+        except FileNotFoundError:
+            print(f"Error: CSV file not found: {args.csv}")
+            sys.exit(1)
+        except (ValueError, csv.Error) as e:
+            print(f"Error reading CSV file: {e}")
+            sys.exit(1)
+
+        if not products:
+            print("Error: No products found in CSV file")
+            sys.exit(1)
+
+        out = open(args.output, "a", newline="") if args.output else sys.stdout
+        try:
+            daemon_monitor(products, args.margin_threshold, args.alert_frequency, args.format, out, args.batch_size, args.db)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        return
+
+    if args.format != "markdown":
+        out = open(args.output, "w", newline="") if args.output else sys.stdout
+        try:
+            rows = stream_monitor(args.csv, args.margin_threshold, args.format, out, args.batch_size, args.db)
+        except FileNotFoundError:
+            print(f"Error: CSV file not found: {args.csv}")
+            sys.exit(1)
+        except (ValueError, csv.Error) as e:
+            print(f"Error reading CSV file: {e}")
+            sys.exit(1)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        print(f"\n---ALERTS ({rows} rows written)---", file=sys.stderr)
+        return
+
     # Load products from CSV
     try:
         products = load_products_from_csv(args.csv)
@@ -96,11 +341,15 @@ def main():
         print("Error: No products found in CSV file")
         sys.exit(1)
 
+    # Fetch every product on its platforms at once, within the platform limits
+    results = search_products(product_searches(products))
+    record_history(results, args.db)
+
     # Monitor each product
     all_opportunities = []
 
     for product in products:
-        opportunities = monitor_product(product, args.margin_threshold)
+        opportunities = monitor_product(product, args.margin_threshold, results[product["name"]])
         all_opportunities.extend(opportunities)
 
     # Sort by margin descending
@@ -5,51 +5,51 @@ Price Tracker - Compare prices across platforms.
 
 import argparse
 import sys
-from typing import Dict, List
+from itertools import islice
+from typing import Dict, List, Optional
 
 # Import from track_product.py
 from track_product import (
     PLATFORMS,
-    mock_search_product,
-    calculate_margin,
+    search_platforms,
+    iter_opportunities,
     format_markdown,
     format_json,
 )
 
 
-def compare_product(keyword: str, platforms: List[str], sort_by: str = "margin", min_rating: float = 0.0) -> tuple:
-    """Compare prices across platforms and find best arbitrage opportunities."""
-    all_products = []
+def compare_product(keyword: str, platforms: List[str], sort_by: str = "margin", min_rating: float = 0.0, top_k: Optional[int] = None, refresh: bool = False) -> tuple:
+    """Compare prices across platforms and find best arbitrage opportunities.
 
-    # Search on each platform
-    for platform in platforms:
-        results = mock_search_product(keyword, platform)
-        all_products.extend(results)
+    With top_k, only that many opportunities are returned. Sorted by margin, only
+    those are computed; other sort keys still rank every pair. Cached search
+    results are used unless refresh is set.
+    """
+    # Search all platforms concurrently
+    all_products = search_platforms(keyword, platforms, refresh)
 
-    # Filter by rating
-    filtered_products = [p for p in all_products if p["rating"] >= min_rating]
+    # Filter by rating; offers without one are kept
+    filtered_products = [p for p in all_products if p["rating"] is None or p["rating"] >= min_rating]
+
+    # Calculate arbitrage opportunities, best margin first
+    pairs = iter_opportunities(filtered_products)
+    if sort_by == "margin":
+        pairs = islice(pairs, top_k)
 
-    # Calculate all arbitrage opportunities
     opportunities = []
-    for i, buy in enumerate(filtered_products):
-        for j, sell in enumerate(filtered_products):
-            if i == j:
-                continue
-
-            margin = calculate_margin(buy["price"], sell["price"], buy["platform"], sell["platform"])
-
-            opportunities.append(
-                {
-                    "buy_from": buy["platform"],
-                    "buy_price": buy["price"],
-                    "buy_rating": buy["rating"],
-                    "sell_on": sell["platform"],
-                    "sell_price": sell["price"],
-                    "sell_rating": sell["rating"],
-                    "margin": margin,
-                    "margin_percent": f"{margin * 100:.1f}%",
-                }
-            )
+    for margin, buy, sell in pairs:
+        opportunities.append(
+            {
+                "buy_from": buy["platform"],
+                "buy_price": buy["price"],
+                "buy_rating": buy["rating"],
+                "sell_on": sell["platform"],
+                "sell_price": sell["price"],
+                "sell_rating": sell["rating"],
+                "margin": margin,
+                "margin_percent": f"{margin * 100:.1f}%",
+            }
+        )
 
     # Sort opportunities
     sort_key_map = {
@@ -59,7 +59,10 @@ def compare_product(keyword: str, platforms: List[str], sort_by: str = "margin",
     }
 
     sort_key = sort_key_map.get(sort_by, "margin")
-    opportunities.sort(key=lambda x: x[sort_key], reverse=True)
+    if sort_key != "margin":
+        # Unknown ratings sort last
+        opportunities.sort(key=lambda x: -1.0 if x[sort_key] is None else x[sort_key], reverse=True)
+        opportunities = opportunities[:top_k]
 
     # Also sort products by price
     filtered_products.sort(key=lambda x: x["price"])
@@ -74,6 +77,8 @@ def main():
     parser.add_argument("--report", choices=["markdown", "json", "csv"], default="markdown", help="Report format")
     parser.add_argument("--sort-by", choices=["price", "margin", "rating"], default="margin", help="Sort by")
     parser.add_argument("--min-rating", type=float, default=4.0, help="Minimum seller rating")
+    parser.add_argument("--top", type=int, default=20, help="Number of opportunities to report")
+    parser.add_argument("--refresh", action="store_true", help="Search again instead of using cached results")
 
     args = parser.parse_args()
 
@@ -86,7 +91,7 @@ def main():
         sys.exit(1)
 
     # Compare prices
-    products, opportunities = compare_product(args.keyword, platforms, args.sort_by, args.min_rating)
+    products, opportunities = compare_product(args.keyword, platforms, args.sort_by, args.min_rating, args.top, args.refresh)
 
     # Format output
     if args.report == "markdown":
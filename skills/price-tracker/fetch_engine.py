@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Price Tracker - Concurrent platform fetch engine.
+
+Platform searches go through one adapter per platform and run on a shared
+thread pool. Every platform has its own concurrency limit, token-bucket rate
+limit, timeout and retry policy, so a slow or throttled API only holds back
+its own requests. HTTP adapters keep one connection per worker thread open
+between requests, so long-running monitors do not reconnect for every search.
+With a ResponseCache, recent results are reused instead of searched again.
+"""
+
+import http.client
+import json
+import random
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from response_cache import ResponseCache
+
+
+class FetchError(Exception):
+    """A platform search failed. Retryable errors are tried again with backoff."""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+@dataclass
+class FetchLimits:
+    """Request policy for one platform."""
+
+    max_concurrency: int = 4  # Requests in flight at once
+    rate: Optional[float] = 5.0  # Sustained requests per second, None for no limit
+    burst: int = 5  # Requests allowed back to back before the rate applies
+    timeout: float = 10.0  # Seconds per request
+    retries: int = 3  # Extra attempts after a retryable failure
+    backoff: float = 0.5  # Base delay in seconds, doubled on every retry
+    cache_ttl: float = 300.0  # Seconds a cached search result is reused
+    stale_ttl: float = 600.0  # Seconds after cache_ttl a result is still served while it is refreshed
+
+
+class TokenBucket:
+    """Thread-safe token bucket: acquire() blocks until a request may be sent."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Take the token now, even if it is still owed, so waiters queue up in order
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+class PlatformAdapter:
+    """Searches one platform. Subclasses implement search()."""
+
+    def __init__(self, platform: str, limits: Optional[FetchLimits] = None):
+        self.platform = platform
+        self.limits = limits or FetchLimits()
+
+    def search(self, keyword: str, timeout: float) -> List[Dict]:
+        """Return the offers for keyword, raising FetchError on failure."""
+        raise NotImplementedError
+
+
+class HttpAdapter(PlatformAdapter):
+    """Searches a JSON API with GET <url>?q=<keyword>.
+
+    The response is a list of offers, or an object with a "results" list. Offers
+    need at least a price; missing fields are filled in like the mock search.
+    Each thread keeps its own keep-alive connection to the API.
+    """
+
+    def __init__(self, platform: str, url: str, limits: Optional[FetchLimits] = None):
+        super().__init__(platform, limits)
+        self.url = url
+        parts = urllib.parse.urlsplit(url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.host = parts.netloc
+        self.path = parts.path or "/"
+        self.query = parts.query
+        self.local = threading.local()
+
+    def connection(self, timeout: float) -> http.client.HTTPConnection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = self.connection_class(self.host, timeout=timeout)
+        return conn
+
+    def search(self, keyword: str, timeout: float) -> List[Dict]:
+        query = urllib.parse.urlencode({"q": keyword})
+        target = f"{self.path}?{self.query}&{query}" if self.query else f"{self.path}?{query}"
+        conn = self.connection(timeout)
+        try:
+            conn.request("GET", target, headers={"Accept": "application/json"})
+            response = conn.getresponse()
+            body = response.read()
+        except (http.client.HTTPException, OSError) as e:
+            # Also covers a kept-alive connection the server has since closed
+            conn.close()
+            raise FetchError(f"{self.platform}: {e}")
+
+        if response.status >= 300:
+            # Throttling and server errors are worth another try, client errors are not
+            raise FetchError(f"HTTP {response.status} from {self.platform}", retryable=response.status == 429 or response.status >= 500)
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise FetchError(f"{self.platform}: invalid JSON response", retryable=False)
+
+        offers = data.get("results", []) if isinstance(data, dict) else data
+        try:
+            return [normalize_offer(offer, keyword, self.platform) for offer in offers]
+        except (KeyError, TypeError, ValueError):
+            raise FetchError(f"{self.platform}: malformed offer in response", retryable=False)
+
+
+def normalize_offer(offer: Dict, keyword: str, platform: str) -> Dict:
+    """Fill in the offer fields the reports rely on.
+
+    A missing rating stays None (unknown) rather than counting as 0.
+    """
+    rating = offer.get("rating")
+    return {
+        "title": offer.get("title", keyword),
+        "price": round(float(offer["price"]), 2),
+        "platform": platform,
+        "seller": offer.get("seller", "unknown"),
+        "rating": None if rating is None else float(rating),
+        "condition": offer.get("condition", "New"),
+        "url": offer.get("url", ""),
+    }
+
+
+class FetchEngine:
+    """Runs platform searches concurrently within each platform's limits."""
+
+    def __init__(self, adapters: Dict[str, PlatformAdapter], max_workers: int = 16, cache: Optional[ResponseCache] = None):
+        self.adapters = adapters
+        self.cache = cache
+        self.refreshing = set()
+        self.refresh_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.semaphores = {p: threading.BoundedSemaphore(a.limits.max_concurrency) for p, a in adapters.items()}
+        self.buckets = {
+            p: TokenBucket(a.limits.rate, a.limits.burst) for p, a in adapters.items() if a.limits.rate is not None
+        }
+
+    def search(self, keyword: str, platform: str) -> List[Dict]:
+        """Search one platform, retrying with jittered exponential backoff."""
+        adapter = self.adapters[platform]
+        limits = adapter.limits
+        attempt = 0
+        while True:
+            if platform in self.buckets:
+                self.buckets[platform].acquire()
+            with self.semaphores[platform]:
+                try:
+                    return adapter.search(keyword, limits.timeout)
+                except FetchError as e:
+                    if not e.retryable or attempt >= limits.retries:
+                        raise
+            # Full jitter keeps retries from many workers from arriving together
+            time.sleep(random.uniform(0, limits.backoff * 2**attempt))
+            attempt += 1
+
+    def search_and_cache(self, keyword: str, platform: str) -> Tuple[float, List[Dict]]:
+        offers = self.search(keyword, platform)
+        fetched_at = time.time()
+        if self.cache is not None:
+            self.cache.put(platform, keyword, [dict(offer) for offer in offers], fetched_at)
+        return fetched_at, offers
+
+    def refresh(self, keyword: str, platform: str):
+        """Background refresh of a stale cache entry; failures keep the stale entry."""
+        try:
+            self.search_and_cache(keyword, platform)
+        except FetchError:
+            pass
+        finally:
+            with self.refresh_lock:
+                self.refreshing.discard((keyword, platform))
+
+    def cached(self, keyword: str, platform: str) -> Optional[Tuple[float, List[Dict]]]:
+        """(fetched at, offers) from the cache within the platform's TTLs, refreshing stale ones in the background."""
+        entry = self.cache.get(platform, keyword)
+        if entry is None:
+            return None
+        fetched_at, offers = entry
+        limits = self.adapters[platform].limits
+        age = time.time() - fetched_at
+        if age >= limits.cache_ttl + limits.stale_ttl:
+            return None
+        if age >= limits.cache_ttl:
+            with self.refresh_lock:
+                if (keyword, platform) not in self.refreshing:
+                    self.refreshing.add((keyword, platform))
+                    self.executor.submit(self.refresh, keyword, platform)
+        return fetched_at, [dict(offer) for offer in offers]
+
+    def fetch_all(
+        self, requests: Iterable[Tuple[str, str]], refresh: bool = False
+    ) -> Tuple[Dict[Tuple[str, str], List[Dict]], Dict[Tuple[str, str], str], Dict[Tuple[str, str], Tuple[float, bool]]]:
+        """Run (keyword, platform) searches concurrently.
+
+        Results are taken from the cache when it has them, unless refresh is set.
+
+        Returns:
+            (offers, errors, fetched): offers maps each request to its results,
+            with an empty list for failed requests, whose messages are in errors.
+            fetched maps each successful request to (fetched at, from cache), so
+            callers can tell cached results from new ones.
+        """
+        offers, errors, fetched = {}, {}, {}
+        futures = {}
+        for keyword, platform in requests:
+            if (keyword, platform) in futures or (keyword, platform) in offers:
+                continue
+            hit = self.cached(keyword, platform) if self.cache is not None and not refresh else None
+            if hit is not None:
+                fetched[keyword, platform] = (hit[0], True)
+                offers[keyword, platform] = hit[1]
+            else:
+                futures[keyword, platform] = self.executor.submit(self.search_and_cache, keyword, platform)
+
+        for key, future in futures.items():
+            try:
+                fetched_at, offers[key] = future.result()
+                fetched[key] = (fetched_at, False)
+            except FetchError as e:
+                offers[key] = []
+                errors[key] = str(e)
+        return offers, errors, fetched
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
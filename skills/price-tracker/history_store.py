@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Price Tracker - Persistent price history store.
+
+Observations are appended to a local SQLite database, one row per product,
+platform and time, holding the lowest offer seen. The table is keyed by
+(product, platform, time) without a separate rowid, so a time range for one
+product and platform is a single contiguous index scan.
+
+Every observation also updates hourly, daily and weekly rollups (open, high,
+low, close, count, sum and sum of squares per bucket), so trends over long
+ranges are read from at most a few hundred buckets instead of the raw rows.
+Days and weeks are in UTC, weeks start on Monday.
+
+The store also keeps the alerts a --daemon monitor has already reported (see
+scheduler.py). The database lives at ~/.price-tracker/history.db unless PRICE_TRACKER_DB or
+--db points elsewhere.
+"""
+
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from response_cache import normalize_keyword
+
+DEFAULT_DB = os.path.join(os.path.expanduser("~"), ".price-tracker", "history.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS observations (
+    product_id INTEGER NOT NULL REFERENCES products(id),
+    platform TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    price REAL NOT NULL,
+    PRIMARY KEY (product_id, platform, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    product_id INTEGER NOT NULL REFERENCES products(id),
+    platform TEXT NOT NULL,
+    resolution INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    open_ts INTEGER NOT NULL,
+    open REAL NOT NULL,
+    close_ts INTEGER NOT NULL,
+    close REAL NOT NULL,
+    low REAL NOT NULL,
+    high REAL NOT NULL,
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    total_sq REAL NOT NULL,
+    PRIMARY KEY (product_id, platform, resolution, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS alerts (
+    product_id INTEGER NOT NULL REFERENCES products(id),
+    key TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    since INTEGER NOT NULL,
+    PRIMARY KEY (product_id, key)
+) WITHOUT ROWID;
+"""
+
+SCHEMA_VERSION = 1
+
+HOUR = 3600
+DAY = 86400
+WEEK = 7 * DAY
+RESOLUTIONS = (HOUR, DAY, WEEK)
+# 1970-01-01 was a Thursday; shift weekly buckets back to Monday
+BUCKET_OFFSETS = {HOUR: 0, DAY: 0, WEEK: 3 * DAY}
+
+ROLLUP_COLUMNS = "product_id, platform, resolution, bucket, open_ts, open, close_ts, close, low, high, count, total, total_sq"
+
+# Merges a partial bucket into the stored one; SET expressions see the old row
+MERGE_ROLLUP = f"""
+INSERT INTO rollups ({ROLLUP_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (product_id, platform, resolution, bucket) DO UPDATE SET
+    open = CASE WHEN excluded.open_ts < open_ts THEN excluded.open ELSE open END,
+    open_ts = min(open_ts, excluded.open_ts),
+    close = CASE WHEN excluded.close_ts >= close_ts THEN excluded.close ELSE close END,
+    close_ts = max(close_ts, excluded.close_ts),
+    low = min(low, excluded.low),
+    high = max(high, excluded.high),
+    count = count + excluded.count,
+    total = total + excluded.total,
+    total_sq = total_sq + excluded.total_sq
+"""
+
+
+def default_db_path() -> str:
+    return os.environ.get("PRICE_TRACKER_DB") or DEFAULT_DB
+
+
+def bucket_start(ts: int, resolution: int) -> int:
+    offset = BUCKET_OFFSETS[resolution]
+    return (ts + offset) // resolution * resolution - offset
+
+
+def next_bucket(ts: int, resolution: int) -> int:
+    """Start of the first bucket at or after ts."""
+    start = bucket_start(ts, resolution)
+    return start if start == ts else start + resolution
+
+
+def aggregate(rows: Iterable[Tuple[int, str, int, float]]) -> List[Tuple]:
+    """Roll (product id, platform, unix time, price) rows up into rollup rows.
+
+    Rows of one product and platform must be ordered by time.
+    """
+    buckets: Dict[Tuple, List] = {}
+    for product_id, platform, ts, price in rows:
+        for resolution in RESOLUTIONS:
+            key = (product_id, platform, resolution, bucket_start(ts, resolution))
+            b = buckets.get(key)
+            if b is None:
+                buckets[key] = [ts, price, ts, price, price, price, 1, price, price * price]
+            else:
+                b[2] = ts
+                b[3] = price
+                b[4] = min(b[4], price)
+                b[5] = max(b[5], price)
+                b[6] += 1
+                b[7] += price
+                b[8] += price * price
+    return [key + tuple(b) for key, b in buckets.items()]
+
+
+def covering_buckets(start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+    """Split [start, end) into (resolution, first bucket, end) runs, coarsest in the middle.
+
+    start and end are widened to whole hours. A year needs at most about 52
+    weekly, 12 daily and 46 hourly buckets.
+    """
+    start = bucket_start(start, HOUR)
+    end = next_bucket(end, HOUR)
+    days = (next_bucket(start, DAY), bucket_start(end, DAY))
+    if days[0] >= days[1]:
+        yield HOUR, start, end
+        return
+    weeks = (next_bucket(days[0], WEEK), bucket_start(days[1], WEEK))
+    yield HOUR, start, days[0]
+    if weeks[0] >= weeks[1]:
+        yield DAY, days[0], days[1]
+    else:
+        yield DAY, days[0], weeks[0]
+        yield WEEK, weeks[0], weeks[1]
+        yield DAY, weeks[1], days[1]
+    yield HOUR, days[1], end
+
+
+class PriceStore:
+    """Append-only price observations in SQLite."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_db_path()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        # WAL lets price_history read while a monitor is writing
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.product_ids: Dict[str, int] = {}
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            # Stores written before rollups existed
+            with self.conn:
+                self.rebuild_rollups()
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def product_id(self, name: str, create: bool = True) -> Optional[int]:
+        """Id of a product, by name normalized like the response cache's keywords."""
+        name = normalize_keyword(name)
+        if name not in self.product_ids:
+            row = self.conn.execute("SELECT id FROM products WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                if not create:
+                    return None
+                row = (self.conn.execute("INSERT INTO products (name) VALUES (?)", (name,)).lastrowid,)
+            self.product_ids[name] = row[0]
+        return self.product_ids[name]
+
+    def record_many(self, observations: Iterable[Tuple[str, str, float, float]]):
+        """Append (product, platform, unix time, price) observations in one transaction.
+
+        Several observations of a product and platform in the same second keep
+        the lowest price. The rollups are updated in the same transaction.
+        """
+        with self.conn:
+            added = []
+            lowered = set()
+            for product, platform, ts, price in observations:
+                row = (self.product_id(product), platform, int(ts), price)
+                if self.conn.execute("INSERT OR IGNORE INTO observations (product_id, platform, ts, price) VALUES (?, ?, ?, ?)", row).rowcount:
+                    added.append(row)
+                elif self.conn.execute(
+                    "UPDATE observations SET price = ? WHERE product_id = ? AND platform = ? AND ts = ? AND price > ?",
+                    (price,) + row[:3] + (price,),
+                ).rowcount:
+                    lowered.add(row[:3])
+
+            added.sort(key=lambda row: row[:3])
+            self.conn.executemany(MERGE_ROLLUP, aggregate(added))
+            # A replaced price cannot be subtracted from low/high, so recount those buckets
+            for product_id, platform, ts in lowered:
+                for resolution in RESOLUTIONS:
+                    start = bucket_start(ts, resolution)
+                    self.rebuild_rollups(product_id, platform, resolution, start, start + resolution)
+
+    def rebuild_rollups(
+        self,
+        product_id: Optional[int] = None,
+        platform: Optional[str] = None,
+        resolution: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ):
+        """Recompute rollups from the raw observations.
+
+        Without arguments, rebuilds everything. With a product id, platform,
+        resolution and bucket-aligned [start, end), rebuilds just those buckets.
+        """
+        if product_id is None:
+            self.conn.execute("DELETE FROM rollups")
+            cursor = self.conn.execute("SELECT product_id, platform, ts, price FROM observations ORDER BY product_id, platform, ts")
+            resolutions = RESOLUTIONS
+        else:
+            self.conn.execute(
+                "DELETE FROM rollups WHERE product_id = ? AND platform = ? AND resolution = ? AND bucket >= ? AND bucket < ?",
+                (product_id, platform, resolution, start, end),
+            )
+            cursor = self.conn.execute(
+                "SELECT product_id, platform, ts, price FROM observations WHERE product_id = ? AND platform = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                (product_id, platform, start, end),
+            )
+            resolutions = (resolution,)
+        while True:
+            rows = cursor.fetchmany(100000)
+            if not rows:
+                break
+            # Buckets split across chunks are merged by the upsert
+            self.conn.executemany(MERGE_ROLLUP, [r for r in aggregate(rows) if r[2] in resolutions])
+
+    def record_offers(self, results: Dict[str, List[Dict]], observed_at: Optional[float] = None):
+        """Record the lowest offer per platform of each product's search results.
+
+        Offers are recorded at their "fetched_at" time if they have one, else at
+        observed_at or now. Recording a cached result again therefore hits the
+        same observation instead of adding a copy.
+        """
+        default_ts = time.time() if observed_at is None else observed_at
+        lowest: Dict[Tuple[str, str, int], float] = {}
+        for product, offers in results.items():
+            for offer in offers:
+                key = (product, offer["platform"], int(offer.get("fetched_at", default_ts)))
+                if key not in lowest or offer["price"] < lowest[key]:
+                    lowest[key] = offer["price"]
+        self.record_many((product, platform, ts, price) for (product, platform, ts), price in lowest.items())
+
+    def observations(self, product: str, platform: str, start: float, end: float) -> List[Tuple[int, float]]:
+        """(unix time, price) observations with start <= time < end, oldest first."""
+        product_id = self.product_id(product, create=False)
+        if product_id is None:
+            return []
+        return self.conn.execute(
+            "SELECT ts, price FROM observations WHERE product_id = ? AND platform = ? AND ts >= ? AND ts < ? ORDER BY ts",
+            (product_id, platform, int(start), int(end)),
+        ).fetchall()
+
+    def rollups(self, product: str, platform: str, resolution: int, start: float, end: float) -> List[Dict]:
+        """Buckets of one resolution overlapping [start, end), oldest first."""
+        product_id = self.product_id(product, create=False)
+        if product_id is None:
+            return []
+        cursor = self.conn.execute(
+            f"SELECT {ROLLUP_COLUMNS} FROM rollups WHERE product_id = ? AND platform = ? AND resolution = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+            (product_id, platform, resolution, bucket_start(int(start), resolution), int(end)),
+        )
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def daily_history(self, product: str, platform: str, start: float, end: float) -> List[Dict]:
+        """Daily rollups touching [start, end) as UTC days: closing price, low and high."""
+        return [
+            {
+                "date": datetime.fromtimestamp(b["bucket"], timezone.utc).strftime("%Y-%m-%d"),
+                "price": b["close"],
+                "low": b["low"],
+                "high": b["high"],
+            }
+            for b in self.rollups(product, platform, DAY, start, end)
+        ]
+
+    def summary(self, product: str, platform: str, start: float, end: float) -> Optional[Dict]:
+        """Price statistics over [start, end), widened to whole hours, from the rollups.
+
+        Returns first and last price, low, high, count, sum and sum of squares,
+        or None without observations.
+        """
+        product_id = self.product_id(product, create=False)
+        if product_id is None:
+            return None
+        summary = None
+        for resolution, first, stop in covering_buckets(int(start), int(end)):
+            for open_ts, open_, close_ts, close, low, high, count, total, total_sq in self.conn.execute(
+                "SELECT open_ts, open, close_ts, close, low, high, count, total, total_sq FROM rollups "
+                "WHERE product_id = ? AND platform = ? AND resolution = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+                (product_id, platform, resolution, first, stop),
+            ):
+                if summary is None:
+                    summary = {"first_price": open_, "low": low, "high": high, "count": 0, "total": 0.0, "total_sq": 0.0}
+                summary["last_price"] = close
+                summary["low"] = min(summary["low"], low)
+                summary["high"] = max(summary["high"], high)
+                summary["count"] += count
+                summary["total"] += total
+                summary["total_sq"] += total_sq
+        return summary
+
+    def update_alerts(self, product: str, alerts: Dict[str, str]) -> Tuple[List[str], List[str], List[str]]:
+        """Replace a product's active alerts, given as key -> signature.
+
+        Returns the (new, changed, cleared) keys compared with the active alerts
+        stored before.
+        """
+        with self.conn:
+            product_id = self.product_id(product)
+            before = dict(self.conn.execute("SELECT key, signature FROM alerts WHERE product_id = ?", (product_id,)))
+            new = [key for key in alerts if key not in before]
+            changed = [key for key in alerts if key in before and before[key] != alerts[key]]
+            cleared = [key for key in before if key not in alerts]
+
+            now = int(time.time())
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO alerts (product_id, key, signature, since) VALUES (?, ?, ?, ?)",
+                [(product_id, key, alerts[key], now) for key in new + changed],
+            )
+            self.conn.executemany("DELETE FROM alerts WHERE product_id = ? AND key = ?", [(product_id, key) for key in cleared])
+        return new, changed, cleared
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
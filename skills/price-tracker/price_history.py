@@ -5,15 +5,20 @@ Price Tracker - Retrieve and analyze historical price data.
 
 import argparse
 import json
+import math
+import sqlite3
 import sys
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 import random
 
+from history_store import PriceStore
+
 # Import from track_product.py
 from track_product import (
     PLATFORMS,
-    mock_search_product,
+    search_platforms,
     format_markdown,
     format_json,
 )
@@ -44,17 +49,36 @@ def generate_mock_history(base_price: float, days: int) -> List[Dict]:
 
 def analyze_trend(history: List[Dict]) -> Dict:
     """Analyze price trend and make predictions."""
-    if len(history) < 2:
-        return {"trend": "insufficient_data", "direction": "unknown"}
-
     prices = [entry["price"] for entry in history]
+    if not prices:
+        return trend_from_summary(None)
+
+    return trend_from_summary(
+        {
+            "first_price": prices[0],
+            "last_price": prices[-1],
+            "low": min(prices),
+            "high": max(prices),
+            "count": len(prices),
+            "total": sum(prices),
+            "total_sq": sum(p * p for p in prices),
+        }
+    )
+
+
+def trend_from_summary(summary: Optional[Dict]) -> Dict:
+    """Trend and prediction from price statistics (see PriceStore.summary)."""
+    if not summary or summary["count"] < 2:
+        return {"trend": "insufficient_data", "direction": "unknown"}
 
     # Calculate trend
-    first_price = prices[0]
-    last_price = prices[-1]
-    avg_price = sum(prices) / len(prices)
-    min_price = min(prices)
-    max_price = max(prices)
+    count = summary["count"]
+    first_price = summary["first_price"]
+    last_price = summary["last_price"]
+    avg_price = summary["total"] / count
+    min_price = summary["low"]
+    max_price = summary["high"]
+    std_dev = math.sqrt(max(summary["total_sq"] / count - avg_price**2, 0.0))
 
     # Determine direction
     if last_price > first_price * 1.05:
@@ -85,13 +109,31 @@ def analyze_trend(history: List[Dict]) -> Dict:
         "max_price": max_price,
         "predicted_price": round(predicted, 2),
         "volatility": round((max_price - min_price) / avg_price, 3),
+        "std_dev": round(std_dev, 2),
+        "observations": count,
     }
 
 
-def get_price_history(product: str, platform: str, days: int) -> List[Dict]:
-    """Get historical price data for a product."""
+def get_price_history(product: str, platform: str, days: int, db_path: Optional[str] = None) -> List[Dict]:
+    """Get historical price data for a product.
+
+    Reads the recorded observations of the last days from the price history
+    store, one entry per day. Without any, falls back to simulated history.
+    """
+    end = time.time()
+    try:
+        with PriceStore(db_path) as store:
+            history = store.daily_history(product, platform, end - days * 86400, end + 1)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Warning: price history store unavailable: {e}", file=sys.stderr)
+        history = []
+    if history:
+        return history
+
+    print(f"Note: no recorded history for {product!r} on {platform}, showing simulated data", file=sys.stderr)
+
     # Get current price
-    current = mock_search_product(product, platform)
+    current = search_platforms(product, [platform])
     if not current:
         return []
 
@@ -103,6 +145,19 @@ def get_price_history(product: str, platform: str, days: int) -> List[Dict]:
     return history
 
 
+def get_trend(product: str, platform: str, days: int, history: List[Dict], db_path: Optional[str] = None) -> Dict:
+    """Trend over the last days from the store's rollups, or from history if nothing is recorded."""
+    end = time.time()
+    try:
+        with PriceStore(db_path) as store:
+            summary = store.summary(product, platform, end - days * 86400, end)
+    except (sqlite3.Error, OSError):
+        summary = None
+    if summary:
+        return trend_from_summary(summary)
+    return analyze_trend(history)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Retrieve and analyze historical price data")
     parser.add_argument("--product", required=True, help="Product name/keyword")
@@ -110,6 +165,7 @@ def main():
     parser.add_argument("--platform", help="Specific platform (default: all)")
     parser.add_argument("--output", choices=["markdown", "json", "csv"], default="markdown", help="Output format")
     parser.add_argument("--trend-analysis", action="store_true", help="Include trend analysis and predictions")
+    parser.add_argument("--db", help="Price history database (default: $PRICE_TRACKER_DB or ~/.price-tracker/history.db)")
 
     args = parser.parse_args()
 
@@ -128,11 +184,11 @@ def main():
     all_trends = {}
 
     for platform in platforms:
-        history = get_price_history(args.product, platform, args.days)
+        history = get_price_history(args.product, platform, args.days, args.db)
         all_history[platform] = history
 
         if args.trend_analysis and history:
-            trend = analyze_trend(history)
+            trend = get_trend(args.product, platform, args.days, history, args.db)
             all_trends[platform] = trend
 
     # Format output
@@ -146,11 +202,13 @@ def main():
 
             if args.trend_analysis and platform in all_trends:
                 trend = all_trends[platform]
-                output += f"**Trend:** {trend['trend'].title()} ({trend['direction']})\n"
-                output += f"**Price Range:** ${trend['min_price']:.2f} - ${trend['max_price']:.2f}\n"
-                output += f"**Average:** ${trend['avg_price']:.2f}\n"
-                output += f"**Volatility:** {trend['volatility'] * 100:.1f}%\n"
-                output += f"**Predicted:** ${trend['predicted_price']:.2f} (7 days)\n\n"
+                output += f"**Trend:** {trend['trend'].replace('_', ' ').title()} ({trend['direction']})\n"
+                if "avg_price" in trend:
+                    output += f"**Price Range:** ${trend['min_price']:.2f} - ${trend['max_price']:.2f}\n"
+                    output += f"**Average:** ${trend['avg_price']:.2f}\n"
+                    output += f"**Volatility:** {trend['volatility'] * 100:.1f}% (std. dev. ${trend['std_dev']:.2f})\n"
+                    output += f"**Predicted:** ${trend['predicted_price']:.2f} (7 days)\n"
+                output += "\n"
 
             output += "| Date | Price | Low | High |\n"
             output += "|------|-------|-----|------|\n"
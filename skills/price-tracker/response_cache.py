@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Price Tracker - Cache for platform search responses.
+
+Search results are kept per (platform, normalized keyword) in an in-memory LRU
+and, unless disabled, in a SQLite file shared by all runs, so running several
+scripts for the same product within a few minutes searches each platform once.
+
+Each platform's FetchLimits set how long a result is fresh (cache_ttl) and for
+how much longer a stale result is still served while it is refreshed in the
+background (stale_ttl).
+
+The file lives at ~/.price-tracker/cache.db unless PRICE_TRACKER_CACHE points
+elsewhere; PRICE_TRACKER_CACHE=off keeps the cache in memory only.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), ".price-tracker", "cache.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    platform TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    offers TEXT NOT NULL,
+    PRIMARY KEY (platform, keyword)
+) WITHOUT ROWID;
+"""
+
+# Entries older than this are deleted when the cache file is opened
+MAX_AGE = 86400
+
+
+def default_cache_path() -> Optional[str]:
+    path = os.environ.get("PRICE_TRACKER_CACHE") or DEFAULT_CACHE
+    return None if path.lower() == "off" else path
+
+
+def normalize_keyword(keyword: str) -> str:
+    return " ".join(keyword.lower().split())
+
+
+class ResponseCache:
+    """Thread-safe LRU of search responses, backed by an optional SQLite file."""
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, str], Tuple[float, List[Dict]]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.conn = None
+        if path:
+            try:
+                if path != ":memory:":
+                    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self.conn = sqlite3.connect(path, check_same_thread=False)
+                self.conn.execute("PRAGMA journal_mode=WAL")
+                self.conn.execute("PRAGMA synchronous=NORMAL")
+                self.conn.executescript(SCHEMA)
+                with self.conn:
+                    self.conn.execute("DELETE FROM responses WHERE fetched_at < ?", (time.time() - MAX_AGE,))
+            except (sqlite3.Error, OSError) as e:
+                self.disable_disk(e)
+
+    def disable_disk(self, error: Exception):
+        """Keep caching in memory only after the file failed."""
+        print(f"Warning: response cache file unavailable, caching in memory only: {error}", file=sys.stderr)
+        if self.conn is not None:
+            self.conn.close()
+        self.conn = None
+
+    def get(self, platform: str, keyword: str) -> Optional[Tuple[float, List[Dict]]]:
+        """(fetched at, offers) for a search, or None if not cached."""
+        key = (platform, normalize_keyword(keyword))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry
+            if self.conn is None:
+                return None
+            try:
+                row = self.conn.execute("SELECT fetched_at, offers FROM responses WHERE platform = ? AND keyword = ?", key).fetchone()
+            except sqlite3.Error as e:
+                self.disable_disk(e)
+                return None
+            if row is None:
+                return None
+            entry = (row[0], json.loads(row[1]))
+            self.remember(key, entry)
+            return entry
+
+    def put(self, platform: str, keyword: str, offers: List[Dict], fetched_at: Optional[float] = None):
+        key = (platform, normalize_keyword(keyword))
+        entry = (time.time() if fetched_at is None else fetched_at, offers)
+        with self.lock:
+            self.remember(key, entry)
+            if self.conn is None:
+                return
+            try:
+                with self.conn:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO responses (platform, keyword, fetched_at, offers) VALUES (?, ?, ?, ?)",
+                        key + (entry[0], json.dumps(offers)),
+                    )
+            except sqlite3.Error as e:
+                self.disable_disk(e)
+
+    def remember(self, key: Tuple[str, str], entry: Tuple[float, List[Dict]]):
+        # Callers hold the lock
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
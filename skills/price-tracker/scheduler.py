@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Price Tracker - In-process scheduler for long-running monitors.
+
+With --daemon, track_product.py and bulk_monitor.py stay running instead of
+being started by cron: the catalog is read once, and the fetch engine (with its
+connections) and the history store stay open. Each product is checked when it
+is due according to its frequency. Products of the same frequency are spread
+evenly over the interval, so a large catalog is searched at a steady rate
+rather than all at once.
+
+Reported alerts are kept in the history store, so only new, changed and
+cleared alerts are emitted, also across restarts.
+"""
+
+import heapq
+import itertools
+import json
+import signal
+import threading
+import time
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from history_store import PriceStore
+
+FREQUENCIES = {"hourly": 3600, "daily": 86400, "weekly": 7 * 86400}
+
+
+class CheckScheduler:
+    """Priority queue of next-due checks, each repeating at its own interval."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self.heap: List[Tuple[float, int, Hashable, float]] = []
+        self.counter = itertools.count()
+        self.stopped = threading.Event()
+
+    def add(self, key: Hashable, interval: float, delay: float = 0.0):
+        """Check key every interval seconds, the first time after delay."""
+        heapq.heappush(self.heap, (self.clock() + delay, next(self.counter), key, interval))
+
+    def add_spread(self, checks: Iterable[Tuple[Hashable, float]]):
+        """Add (key, interval) checks, spreading the first check of each interval evenly over it."""
+        by_interval: Dict[float, List[Hashable]] = {}
+        for key, interval in checks:
+            by_interval.setdefault(interval, []).append(key)
+        for interval, keys in by_interval.items():
+            for i, key in enumerate(keys):
+                self.add(key, interval, interval * i / len(keys))
+
+    def next_due(self) -> Optional[float]:
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, limit: Optional[int] = None) -> List[Hashable]:
+        """Keys due now, earliest first, rescheduled for their next check.
+
+        A check that fell behind by more than its interval skips the missed
+        checks instead of catching up on them, keeping its place in the cadence.
+        """
+        now = self.clock()
+        due = []
+        while self.heap and self.heap[0][0] <= now and (limit is None or len(due) < limit):
+            when, _, key, interval = heapq.heappop(self.heap)
+            when += interval * ((now - when) // interval + 1)
+            heapq.heappush(self.heap, (when, next(self.counter), key, interval))
+            due.append(key)
+        return due
+
+    def run(self, check: Callable[[List[Hashable]], None], batch_size: Optional[int] = None):
+        """Call check with the due keys, at most batch_size at a time, until stop()."""
+        if batch_size is not None and batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        while not self.stopped.is_set():
+            due = self.pop_due(batch_size)
+            if due:
+                check(due)
+            elif self.heap:
+                self.stopped.wait(max(0.0, self.next_due() - self.clock()))
+            else:
+                return
+
+    def run_until_stopped(self, check: Callable[[List[Hashable]], None], batch_size: Optional[int] = None):
+        """run() until SIGTERM or Ctrl-C, letting the current check finish on SIGTERM."""
+        previous = signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        try:
+            self.run(check, batch_size)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+
+    def stop(self):
+        self.stopped.set()
+
+
+def alert_key(row: Dict) -> str:
+    return "|".join([row["type"], row["buy_from"], row.get("sell_on", "")])
+
+
+def alert_signature(row: Dict) -> str:
+    return json.dumps([row.get("buy_price"), row.get("sell_price")])
+
+
+def changed_alerts(store: PriceStore, product: str, rows: List[Dict]) -> List[Dict]:
+    """Compare a product's current alert rows with the ones reported before.
+
+    Returns the new and changed rows with a "status" of "new" or "changed", and
+    a "cleared" row for every earlier alert that no longer holds. Alerts are
+    identified by type and platforms, and changed when their prices differ.
+    """
+    current = {alert_key(row): row for row in rows}
+    new, changed, cleared = store.update_alerts(product, {key: alert_signature(row) for key, row in current.items()})
+
+    emitted = [dict(current[key], status="new") for key in new]
+    emitted += [dict(current[key], status="changed") for key in changed]
+    for key in cleared:
+        alert_type, buy_from, sell_on = key.split("|")
+        row = {"type": alert_type, "product": product, "buy_from": buy_from, "status": "cleared"}
+        if sell_on:
+            row["sell_on"] = sell_on
+        emitted.append(row)
+    return emitted
@@ -4,11 +4,20 @@ Price Tracker - Track single product across platforms with alerts.
 """
 
 import argparse
+import heapq
 import json
 import csv
+import os
+import sqlite3
 import sys
 from datetime import datetime
-from typing import Dict, List, Optional
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fetch_engine import FetchEngine, FetchLimits, HttpAdapter, PlatformAdapter
+from history_store import PriceStore
+from response_cache import ResponseCache, default_cache_path
+from scheduler import FREQUENCIES, CheckScheduler, changed_alerts
 
 # Placeholder for actual platform integration
 # In production, integrate with:
@@ -16,12 +25,17 @@ from typing import Dict, List, Optional
 # - eBay Browse API
 # - Walmart Marketplace API
 # - Best Buy API
+#
+# Searches go through ADAPTERS. Set PRICE_TRACKER_<PLATFORM>_URL (e.g.
+# PRICE_TRACKER_EBAY_URL) to search a JSON API instead of the mock, or register
+# another PlatformAdapter in ADAPTERS. "limits" are the per-platform request
+# limits used by the fetch engine, including how long search results are cached.
 
 PLATFORMS = {
-    "amazon": {"fee_rate": 0.15, "name": "Amazon"},
-    "ebay": {"fee_rate": 0.13, "name": "eBay"},
-    "walmart": {"fee_rate": 0.10, "name": "Walmart"},
-    "bestbuy": {"fee_rate": 0.12, "name": "Best Buy"},
+    "amazon": {"fee_rate": 0.15, "name": "Amazon", "limits": FetchLimits(max_concurrency=2, rate=1.0, burst=1)},
+    "ebay": {"fee_rate": 0.13, "name": "eBay", "limits": FetchLimits(max_concurrency=4, rate=5.0, burst=5)},
+    "walmart": {"fee_rate": 0.10, "name": "Walmart", "limits": FetchLimits(max_concurrency=4, rate=5.0, burst=5)},
+    "bestbuy": {"fee_rate": 0.12, "name": "Best Buy", "limits": FetchLimits(max_concurrency=4, rate=5.0, burst=5)},
 }
 
 
@@ -52,6 +66,82 @@ def mock_search_product(keyword: str, platform: str) -> List[Dict]:
     ]
 
 
+class MockAdapter(PlatformAdapter):
+    """Adapter for mock_search_product - replace with real API adapters in production."""
+
+    def __init__(self, platform: str):
+        # No API behind the mock, so nothing to rate limit
+        super().__init__(platform, FetchLimits(rate=None))
+
+    def search(self, keyword: str, timeout: float) -> List[Dict]:
+        return mock_search_product(keyword, self.platform)
+
+
+def default_adapters() -> Dict[str, PlatformAdapter]:
+    """Create an adapter per platform: a JSON API if PRICE_TRACKER_<PLATFORM>_URL is set, else the mock."""
+    adapters = {}
+    for platform, info in PLATFORMS.items():
+        url = os.environ.get(f"PRICE_TRACKER_{platform.upper()}_URL")
+        if url:
+            adapters[platform] = HttpAdapter(platform, url, info["limits"])
+        else:
+            adapters[platform] = MockAdapter(platform)
+    return adapters
+
+
+ADAPTERS = default_adapters()
+
+_engine = None
+
+
+def get_engine() -> FetchEngine:
+    """Shared fetch engine and response cache, so platform limits hold across all searches of a run."""
+    global _engine
+    if _engine is None:
+        _engine = FetchEngine(ADAPTERS, cache=ResponseCache(default_cache_path()))
+    return _engine
+
+
+def search_products(searches: Dict[str, List[str]], refresh: bool = False) -> Dict[str, List[Dict]]:
+    """Search each keyword on its platforms, all concurrently.
+
+    Recent results come from the response cache unless refresh is set. Returns
+    results per keyword, in platform order, each offer with the unix time it
+    was fetched ("fetched_at"; earlier for cached results). Platforms that keep
+    failing are skipped with a warning on stderr.
+    """
+    requests = [(keyword, platform) for keyword, platforms in searches.items() for platform in platforms]
+    offers, errors, fetched = get_engine().fetch_all(requests, refresh)
+    for (keyword, platform), message in errors.items():
+        print(f"Warning: {platform} search for {keyword!r} failed: {message}", file=sys.stderr)
+    return {
+        keyword: [dict(offer, fetched_at=fetched[keyword, platform][0]) for platform in platforms for offer in offers[keyword, platform]]
+        for keyword, platforms in searches.items()
+    }
+
+
+def search_platforms(keyword: str, platforms: List[str], refresh: bool = False) -> List[Dict]:
+    """Search one keyword on several platforms concurrently."""
+    return search_products({keyword: platforms}, refresh)[keyword]
+
+
+def record_history(results: Dict[str, List[Dict]], db_path: Optional[str] = None, store: Optional[PriceStore] = None):
+    """Append search results per keyword to the price history store.
+
+    Offers are recorded at their "fetched_at" time, so cached results that
+    were already recorded are not counted again. Uses store if given, else opens the store at db_path for this call. A store
+    that cannot be written only produces a warning on stderr.
+    """
+    try:
+        if store is not None:
+            store.record_offers(results)
+            return
+        with PriceStore(db_path) as store:
+            store.record_offers(results)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Warning: price history not recorded: {e}", file=sys.stderr)
+
+
 def calculate_margin(buy_price: float, sell_price: float, buy_platform: str, sell_platform: str) -> float:
     """Calculate profit margin after fees."""
     buy_fee = buy_price * PLATFORMS[buy_platform]["fee_rate"]
@@ -67,35 +157,69 @@ def calculate_margin(buy_price: float, sell_price: float, buy_platform: str, sel
     return margin
 
 
-def analyze_arbitrage(products: List[Dict]) -> List[Dict]:
-    """Analyze arbitrage opportunities across platforms."""
+def iter_opportunities(products: List[Dict], min_margin: Optional[float] = None) -> Iterator[Tuple[float, Dict, Dict]]:
+    """Yield (margin, buy, sell) for ordered pairs of different offers, best margin first.
+
+    For a fixed buy and sell platform, calculate_margin rises with the sell price
+    and falls with the buy price. With each platform's offers sorted by price, the
+    next best pair of a platform pair is always next to one already taken, so a
+    heap over those frontiers yields pairs lazily: the top K cost
+    O(n log n + (P² + K) log(P² + K)) for P platforms, instead of all n² pairs.
+    Stops at the first pair below min_margin.
+    """
+    by_platform: Dict[str, List[int]] = {}
+    for index, product in enumerate(products):
+        by_platform.setdefault(product["platform"], []).append(index)
+    buys = {p: sorted(indexes, key=lambda i: products[i]["price"]) for p, indexes in by_platform.items()}
+    sells = {p: sorted(indexes, key=lambda i: -products[i]["price"]) for p, indexes in by_platform.items()}
+
+    heap = []
+    seen = set()
+
+    def push(buy_platform: str, sell_platform: str, i: int, j: int):
+        if i >= len(buys[buy_platform]) or j >= len(sells[sell_platform]):
+            return
+        if (buy_platform, sell_platform, i, j) in seen:
+            return
+        seen.add((buy_platform, sell_platform, i, j))
+        buy, sell = buys[buy_platform][i], sells[sell_platform][j]
+        margin = calculate_margin(products[buy]["price"], products[sell]["price"], buy_platform, sell_platform)
+        heapq.heappush(heap, (-margin, buy, sell, buy_platform, sell_platform, i, j))
+
+    for buy_platform in by_platform:
+        for sell_platform in by_platform:
+            push(buy_platform, sell_platform, 0, 0)
+
+    while heap:
+        negative_margin, buy, sell, buy_platform, sell_platform, i, j = heapq.heappop(heap)
+        if min_margin is not None and -negative_margin < min_margin:
+            return
+        push(buy_platform, sell_platform, i + 1, j)
+        push(buy_platform, sell_platform, i, j + 1)
+        if buy != sell:  # An offer is never bought and sold to itself
+            yield -negative_margin, products[buy], products[sell]
+
+
+def analyze_arbitrage(products: List[Dict], top_k: Optional[int] = None, min_margin: Optional[float] = None) -> List[Dict]:
+    """Analyze arbitrage opportunities across platforms, best margin first.
+
+    Only the top_k best opportunities, and only those with at least min_margin,
+    are returned when given.
+    """
     opportunities = []
 
-    for i, buy_product in enumerate(products):
-        for j, sell_product in enumerate(products):
-            if i == j:
-                continue
-
-            margin = calculate_margin(
-                buy_product["price"],
-                sell_product["price"],
-                buy_product["platform"],
-                sell_product["platform"],
-            )
-
-            opportunities.append(
-                {
-                    "buy_from": buy_product["platform"],
-                    "buy_price": buy_product["price"],
-                    "sell_on": sell_product["platform"],
-                    "sell_price": sell_product["price"],
-                    "margin": margin,
-                    "margin_percent": f"{margin * 100:.1f}%",
-                }
-            )
+    for margin, buy_product, sell_product in islice(iter_opportunities(products, min_margin), top_k):
+        opportunities.append(
+            {
+                "buy_from": buy_product["platform"],
+                "buy_price": buy_product["price"],
+                "sell_on": sell_product["platform"],
+                "sell_price": sell_product["price"],
+                "margin": margin,
+                "margin_percent": f"{margin * 100:.1f}%",
+            }
+        )
 
-    # Sort by margin descending
-    opportunities.sort(key=lambda x: x["margin"], reverse=True)
     return opportunities
 
 
@@ -120,6 +244,90 @@ def format_alerts(products: List[Dict], opportunities: List[Dict], alert_below:
     return "\n".join(alerts) if alerts else "No alerts triggered."
 
 
+def alert_rows(name: str, products: List[Dict], alert_below: Optional[float], alert_margin: Optional[float]) -> List[Dict]:
+    """Current alerts for a product as rows, like bulk_monitor's streamed rows.
+
+    The lowest price per platform at or below alert_below, and the best pair per
+    buy and sell platform at or above alert_margin.
+    """
+    rows = []
+
+    if alert_below:
+        lowest: Dict[str, float] = {}
+        for product in products:
+            if product["platform"] not in lowest or product["price"] < lowest[product["platform"]]:
+                lowest[product["platform"]] = product["price"]
+        for platform, price in lowest.items():
+            if price <= alert_below:
+                rows.append({"type": "price_below", "product": name, "buy_from": platform, "buy_price": price, "alert": True})
+
+    if alert_margin:
+        pairs = set()
+        pair_count = len({product["platform"] for product in products}) ** 2
+        for margin, buy, sell in iter_opportunities(products, alert_margin):
+            if (buy["platform"], sell["platform"]) in pairs:
+                continue
+            pairs.add((buy["platform"], sell["platform"]))
+            rows.append(
+                {
+                    "type": "arbitrage",
+                    "product": name,
+                    "buy_from": buy["platform"],
+                    "buy_price": buy["price"],
+                    "sell_on": sell["platform"],
+                    "sell_price": sell["price"],
+                    "margin": margin,
+                    "alert": True,
+                }
+            )
+            if len(pairs) == pair_count:
+                break
+
+    return rows
+
+
+def format_alert_row(row: Dict) -> str:
+    """Format an alert row emitted by a --daemon monitor as one line."""
+    status = row.get("status", "new").upper()
+    if status == "CLEARED":
+        platforms = f"{row['buy_from']} → {row['sell_on']}" if row.get("sell_on") else row["buy_from"]
+        return f"✅ CLEARED: {row['type'].replace('_', ' ')} for {row['product']} ({platforms})"
+    if row["type"] == "price_below":
+        return f"🔴 PRICE DROP ({status}): {row['product']} on {row['buy_from']}: ${row['buy_price']:.2f}"
+    return (
+        f"💰 ARBITRAGE ({status}): {row['product']}: Buy from {row['buy_from']} (${row['buy_price']:.2f}) "
+        f"→ Sell on {row['sell_on']} (${row['sell_price']:.2f}) → Margin: {row['margin'] * 100:.1f}%"
+    )
+
+
+def track_daemon(product: str, platforms: List[str], alert_below: Optional[float], alert_margin: Optional[float], frequency: str, output: str, db_path: Optional[str] = None):
+    """Check a product every frequency until stopped, printing only alerts that changed."""
+    scheduler = CheckScheduler()
+    scheduler.add(product, FREQUENCIES[frequency])
+
+    with PriceStore(db_path) as store:
+
+        def check(_):
+            # Always search: the check is due, and its results refresh the cache for other runs
+            products = search_platforms(product, platforms, refresh=True)
+            record_history({product: products}, store=store)
+            try:
+                changes = changed_alerts(store, product, alert_rows(product, products, alert_below, alert_margin))
+            except sqlite3.Error as e:
+                print(f"Warning: alerts not compared: {e}", file=sys.stderr)
+                return
+            for row in changes:
+                row["checked_at"] = datetime.now().isoformat(timespec="seconds")
+                print(json.dumps(row) if output == "json" else format_alert_row(row), flush=True)
+
+        scheduler.run_until_stopped(check)
+
+
+def format_rating(rating: Optional[float], suffix: str = "") -> str:
+    """A seller rating for reports, "n/a" when the platform did not send one."""
+    return "n/a" if rating is None else f"{rating:.1f}{suffix}"
+
+
 def format_markdown(products: List[Dict], opportunities: List[Dict], alerts: str) -> str:
     """Format output as Markdown."""
     md = f"# Price Tracking Report\n\n"
@@ -130,7 +338,7 @@ def format_markdown(products: List[Dict], opportunities: List[Dict], alerts: str
     md += "|----------|-------|--------|--------|-----------|\n"
 
     for product in products:
-        md += f"| {product['platform']} | ${product['price']:.2f} | {product['seller']} | {product['rating']:.1f}/5 | {product['condition']} |\n"
+        md += f"| {product['platform']} | ${product['price']:.2f} | {product['seller']} | {format_rating(product['rating'], '/5')} | {product['condition']} |\n"
 
     md += "\n## Arbitrage Opportunities\n\n"
     md += "| Buy From | Buy Price | Sell On | Sell Price | Margin |\n"
@@ -167,6 +375,10 @@ def main():
     parser.add_argument("--alert-margin", type=float, help="Alert when arbitrage margin exceeds this fraction")
     parser.add_argument("--frequency", choices=["hourly", "daily", "weekly"], default="daily", help="Check frequency")
     parser.add_argument("--output", choices=["markdown", "json", "csv"], default="markdown", help="Output format")
+    parser.add_argument("--top", type=int, default=20, help="Number of best arbitrage opportunities to report")
+    parser.add_argument("--db", help="Price history database (default: $PRICE_TRACKER_DB or ~/.price-tracker/history.db)")
+    parser.add_argument("--daemon", action="store_true", help="Keep running, checking every --frequency and printing only changed alerts")
+    parser.add_argument("--refresh", action="store_true", help="Search again instead of using cached results")
 
     args = parser.parse_args()
 
@@ -178,17 +390,20 @@ def main():
         print(f"Error: No valid platforms specified. Available: {', '.join(PLATFORMS.keys())}")
         sys.exit(1)
 
+    if args.daemon:
+        track_daemon(args.product, platforms, args.alert_below, args.alert_margin, args.frequency, args.output, args.db)
+        return
+
     # Search for product across platforms
-    products = []
-    for platform in platforms:
-        results = mock_search_product(args.product, platform)
-        products.extend(results)
+    products = search_platforms(args.product, platforms, args.refresh)
+    record_history({args.product: products}, args.db)
 
     # Analyze arbitrage opportunities
-    opportunities = analyze_arbitrage(products)
+    opportunities = analyze_arbitrage(products, top_k=args.top)
 
-    # Generate alerts
-    alerts = format_alerts(products, opportunities, args.alert_below, args.alert_margin)
+    # Generate alerts, for every opportunity above the alert margin
+    alert_opportunities = analyze_arbitrage(products, min_margin=args.alert_margin) if args.alert_margin else []
+    alerts = format_alerts(products, alert_opportunities, args.alert_below, args.alert_margin)
 
     # Format output
     if args.output == "markdown":
@@ -198,7 +413,7 @@ def main():
     elif args.output == "csv":
         output = "Platform,Price,Seller,Rating\n"
         for product in products:
-            output += f"{product['platform']},{product['price']},{product['seller']},{product['rating']}\n"
+            output += f"{product['platform']},{product['price']},{product['seller']},{'n/a' if product['rating'] is None else product['rating']}\n"
     else:
         output = format_markdown(products, opportunities, alerts)
 
@@ -0,0 +1,1118 @@
+"""
+In-process Excel formula evaluation
+
+Evaluates the formulas of a workbook without LibreOffice, to quickly check that
+generated formulas do not produce errors. Supports arithmetic, comparison and
+text operators, cell and range references (including other sheets and whole
+columns), and the functions in FUNCTIONS. Formulas are evaluated in dependency
+order, and ranges are read as column slices. Anything else raises
+UnsupportedFormula, so callers can fall back to a LibreOffice recalculation.
+
+The evaluated values and formula references can be saved to a JSON state file.
+After a few cells of the workbook change, a saved state only needs those cells
+re-read and their dependents evaluated again.
+
+Example usage:
+    from formula_engine import FormulaEngine, UnsupportedFormula
+
+    engine = FormulaEngine.load('model.xlsx')
+    engine.evaluate()
+    for sheet_name, coordinate, value in engine.iter_values():
+        ...
+    engine.save_state('model.state.json', workbook_hash)
+
+    # Later, after Inputs!B2 was edited
+    engine, workbook_hash = FormulaEngine.load_state('model.state.json')
+    changed = engine.cell_keys('Inputs!B2')
+    engine.reload_cells('model.xlsx', changed)
+    engine.evaluate(engine.dependents(changed))
+"""
+
+import json
+import math
+import os
+import re
+import zipfile
+from bisect import bisect_left, bisect_right
+from collections import deque
+from decimal import ROUND_HALF_UP, Decimal
+
+from openpyxl.formula.translate import Translator
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.utils.datetime import from_ISO8601, to_excel
+from workbook_parts import FORMULA_TAG, cell_text, iter_rows, iter_shared_strings, worksheet_parts
+
+MAX_ROW = 1048576
+MAX_COL = 16384
+STATE_VERSION = 1
+
+
+class UnsupportedFormula(Exception):
+    """Raised for workbook content the engine cannot evaluate"""
+
+
+class FormulaError:
+    """An Excel error value such as #DIV/0!"""
+
+    __slots__ = ('code',)
+
+    def __init__(self, code):
+        self.code = code
+
+    def __repr__(self):
+        return self.code
+
+
+ERRORS = {
+    code: FormulaError(code)
+    for code in ['#VALUE!', '#DIV/0!', '#REF!', '#NAME?', '#NULL!', '#NUM!', '#N/A']
+}
+
+
+class ErrorValue(Exception):
+    """Carries an error value out of a nested evaluation"""
+
+    def __init__(self, error):
+        super().__init__(error.code)
+        self.error = error
+
+
+class Range:
+    """A rectangular block of cell values, stored column by column"""
+
+    __slots__ = ('columns', 'height', 'width', '_index')
+
+    def __init__(self, columns, height):
+        self.columns = columns
+        self.height = height
+        self.width = len(columns)
+        self._index = {}
+
+    def values(self):
+        for column in self.columns:
+            yield from column
+
+    def cell(self, row, col):
+        """Value at a 0-based position inside the range"""
+        return self.columns[col][row]
+
+    def vector(self):
+        """Values of a single row or column, or None for 2-D ranges"""
+        if self.width == 1:
+            return self.columns[0]
+        if self.height == 1:
+            return [column[0] for column in self.columns]
+        return None
+
+    def exact_position(self, key, by_row=False):
+        """Index of the first value equal to key in the first column (or row)
+
+        Positions are indexed on first use, so repeated lookups are dictionary hits.
+        """
+        if by_row not in self._index:
+            values = [column[0] for column in self.columns] if by_row else self.columns[0]
+            index = self._index[by_row] = {}
+            for i, value in enumerate(values):
+                if value is not None:
+                    index.setdefault(match_key(value), i)
+        return self._index[by_row].get(match_key(key))
+
+
+# Tokenizer
+
+SHEET_PREFIX = r"(?:(?P<sheet>'(?:[^']|'')+'|[A-Za-z_][\w.]*)!)?"
+CELL = r'\$?[A-Za-z]{1,3}\$?\d+'
+COLUMN = r'\$?[A-Za-z]{1,3}'
+
+TOKEN_RE = re.compile(
+    rf'''
+    (?P<ws>\s+)
+  | (?P<string>"(?:[^"]|"")*")
+  | (?P<error>\#(?:NULL!|DIV/0!|VALUE!|REF!|NAME\?|NUM!|N/A))
+  | (?P<func>[A-Za-z_][\w.]*)\(
+  | {SHEET_PREFIX}(?P<ref>{CELL}(?::{CELL})?|{COLUMN}:{COLUMN})(?![\w(!])
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<bool>TRUE|FALSE)(?![\w(])
+  | (?P<op><>|<=|>=|[-+*/^&=<>%(),])
+    ''',
+    re.VERBOSE | re.IGNORECASE,
+)
+
+CELL_RE = re.compile(r'\$?([A-Za-z]{1,3})\$?(\d+)$')
+
+# Binding power of binary operators; unary minus and percent bind tighter
+BINARY_OPS = {
+    '=': 1, '<>': 1, '<': 1, '>': 1, '<=': 1, '>=': 1,
+    '&': 2,
+    '+': 3, '-': 3,
+    '*': 4, '/': 4,
+    '^': 5,
+}
+PREFIX_POWER = 6
+
+
+def tokenize(formula):
+    """Split a formula (without the leading =) into (kind, text, sheet) tokens"""
+    tokens = []
+    pos = 0
+    while pos < len(formula):
+        match = TOKEN_RE.match(formula, pos)
+        if not match:
+            raise UnsupportedFormula(f'cannot parse {formula[pos:pos + 20]!r}')
+        pos = match.end()
+        kind = match.lastgroup
+        if kind == 'sheet':
+            kind = 'ref'
+        if kind != 'ws':
+            tokens.append((kind, match.group(kind), match.group('sheet')))
+    return tokens
+
+
+class Parser:
+    """Parse a formula into a tree of tuples
+
+    Nodes are ('num', value), ('str', value), ('bool', value), ('err', error),
+    ('blank',), ('cell', sheet, row, col), ('range', sheet, r1, c1, r2, c2),
+    ('neg', node), ('pct', node), ('op', operator, left, right) and
+    ('call', name, args). Every reference is also recorded in self.references
+    as (sheet, r1, c1, r2, c2).
+    """
+
+    def __init__(self, formula, sheet, sheet_names):
+        self.tokens = tokenize(formula)
+        self.pos = 0
+        self.sheet = sheet
+        self.sheet_names = sheet_names
+        self.references = []
+
+    def parse(self):
+        node = self.expression(0)
+        if self.pos != len(self.tokens):
+            raise UnsupportedFormula(f'unexpected {self.tokens[self.pos][1]!r}')
+        return node
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None, None)
+
+    def advance(self):
+        token = self.peek()
+        if token[0] is None:
+            raise UnsupportedFormula('unexpected end of formula')
+        self.pos += 1
+        return token
+
+    def expect(self, text):
+        kind, token_text, _ = self.advance()
+        if kind != 'op' or token_text != text:
+            raise UnsupportedFormula(f'expected {text!r}')
+
+    def expression(self, min_power):
+        node = self.prefix()
+        while True:
+            kind, text, _ = self.peek()
+            if kind != 'op':
+                break
+            if text == '%':
+                self.pos += 1
+                node = ('pct', node)
+                continue
+            power = BINARY_OPS.get(text)
+            if power is None or power <= min_power:
+                break
+            self.pos += 1
+            node = ('op', text, node, self.expression(power))
+        return node
+
+    def prefix(self):
+        kind, text, sheet = self.advance()
+        if kind == 'number':
+            return ('num', float(text))
+        if kind == 'string':
+            return ('str', text[1:-1].replace('""', '"'))
+        if kind == 'bool':
+            return ('bool', text.upper() == 'TRUE')
+        if kind == 'error':
+            return ('err', ERRORS[text.upper()])
+        if kind == 'ref':
+            return self.reference(text, sheet)
+        if kind == 'func':
+            return self.call(text)
+        if kind == 'op' and text in ('-', '+'):
+            node = self.expression(PREFIX_POWER)
+            return ('neg', node) if text == '-' else node
+        if kind == 'op' and text == '(':
+            node = self.expression(0)
+            self.expect(')')
+            return node
+        raise UnsupportedFormula(f'unexpected {text!r}')
+
+    def call(self, name):
+        name = name.upper()
+        for prefix in ('_XLFN.', '_XLWS.'):
+            if name.startswith(prefix):
+                name = name[len(prefix):]
+        if name not in FUNCTIONS and name not in LAZY_FUNCTIONS:
+            raise UnsupportedFormula(f'function {name}')
+
+        args = []
+        if self.peek()[:2] == ('op', ')'):
+            self.pos += 1
+            return ('call', name, args)
+        while True:
+            if self.peek()[:2] in (('op', ','), ('op', ')')):
+                args.append(('blank',))
+            else:
+                args.append(self.expression(0))
+            kind, text, _ = self.advance()
+            if kind == 'op' and text == ')':
+                return ('call', name, args)
+            if kind != 'op' or text != ',':
+                raise UnsupportedFormula(f'unexpected {text!r}')
+
+    def reference(self, text, sheet):
+        if sheet is None:
+            sheet = self.sheet
+        else:
+            if sheet.startswith("'"):
+                sheet = sheet[1:-1].replace("''", "'")
+            sheet = self.sheet_names.get(sheet.lower())
+            if sheet is None:
+                return ('err', ERRORS['#REF!'])
+
+        start, _, end = text.partition(':')
+        if CELL_RE.match(start):
+            r1, c1 = parse_cell(start)
+            r2, c2 = parse_cell(end) if end else (r1, c1)
+        else:
+            r1, r2 = 1, MAX_ROW
+            c1 = column_index_from_string(start.lstrip('$').upper())
+            c2 = column_index_from_string(end.lstrip('$').upper())
+        r1, r2 = min(r1, r2), max(r1, r2)
+        c1, c2 = min(c1, c2), max(c1, c2)
+        if r2 > MAX_ROW or c2 > MAX_COL:
+            return ('err', ERRORS['#REF!'])
+
+        self.references.append((sheet, r1, c1, r2, c2))
+        if not end:
+            return ('cell', sheet, r1, c1)
+        return ('range', sheet, r1, c1, r2, c2)
+
+
+def parse_cell(text):
+    """Convert an A1 reference to (row, col)"""
+    letters, digits = CELL_RE.match(text).groups()
+    return int(digits), column_index_from_string(letters.upper())
+
+
+# Value coercion
+
+def check(value):
+    """Raise ErrorValue for error values, return anything else unchanged"""
+    if isinstance(value, FormulaError):
+        raise ErrorValue(value)
+    return value
+
+
+def to_number(value):
+    value = check(value)
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        number = float(value)
+    except ValueError:
+        number = math.nan
+    if not math.isfinite(number):
+        raise ErrorValue(ERRORS['#VALUE!'])
+    return number
+
+
+def to_text(value):
+    value = check(value)
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else f'{value:.15g}'
+    return str(value)
+
+
+def to_bool(value):
+    value = check(value)
+    if value is None:
+        return False
+    if isinstance(value, (bool, int, float)):
+        return bool(value)
+    if value.upper() in ('TRUE', 'FALSE'):
+        return value.upper() == 'TRUE'
+    raise ErrorValue(ERRORS['#VALUE!'])
+
+
+def type_rank(value):
+    """Excel sort order of value types: numbers, then text, then logicals"""
+    if isinstance(value, bool):
+        return 2
+    if isinstance(value, str):
+        return 1
+    return 0
+
+
+def compare(a, b):
+    """Compare two values the way Excel comparison operators do (-1, 0, 1)"""
+    if a is None:
+        a = '' if isinstance(b, str) else False if isinstance(b, bool) else 0
+    if b is None:
+        b = '' if isinstance(a, str) else False if isinstance(a, bool) else 0
+    rank_a, rank_b = type_rank(a), type_rank(b)
+    if rank_a != rank_b:
+        return -1 if rank_a < rank_b else 1
+    if rank_a == 1:
+        a, b = a.casefold(), b.casefold()
+    return (a > b) - (a < b)
+
+
+def finite(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ErrorValue(ERRORS['#NUM!'])
+    return value
+
+
+def power(base, exponent):
+    if base == 0 and exponent <= 0:
+        raise ErrorValue(ERRORS['#DIV/0!'] if exponent < 0 else ERRORS['#NUM!'])
+    try:
+        result = base ** exponent
+    except OverflowError:
+        raise ErrorValue(ERRORS['#NUM!'])
+    if isinstance(result, complex):
+        raise ErrorValue(ERRORS['#NUM!'])
+    return finite(result)
+
+
+def divide(a, b):
+    if b == 0:
+        raise ErrorValue(ERRORS['#DIV/0!'])
+    return finite(a / b)
+
+
+ARITHMETIC = {
+    '+': lambda a, b: finite(a + b),
+    '-': lambda a, b: finite(a - b),
+    '*': lambda a, b: finite(a * b),
+    '/': divide,
+    '^': power,
+}
+
+COMPARISONS = {
+    '=': lambda c: c == 0,
+    '<>': lambda c: c != 0,
+    '<': lambda c: c < 0,
+    '>': lambda c: c > 0,
+    '<=': lambda c: c <= 0,
+    '>=': lambda c: c >= 0,
+}
+
+
+# Functions
+#
+# Arguments arrive evaluated: references as Range objects (a single cell is a
+# 1x1 Range), everything else as a scalar. Range contents skip text, logicals
+# and blanks where Excel does, while literal arguments are coerced.
+
+def scalar(arg):
+    """Value of a scalar argument or a single-cell Range"""
+    if isinstance(arg, Range):
+        if arg.height == 1 and arg.width == 1:
+            return arg.cell(0, 0)
+        raise UnsupportedFormula('range used as a single value')
+    return arg
+
+
+def numbers(args):
+    """Numbers from the arguments of an aggregate function like SUM"""
+    for arg in args:
+        if isinstance(arg, Range):
+            for value in arg.values():
+                check(value)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    yield value
+        elif arg is not None:
+            yield to_number(arg)
+
+
+def fn_sum(*args):
+    return finite(math.fsum(numbers(args)))
+
+
+def fn_average(*args):
+    values = list(numbers(args))
+    if not values:
+        raise ErrorValue(ERRORS['#DIV/0!'])
+    return finite(math.fsum(values) / len(values))
+
+
+def fn_min(*args):
+    return min(numbers(args), default=0)
+
+
+def fn_max(*args):
+    return max(numbers(args), default=0)
+
+
+def fn_count(*args):
+    count = 0
+    for arg in args:
+        if isinstance(arg, Range):
+            count += sum(
+                isinstance(v, (int, float)) and not isinstance(v, bool) for v in arg.values()
+            )
+        else:
+            try:
+                to_number(arg)
+                count += arg is not None
+            except ErrorValue:
+                pass
+    return count
+
+
+def fn_counta(*args):
+    count = 0
+    for arg in args:
+        if isinstance(arg, Range):
+            count += sum(v is not None for v in arg.values())
+        else:
+            count += arg is not None
+    return count
+
+
+def logicals(args):
+    for arg in args:
+        if isinstance(arg, Range):
+            for value in arg.values():
+                check(value)
+                if isinstance(value, (bool, int, float)):
+                    yield bool(value)
+        elif arg is not None:
+            yield to_bool(arg)
+
+
+def fn_and(*args):
+    values = list(logicals(args))
+    if not values:
+        raise ErrorValue(ERRORS['#VALUE!'])
+    return all(values)
+
+
+def fn_or(*args):
+    values = list(logicals(args))
+    if not values:
+        raise ErrorValue(ERRORS['#VALUE!'])
+    return any(values)
+
+
+def fn_not(value):
+    return not to_bool(scalar(value))
+
+
+def fn_abs(value):
+    return abs(to_number(scalar(value)))
+
+
+def fn_round(value, digits=0):
+    value = to_number(scalar(value))
+    digits = int(to_number(scalar(digits)))
+    # Half away from zero, on the shortest decimal form of the number
+    quantum = Decimal(1).scaleb(-digits)
+    return float(Decimal(repr(float(value))).quantize(quantum, rounding=ROUND_HALF_UP))
+
+
+def lookup_key(value):
+    value = check(scalar(value))
+    if isinstance(value, str) and any(ch in value for ch in '*?~'):
+        raise UnsupportedFormula('wildcard lookup')
+    return value
+
+
+def match_key(value):
+    """Key under which exact lookups consider two values equal"""
+    if isinstance(value, str):
+        return (1, value.casefold())
+    if isinstance(value, FormulaError):
+        return (3, value.code)
+    return (type_rank(value), value)
+
+
+def approximate_position(values, key, descending=False):
+    """Index of the last value <= key in ascending data (>= key if descending)"""
+    end = len(values)
+    while end and values[end - 1] is None:
+        end -= 1
+    lo, hi = 0, end
+    while lo < hi:
+        mid = (lo + hi) // 2
+        c = compare(values[mid], key)
+        if (c >= 0) if descending else (c <= 0):
+            lo = mid + 1
+        else:
+            hi = mid
+    position = lo - 1
+    if position < 0 or type_rank(values[position]) != type_rank(key):
+        return None
+    return position
+
+
+def fn_vlookup(key, table, col_index, range_lookup=True):
+    key = lookup_key(key)
+    if not isinstance(table, Range):
+        raise ErrorValue(ERRORS['#N/A'])
+    col = int(to_number(scalar(col_index)))
+    if col < 1:
+        raise ErrorValue(ERRORS['#VALUE!'])
+    if col > table.width:
+        raise ErrorValue(ERRORS['#REF!'])
+
+    first_column = table.columns[0]
+    if to_bool(scalar(range_lookup)):
+        row = approximate_position(first_column, key)
+    else:
+        row = table.exact_position(key)
+    if row is None:
+        raise ErrorValue(ERRORS['#N/A'])
+    return table.cell(row, col - 1)
+
+
+def fn_index(array, row_num, col_num=None):
+    if not isinstance(array, Range):
+        array = Range([[array]], 1)
+    row = int(to_number(scalar(row_num)))
+    col = None if col_num is None else int(to_number(scalar(col_num)))
+    if col is None:
+        if array.width == 1:
+            col = 1
+        elif array.height == 1:
+            row, col = 1, row
+        else:
+            raise UnsupportedFormula('INDEX returning a row')
+    if row == 0 or col == 0:
+        raise UnsupportedFormula('INDEX returning a row or column')
+    if row < 0 or col < 0:
+        raise ErrorValue(ERRORS['#VALUE!'])
+    if row > array.height or col > array.width:
+        raise ErrorValue(ERRORS['#REF!'])
+    return array.cell(row - 1, col - 1)
+
+
+def fn_match(key, array, match_type=1):
+    key = lookup_key(key)
+    values = array.vector() if isinstance(array, Range) else [array]
+    if values is None:
+        raise ErrorValue(ERRORS['#N/A'])
+    match_type = to_number(scalar(match_type))
+    if match_type == 0:
+        if isinstance(array, Range):
+            position = array.exact_position(key, by_row=array.width > 1)
+        else:
+            position = 0 if match_key(values[0]) == match_key(key) else None
+    else:
+        position = approximate_position(values, key, descending=match_type < 0)
+    if position is None:
+        raise ErrorValue(ERRORS['#N/A'])
+    return position + 1
+
+
+FUNCTIONS = {
+    'SUM': fn_sum,
+    'AVERAGE': fn_average,
+    'MIN': fn_min,
+    'MAX': fn_max,
+    'COUNT': fn_count,
+    'COUNTA': fn_counta,
+    'AND': fn_and,
+    'OR': fn_or,
+    'NOT': fn_not,
+    'ABS': fn_abs,
+    'ROUND': fn_round,
+    'VLOOKUP': fn_vlookup,
+    'INDEX': fn_index,
+    'MATCH': fn_match,
+}
+
+# Functions whose arguments are only evaluated when needed
+LAZY_FUNCTIONS = {'IF', 'IFERROR'}
+
+
+def cell_value(cell, shared_strings):
+    """Value of a <c> element without a formula, or None for empty cells"""
+    data_type = cell.get('t', 'n')
+    text = cell_text(cell)
+    if text is None or (not text and data_type != 'inlineStr'):
+        return None
+    if data_type == 'n':
+        return float(text)
+    if data_type == 's':
+        return shared_strings[int(text)]
+    if data_type == 'b':
+        return text == '1'
+    if data_type == 'e':
+        return ERRORS.get(text) or FormulaError(text)
+    if data_type == 'd':
+        return to_excel(from_ISO8601(text))
+    return text
+
+
+def formula_source(formula, coordinate, shared_formulas):
+    """Formula text of an <f> element, without the leading =
+
+    Cells sharing a formula get it translated from the first cell that defines
+    it. Returns None for array and data table formulas.
+    """
+    formula_type = formula.get('t')
+    if formula_type in ('array', 'dataTable'):
+        return None
+    text = formula.text or ''
+    if formula_type == 'shared':
+        index = formula.get('si')
+        if index in shared_formulas:
+            return shared_formulas[index].translate_formula(coordinate)[1:]
+        if text:
+            shared_formulas[index] = Translator('=' + text, coordinate)
+    return text
+
+
+class FormulaEngine:
+    """Formula cells of a workbook, evaluated in dependency order"""
+
+    def __init__(self):
+        self.sheet_names = []  # Worksheet names in workbook order
+        self.columns = {}  # Sheet name -> {column: [values by row - 1]}
+        self.sources = {}  # (sheet, row, col) -> formula text
+        self.formulas = {}  # (sheet, row, col) -> parsed formula, parsed on demand
+        self.references = {}  # (sheet, row, col) -> [(sheet, r1, c1, r2, c2)]
+        self.ranges = {}  # (sheet, r1, c1, r2, c2) -> Range, while evaluating
+
+    @property
+    def formula_count(self):
+        return len(self.sources)
+
+    @property
+    def sheet_lookup(self):
+        """Lowercase sheet name -> sheet name, for resolving references"""
+        return {name.lower(): name for name in self.sheet_names}
+
+    @classmethod
+    def load(cls, filename):
+        """Read a workbook and parse its formulas
+
+        Raises:
+            UnsupportedFormula: If any cell holds something the engine cannot evaluate
+        """
+        engine = cls()
+        sources = []
+        with zipfile.ZipFile(filename) as zf:
+            sheets, strings_path = worksheet_parts(zf)
+            shared_strings = list(iter_shared_strings(zf, strings_path)) if strings_path else []
+            for sheet, path in sheets:
+                engine.sheet_names.append(sheet)
+                engine.columns[sheet] = {}
+                shared_formulas = {}  # Shared formula index -> Translator from its first cell
+                for row, row_cells in iter_rows(zf, path):
+                    for col, cell in row_cells:
+                        key = (sheet, row, col)
+                        formula = cell.find(FORMULA_TAG)
+                        if formula is not None:
+                            coordinate = f'{get_column_letter(col)}{row}'
+                            source = formula_source(formula, coordinate, shared_formulas)
+                            if source is None:
+                                raise UnsupportedFormula(f'{sheet}!{coordinate}: array formula')
+                            sources.append((key, source))
+                            value = None
+                        else:
+                            value = cell_value(cell, shared_strings)
+                            if value is None:
+                                continue
+                        engine.set_value(key, value)
+
+        sheet_names = engine.sheet_lookup
+        for key, source in sources:
+            engine.set_formula(key, source, sheet_names)
+        return engine
+
+    @classmethod
+    def load_state(cls, path):
+        """Read a state file written by save_state
+
+        Returns:
+            Tuple of (engine, workbook hash), or (None, None) if the file is
+            missing or was written by another version
+        """
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None, None
+        if not isinstance(state, dict) or state.get('version') != STATE_VERSION:
+            return None, None
+
+        engine = cls()
+        engine.sheet_names = state['sheets']
+        for sheet, columns in zip(engine.sheet_names, state['columns']):
+            engine.columns[sheet] = {int(col): values for col, values in columns.items()}
+        for index, row, col, code in state['errors']:
+            engine.set_value((engine.sheet_names[index], row, col), ERRORS.get(code) or FormulaError(code))
+        for index, row, col, source, references in state['formulas']:
+            key = (engine.sheet_names[index], row, col)
+            engine.sources[key] = source
+            engine.references[key] = [
+                (engine.sheet_names[ref[0]], *ref[1:]) for ref in references
+            ]
+        return engine, state['workbook_hash']
+
+    def save_state(self, path, workbook_hash):
+        """Write cell values and formula references to a JSON state file
+
+        Parsed formulas are not saved; load_state leaves them to be parsed
+        again when they are next evaluated.
+        """
+        index = {sheet: i for i, sheet in enumerate(self.sheet_names)}
+        columns = []
+        errors = []  # Error values are kept out of the columns, which stay plain JSON
+        for i, sheet in enumerate(self.sheet_names):
+            sheet_columns = {}
+            for col, values in self.columns[sheet].items():
+                if any(isinstance(value, FormulaError) for value in values):
+                    errors.extend(
+                        [i, row, col, value.code]
+                        for row, value in enumerate(values, 1) if isinstance(value, FormulaError)
+                    )
+                    values = [None if isinstance(value, FormulaError) else value for value in values]
+                sheet_columns[col] = values
+            columns.append(sheet_columns)
+        state = {
+            'version': STATE_VERSION,
+            'workbook_hash': workbook_hash,
+            'sheets': self.sheet_names,
+            'columns': columns,
+            'errors': errors,
+            'formulas': [
+                [index[sheet], row, col, source,
+                 [[index[ref[0]], *ref[1:]] for ref in self.references[sheet, row, col]]]
+                for (sheet, row, col), source in self.sources.items()
+            ],
+        }
+        # Write next to the target and rename, so an interrupted run never
+        # leaves a truncated state behind
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(state, f, separators=(',', ':'))
+        os.replace(temp_path, path)
+
+    def cell_keys(self, spec):
+        """Expand references like "Inputs!B2,Inputs!C2:C10" into cell keys
+
+        References without a sheet name are on the first sheet.
+
+        Raises:
+            ValueError: If an item is not a cell or range reference
+        """
+        keys = []
+        for item in spec.split(','):
+            item = item.strip()
+            if not item:
+                continue
+            try:
+                parser = Parser(item, self.sheet_names[0], self.sheet_lookup)
+                node = parser.parse()
+            except UnsupportedFormula:
+                node = None
+            if node is None or node[0] not in ('cell', 'range'):
+                raise ValueError(f'Not a cell reference: {item}')
+            sheet, r1, c1, r2, c2 = parser.references[0]
+            if r2 == MAX_ROW:
+                raise ValueError(f'Whole columns are not supported: {item}')
+            keys.extend(
+                (sheet, row, col) for row in range(r1, r2 + 1) for col in range(c1, c2 + 1)
+            )
+        return keys
+
+    def reload_cells(self, filename, keys):
+        """Re-read the given cells from a workbook with the same sheets
+
+        Each worksheet is only streamed up to the last row that is needed.
+        Cells are given no value until they are evaluated again.
+
+        Raises:
+            UnsupportedFormula: If the sheets changed or a cell holds something
+                the engine cannot evaluate
+        """
+        wanted = {}  # Sheet name -> {(row, col)}
+        for sheet, row, col in keys:
+            wanted.setdefault(sheet, set()).add((row, col))
+
+        with zipfile.ZipFile(filename) as zf:
+            sheets, strings_path = worksheet_parts(zf)
+            if [sheet for sheet, _ in sheets] != self.sheet_names:
+                raise UnsupportedFormula('worksheets added, removed or renamed')
+            shared_strings = None
+
+            for sheet, path in sheets:
+                if sheet not in wanted:
+                    continue
+                remaining = wanted[sheet]
+                last_row = max(row for row, _ in remaining)
+                found = {}  # (row, col) -> ('value' | 'formula', value or source)
+                shared_formulas = {}
+                for row, row_cells in iter_rows(zf, path):
+                    if row > last_row:
+                        break
+                    for col, cell in row_cells:
+                        formula = cell.find(FORMULA_TAG)
+                        if formula is not None:
+                            # Translate every formula, to keep shared formulas known
+                            coordinate = f'{get_column_letter(col)}{row}'
+                            source = formula_source(formula, coordinate, shared_formulas)
+                            if (row, col) not in remaining:
+                                continue
+                            if source is None:
+                                raise UnsupportedFormula(f'{sheet}!{coordinate}: array formula')
+                            found[row, col] = ('formula', source)
+                        elif (row, col) in remaining:
+                            if shared_strings is None:
+                                shared_strings = (
+                                    list(iter_shared_strings(zf, strings_path))
+                                    if strings_path else []
+                                )
+                            found[row, col] = ('value', cell_value(cell, shared_strings))
+
+                for row, col in remaining:
+                    key = (sheet, row, col)
+                    kind, content = found.get((row, col), ('value', None))
+                    self.sources.pop(key, None)
+                    self.formulas.pop(key, None)
+                    self.references.pop(key, None)
+                    if kind == 'formula':
+                        self.set_formula(key, content, self.sheet_lookup)
+                        self.set_value(key, None)
+                    else:
+                        self.set_value(key, content)
+
+    def dependents(self, keys):
+        """Formula cells that depend on any of the given cells, directly or not"""
+        # Single cell references by cell, and ranges as row intervals per column
+        cell_refs = {}  # (sheet, row, col) -> [formula keys]
+        range_refs = {}  # (sheet, col) -> [(r1, r2, formula key)]
+        for key, references in self.references.items():
+            for sheet, r1, c1, r2, c2 in references:
+                if r1 == r2 and c1 == c2:
+                    cell_refs.setdefault((sheet, r1, c1), []).append(key)
+                    continue
+                for col in range(c1, c2 + 1):
+                    range_refs.setdefault((sheet, col), []).append((r1, r2, key))
+
+        affected = set()
+        pending = list(keys)
+        while pending:
+            sheet, row, col = pending.pop()
+            found = list(cell_refs.get((sheet, row, col), ()))
+            found.extend(
+                key for r1, r2, key in range_refs.get((sheet, col), ()) if r1 <= row <= r2
+            )
+            for key in found:
+                if key not in affected:
+                    affected.add(key)
+                    pending.append(key)
+        return affected
+
+    def set_value(self, key, value):
+        sheet, row, col = key
+        column = self.columns[sheet].setdefault(col, [])
+        if len(column) < row:
+            column.extend([None] * (row - len(column)))
+        column[row - 1] = value
+
+    def set_formula(self, key, source, sheet_names):
+        self.sources[key] = source
+        parser = Parser(source, key[0], sheet_names)
+        try:
+            self.formulas[key] = parser.parse()
+        except UnsupportedFormula as e:
+            sheet, row, col = key
+            raise UnsupportedFormula(f'{sheet}!{get_column_letter(col)}{row}: {e}')
+        self.references[key] = parser.references
+
+    def dependency_order(self, keys=None):
+        """Formula cells ordered so that every cell follows its precedents
+
+        Args:
+            keys: Formula cells to order, by default all of them. Precedents
+                outside of keys are taken as already evaluated.
+
+        Raises:
+            UnsupportedFormula: If formulas reference each other in a cycle
+        """
+        if keys is None:
+            keys = self.sources
+        # Rows holding formulas, per (sheet, column), to find formulas in ranges
+        formula_rows = {}
+        for sheet, row, col in keys:
+            formula_rows.setdefault((sheet, col), []).append(row)
+        for rows in formula_rows.values():
+            rows.sort()
+
+        dependents = {key: [] for key in keys}
+        pending = dict.fromkeys(keys, 0)
+        for key in keys:
+            references = self.references[key]
+            precedents = set()
+            for sheet, r1, c1, r2, c2 in references:
+                for col in range(c1, c2 + 1):
+                    rows = formula_rows.get((sheet, col))
+                    if rows:
+                        for row in rows[bisect_left(rows, r1):bisect_right(rows, r2)]:
+                            precedents.add((sheet, row, col))
+            for precedent in precedents:
+                dependents[precedent].append(key)
+            pending[key] = len(precedents)
+
+        # Kahn's algorithm
+        ready = deque(key for key, count in pending.items() if count == 0)
+        order = []
+        while ready:
+            key = ready.popleft()
+            order.append(key)
+            for dependent in dependents[key]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    ready.append(dependent)
+
+        if len(order) != len(pending):
+            raise UnsupportedFormula('circular reference')
+        return order
+
+    def evaluate(self, keys=None):
+        """Evaluate formulas, storing the results as cell values
+
+        Args:
+            keys: Formula cells to evaluate, by default all of them
+        """
+        order = self.dependency_order(keys)
+        # A range is only read once all formulas inside it are evaluated, so its
+        # values (and lookup index) can be shared by every formula using it
+        self.ranges = {}
+        try:
+            for key in order:
+                self.evaluate_cell(key)
+        finally:
+            self.ranges = {}
+
+    def evaluate_cell(self, key):
+        if key not in self.formulas:
+            self.set_formula(key, self.sources[key], self.sheet_lookup)
+        try:
+            value = self.eval(self.formulas[key], key[0])
+        except ErrorValue as e:
+            value = e.error
+        if isinstance(value, Range):
+            if value.height != 1 or value.width != 1:
+                raise UnsupportedFormula('formula returning a range')
+            value = value.cell(0, 0)
+        self.set_value(key, 0 if value is None else value)
+
+    def get_value(self, sheet, row, col):
+        column = self.columns[sheet].get(col)
+        if column is None or row > len(column):
+            return None
+        return column[row - 1]
+
+    def get_range(self, sheet, r1, c1, r2, c2):
+        ref = (sheet, r1, c1, r2, c2)
+        if ref not in self.ranges:
+            self.ranges[ref] = self.read_range(*ref)
+        return self.ranges[ref]
+
+    def read_range(self, sheet, r1, c1, r2, c2):
+        sheet_columns = self.columns[sheet]
+        if r2 == MAX_ROW:
+            # Whole columns stop at the last used row of the sheet
+            r2 = max(r1, max((len(c) for c in sheet_columns.values()), default=r1))
+        height = r2 - r1 + 1
+        columns = []
+        for col in range(c1, c2 + 1):
+            values = sheet_columns.get(col, [])[r1 - 1:r2]
+            if len(values) < height:
+                values = values + [None] * (height - len(values))
+            columns.append(values)
+        return Range(columns, height)
+
+    def eval(self, node, sheet):
+        """Evaluate a parsed formula, raising ErrorValue for error results"""
+        kind = node[0]
+        if kind in ('num', 'str', 'bool'):
+            return node[1]
+        if kind == 'cell':
+            return check(self.get_value(*node[1:]))
+        if kind == 'range':
+            raise UnsupportedFormula('range used as a single value')
+        if kind == 'err':
+            raise ErrorValue(node[1])
+        if kind == 'blank':
+            return None
+        if kind == 'neg':
+            return -to_number(self.eval(node[1], sheet))
+        if kind == 'pct':
+            return to_number(self.eval(node[1], sheet)) / 100
+        if kind == 'op':
+            _, op, left, right = node
+            a = self.eval(left, sheet)
+            b = self.eval(right, sheet)
+            if op in ARITHMETIC:
+                return ARITHMETIC[op](to_number(a), to_number(b))
+            if op == '&':
+                return to_text(a) + to_text(b)
+            return COMPARISONS[op](compare(a, b))
+        return check(scalar(self.call(node[1], node[2], sheet)))
+
+    def argument(self, node, sheet):
+        """Evaluate a function argument, keeping references as ranges"""
+        if node[0] == 'cell':
+            return Range([[self.get_value(*node[1:])]], 1)
+        if node[0] == 'range':
+            return self.get_range(*node[1:])
+        return self.eval(node, sheet)
+
+    def call(self, name, args, sheet):
+        if name == 'IF':
+            if not 1 <= len(args) <= 3:
+                raise ErrorValue(ERRORS['#VALUE!'])
+            condition = to_bool(scalar(self.argument(args[0], sheet)))
+            if condition:
+                return self.argument(args[1], sheet) if len(args) > 1 else True
+            return self.argument(args[2], sheet) if len(args) > 2 else False
+        if name == 'IFERROR':
+            if len(args) != 2:
+                raise ErrorValue(ERRORS['#VALUE!'])
+            try:
+                return check(scalar(self.argument(args[0], sheet)))
+            except ErrorValue:
+                return self.argument(args[1], sheet)
+
+        values = [self.argument(arg, sheet) for arg in args]
+        try:
+            return FUNCTIONS[name](*values)
+        except TypeError:
+            # Wrong number of arguments
+            raise ErrorValue(ERRORS['#VALUE!'])
+
+    def iter_values(self):
+        """Yield (sheet name, coordinate, value) for non-empty cells, sheet by sheet"""
+        for sheet in self.sheet_names:
+            cells = sorted(
+                (row, col)
+                for col, values in self.columns[sheet].items()
+                for row, value in enumerate(values, 1) if value is not None
+            )
+            for row, col in cells:
+                yield sheet, f'{get_column_letter(col)}{row}', self.get_value(sheet, row, col)
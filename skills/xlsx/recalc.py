@@ -2,15 +2,54 @@
 """
 Excel Formula Recalculation Script
 Recalculates all formulas in an Excel file using LibreOffice
+
+With --engine python, formulas are instead evaluated in-process (see
+formula_engine.py) to check them for errors, falling back to LibreOffice for
+anything the engine does not support. This mode does not write values back.
+
+With --changed, only the formulas depending on the listed cells are evaluated
+again, using the engine state saved next to the workbook by the previous run,
+and only errors that were not there before are reported.
+
+With --batch, many workbooks are recalculated by parallel LibreOffice processes,
+each using its own user profile, and results are printed as JSON lines.
 """
 
+import argparse
+import hashlib
 import json
-import sys
+import queue
+import shutil
+import signal
 import subprocess
 import os
 import platform
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
+from formula_engine import FormulaEngine, FormulaError, UnsupportedFormula
+from workbook_parts import FORMULA_TAG, cell_text, iter_rows, iter_shared_strings, worksheet_parts
+
+
+EXCEL_ERRORS = ['#VALUE!', '#DIV/0!', '#REF!', '#NAME?', '#NULL!', '#NUM!', '#N/A']
+
+MACRO_CONTENT = '''<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE script:module PUBLIC "-//OpenOffice.org//DTD OfficeDocument 1.0//EN" "module.dtd">
+<script:module xmlns:script="http://openoffice.org/2000/script" script:name="Module1" script:language="StarBasic">
+    Sub RecalculateAndSave()
+      ThisComponent.calculateAll()
+      ThisComponent.store()
+      ThisComponent.close(True)
+    End Sub
+</script:module>'''
+
+RECALC_MACRO_URL = 'vnd.sun.star.script:Standard.Module1.RecalculateAndSave?language=Basic&location=application'
+
+BATCH_WORKERS = min(4, os.cpu_count() or 1)
+# Seconds LibreOffice may take to create a fresh user profile
+PROFILE_SEED_TIMEOUT = 60
 
 
 def setup_libreoffice_macro():
@@ -32,31 +71,25 @@ def setup_libreoffice_macro():
                       capture_output=True, timeout=10)
         os.makedirs(macro_dir, exist_ok=True)
     
-    macro_content = '''<?xml version="1.0" encoding="UTF-8"?>
-<!DOCTYPE script:module PUBLIC "-//OpenOffice.org//DTD OfficeDocument 1.0//EN" "module.dtd">
-<script:module xmlns:script="http://openoffice.org/2000/script" script:name="Module1" script:language="StarBasic">
-    Sub RecalculateAndSave()
-      ThisComponent.calculateAll()
-      ThisComponent.store()
-      ThisComponent.close(True)
-    End Sub
-</script:module>'''
-    
     try:
         with open(macro_file, 'w') as f:
-            f.write(macro_content)
+            f.write(MACRO_CONTENT)
         return True
     except Exception:
         return False
 
 
-def recalc(filename, timeout=30):
+def recalc(filename, timeout=30, engine='libreoffice', changed=None):
     """
     Recalculate formulas in Excel file and report any errors
     
     Args:
         filename: Path to Excel file
         timeout: Maximum time to wait for recalculation (seconds)
+        engine: 'libreoffice', or 'python' to evaluate formulas in-process
+        changed: Cells changed since the last run, like "Inputs!B2,Inputs!C2:C10",
+            to evaluate only their dependents and report only new errors.
+            Implies the python engine.
     
     Returns:
         dict with error locations and counts
@@ -64,16 +97,150 @@ def recalc(filename, timeout=30):
     if not Path(filename).exists():
         return {'error': f'File {filename} does not exist'}
     
-    abs_path = str(Path(filename).absolute())
+    fallback = None
+    if changed is not None:
+        try:
+            return evaluate_changes(filename, changed)
+        except ValueError as e:
+            return {'error': str(e)}
+        except UnsupportedFormula as e:
+            fallback = str(e)
+    elif engine == 'python':
+        try:
+            return evaluate_workbook(filename)
+        except UnsupportedFormula as e:
+            fallback = str(e)
+    
+    result = recalc_libreoffice(filename, timeout)
+    if fallback is not None and 'error' not in result:
+        result['engine'] = 'libreoffice'
+        result['fallback_reason'] = fallback
+    return result
+
+
+def evaluate_workbook(filename, save_state=False):
+    """
+    Evaluate formulas in-process and report any errors, without saving values
+    
+    Args:
+        filename: Path to Excel file
+        save_state: Also save the engine state for later runs with --changed
+    
+    Raises:
+        UnsupportedFormula: If the workbook needs a LibreOffice recalculation
+    """
+    engine = FormulaEngine.load(filename)
+    engine.evaluate()
+    if save_state:
+        engine.save_state(state_path(filename), file_hash(filename))
+    
+    tally = ErrorTally()
+    for sheet_name, coordinate, value in engine.iter_values():
+        err = value_error(value)
+        if err:
+            tally.add(err, f"{sheet_name}!{coordinate}")
+    
+    result = tally.summary(engine.formula_count)
+    result['engine'] = 'python'
+    return result
+
+
+def evaluate_changes(filename, changed):
+    """
+    Evaluate the dependents of changed cells in-process and report new errors
+    
+    The engine state saved by the previous run holds every cell value and formula
+    reference, so only the changed cells are read from the workbook. Without a
+    usable state, the whole workbook is evaluated and its state saved.
     
+    Args:
+        filename: Path to Excel file
+        changed: Every cell changed since the last run, like "Inputs!B2,C2:C10"
+    
+    Raises:
+        ValueError: If changed is not a list of cell references
+        UnsupportedFormula: If the workbook needs a LibreOffice recalculation
+    """
+    path = state_path(filename)
+    workbook_hash = file_hash(filename)
+    engine, saved_hash = FormulaEngine.load_state(path)
+    if engine is None:
+        result = evaluate_workbook_saving_state(filename)
+        result['incremental'] = False
+        return result
+    
+    keys = engine.cell_keys(changed)
+    affected = set()
+    tally = ErrorTally()
+    if saved_hash != workbook_hash:
+        try:
+            engine.reload_cells(filename, keys)
+            affected = engine.dependents(keys)
+            affected.update(key for key in keys if key in engine.sources)
+            before = {key: value_error(engine.get_value(*key)) for key in affected}
+            engine.evaluate(affected)
+        except UnsupportedFormula:
+            result = evaluate_workbook_saving_state(filename)
+            result['incremental'] = False
+            return result
+        engine.save_state(path, workbook_hash)
+        
+        # Errors of the recalculated cells, and of changed input cells
+        sheet_order = {sheet: i for i, sheet in enumerate(engine.sheet_names)}
+        checked = sorted(affected.union(keys), key=lambda key: (sheet_order[key[0]], *key[1:]))
+        for sheet_name, row, col in checked:
+            err = value_error(engine.get_value(sheet_name, row, col))
+            if err and err != before.get((sheet_name, row, col)):
+                tally.add(err, f"{sheet_name}!{get_column_letter(col)}{row}")
+    
+    result = tally.summary(engine.formula_count)
+    result['engine'] = 'python'
+    result['incremental'] = True
+    result['recalculated_formulas'] = len(affected)
+    return result
+
+
+def evaluate_workbook_saving_state(filename):
+    """Evaluate the whole workbook, dropping the saved state if that fails"""
+    try:
+        return evaluate_workbook(filename, save_state=True)
+    except UnsupportedFormula:
+        # The saved state no longer matches the workbook
+        state_path(filename).unlink(missing_ok=True)
+        raise
+
+
+def state_path(filename):
+    """Engine state file for a workbook, kept next to it"""
+    path = Path(filename)
+    return path.with_name(f'.{path.name}.recalc.json')
+
+
+def file_hash(filename):
+    """SHA-256 of a file, identifying the workbook version a state belongs to"""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def value_error(value):
+    """Excel error of an evaluated cell value, or None"""
+    if isinstance(value, FormulaError):
+        value = value.code
+    if isinstance(value, str):
+        return find_error(value)
+    return None
+
+
+def recalc_libreoffice(filename, timeout):
+    """Recalculate and save formulas with LibreOffice, then scan for errors"""
+    abs_path = str(Path(filename).absolute())
     if not setup_libreoffice_macro():
         return {'error': 'Failed to setup LibreOffice macro'}
     
-    cmd = [
-        'soffice', '--headless', '--norestore',
-        'vnd.sun.star.script:Standard.Module1.RecalculateAndSave?language=Basic&location=application',
-        abs_path
-    ]
+    cmd = ['soffice', '--headless', '--norestore', RECALC_MACRO_URL, abs_path]
     
     # Handle timeout command differences between Linux and macOS
     if platform.system() != 'Windows':
@@ -100,77 +267,345 @@ def recalc(filename, timeout=30):
     
     # Check for Excel errors in the recalculated file - scan ALL cells
     try:
-        wb = load_workbook(filename, data_only=True)
-        
-        excel_errors = ['#VALUE!', '#DIV/0!', '#REF!', '#NAME?', '#NULL!', '#NUM!', '#N/A']
-        error_details = {err: [] for err in excel_errors}
-        total_errors = 0
-        
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            # Check ALL rows and columns - no limits
-            for row in ws.iter_rows():
-                for cell in row:
-                    if cell.value is not None and isinstance(cell.value, str):
-                        for err in excel_errors:
-                            if err in cell.value:
-                                location = f"{sheet_name}!{cell.coordinate}"
-                                error_details[err].append(location)
-                                total_errors += 1
-                                break
-        
-        wb.close()
-        
-        # Build result summary
+        return scan_workbook(filename)
+    except Exception as e:
+        return {'error': str(e)}
+
+
+class ProfilePool:
+    """
+    LibreOffice user profiles for parallel recalculation
+    
+    Every profile is a copy of one template profile with the recalculation macro
+    installed, so LibreOffice only initializes a profile once. Concurrent runs
+    each take their own profile, and never share its lock or macro library.
+    """
+    
+    def __init__(self, size):
+        self.root = Path(tempfile.mkdtemp(prefix='recalc-profiles-'))
+        self.template = self.root / 'template'
+        self.free = queue.Queue()
+        try:
+            seed_profile(self.template)
+            for i in range(size):
+                profile = self.root / f'worker{i}'
+                shutil.copytree(self.template, profile)
+                self.free.put(profile)
+        except BaseException:
+            self.close()
+            raise
+    
+    def acquire(self):
+        return self.free.get()
+    
+    def release(self, profile):
+        self.free.put(profile)
+    
+    def reset(self, profile):
+        """Replace a profile a crashed LibreOffice may have left locked or broken"""
+        shutil.rmtree(profile, ignore_errors=True)
+        shutil.copytree(self.template, profile)
+    
+    def close(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def profile_args(profile):
+    return [f'-env:UserInstallation={Path(profile).absolute().as_uri()}']
+
+
+def seed_profile(profile):
+    """Create a LibreOffice user profile with the recalculation macro"""
+    subprocess.run(['soffice'] + profile_args(profile) + ['--headless', '--terminate_after_init'],
+                   capture_output=True, timeout=PROFILE_SEED_TIMEOUT)
+    macro_dir = Path(profile) / 'user' / 'basic' / 'Standard'
+    macro_dir.mkdir(parents=True, exist_ok=True)
+    (macro_dir / 'Module1.xba').write_text(MACRO_CONTENT)
+
+
+def run_soffice(filename, profile, timeout):
+    """
+    Run the recalculation macro on a file with the given profile
+    
+    Returns:
+        Tuple of (status, stderr), status being 'done', 'timeout' or 'crashed'
+    """
+    cmd = ['soffice'] + profile_args(profile) + [
+        '--headless', '--norestore', RECALC_MACRO_URL, str(Path(filename).absolute())
+    ]
+    # A session of its own lets a timeout kill soffice.bin along with the launcher
+    posix = platform.system() != 'Windows'
+    process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                               text=True, start_new_session=posix)
+    try:
+        _, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        if posix:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        else:
+            process.kill()
+        process.communicate()
+        return 'timeout', ''
+    return ('done' if process.returncode == 0 else 'crashed'), stderr
+
+
+def recalc_with_profile(filename, pool, timeout, retries):
+    """Recalculate one file with a profile from the pool, retrying after crashes"""
+    before = os.stat(filename)
+    profile = pool.acquire()
+    try:
+        for attempt in range(1, max(retries, 0) + 2):
+            status, stderr = run_soffice(filename, profile, timeout)
+            if status != 'done':
+                pool.reset(profile)
+            if status != 'crashed':
+                break
+    finally:
+        pool.release(profile)
+    
+    if status == 'crashed':
+        return {'error': stderr.strip() or 'LibreOffice exited with an error', 'attempts': attempt}
+    if status == 'timeout':
+        # LibreOffice sometimes stays open after the macro has saved the file
+        after = os.stat(filename)
+        if (after.st_mtime_ns, after.st_size) == (before.st_mtime_ns, before.st_size):
+            return {'error': f'Timed out after {timeout} seconds'}
+    
+    try:
+        result = scan_workbook(filename)
+    except Exception as e:
+        return {'error': str(e)}
+    if attempt > 1:
+        result['attempts'] = attempt
+    return result
+
+
+def recalc_batch(filenames, timeout=30, workers=BATCH_WORKERS, engine='libreoffice', retries=1):
+    """
+    Recalculate many Excel files with parallel LibreOffice processes
+    
+    Args:
+        filenames: Paths to Excel files
+        timeout: Maximum time to wait for each file's recalculation (seconds)
+        workers: Number of LibreOffice processes to run at once
+        engine: 'libreoffice', or 'python' to evaluate formulas in-process first
+        retries: Times to retry a file after LibreOffice crashed on it
+    
+    Yields:
+        (filename, result) as each file finishes, result being the dict recalc
+        returns for a single file
+    """
+    pending = []
+    for filename in filenames:
+        if not Path(filename).exists():
+            yield filename, {'error': f'File {filename} does not exist'}
+        elif engine == 'python':
+            try:
+                yield filename, evaluate_workbook(filename)
+            except UnsupportedFormula as e:
+                pending.append((filename, str(e)))
+        else:
+            pending.append((filename, None))
+    if not pending:
+        return
+    
+    workers = max(1, min(workers, len(pending)))
+    try:
+        pool = ProfilePool(workers)
+    except subprocess.TimeoutExpired:
+        error = f'Could not initialise LibreOffice profile: soffice did not finish within {PROFILE_SEED_TIMEOUT} seconds'
+        for filename, _ in pending:
+            yield filename, {'error': error}
+        return
+    with pool, ThreadPoolExecutor(workers) as executor:
+        futures = {
+            executor.submit(recalc_with_profile, filename, pool, timeout, retries): (filename, fallback)
+            for filename, fallback in pending
+        }
+        for future in as_completed(futures):
+            filename, fallback = futures[future]
+            result = future.result()
+            if fallback is not None and 'error' not in result:
+                result['engine'] = 'libreoffice'
+                result['fallback_reason'] = fallback
+            yield filename, result
+
+
+def find_error(value):
+    """Return the first Excel error contained in a cell value, or None"""
+    for err in EXCEL_ERRORS:
+        if err in value:
+            return err
+    return None
+
+
+def scan_shared_strings(zf, path):
+    """Find the shared strings that contain an Excel error
+
+    Returns:
+        dict mapping shared string index to its error
+    """
+    errors = {}
+    for index, text in enumerate(iter_shared_strings(zf, path)):
+        err = find_error(text)
+        if err:
+            errors[index] = err
+    return errors
+
+
+def scan_worksheet(zf, path, sheet_name, shared_errors, on_error):
+    """Stream a worksheet, reporting error cells and counting formulas
+
+    Cell values are checked the way the recalculated file reads back: error
+    values, shared strings, inline strings, and formula string results.
+
+    Args:
+        zf: Open ZipFile of the workbook
+        path: Worksheet part path inside the zip
+        sheet_name: Sheet name used in reported locations
+        shared_errors: Errors of the shared strings, from scan_shared_strings
+        on_error: Called with (error, location) for every error cell
+
+    Returns:
+        Number of formulas in the worksheet
+    """
+    formula_count = 0
+    for row, cells in iter_rows(zf, path):
+        for col, cell in cells:
+            if cell.find(FORMULA_TAG) is not None:
+                formula_count += 1
+
+            data_type = cell.get('t', 'n')
+            if data_type not in ('s', 'e', 'str', 'inlineStr'):
+                continue
+            value = cell_text(cell)
+            if not value:
+                continue
+
+            if data_type == 's':
+                err = shared_errors.get(int(value))
+            else:
+                err = find_error(value)
+            if err:
+                on_error(err, f"{sheet_name}!{get_column_letter(col)}{row}")
+    return formula_count
+
+
+def scan_workbook(filename):
+    """Scan an Excel file for error values and formulas in a single pass
+
+    Worksheets and shared strings are streamed straight from the zip, so memory
+    use does not grow with the number of cells.
+
+    Args:
+        filename: Path to Excel file
+
+    Returns:
+        dict with error locations and counts
+    """
+    with zipfile.ZipFile(filename) as zf:
+        sheets, strings_path = worksheet_parts(zf)
+        shared_errors = scan_shared_strings(zf, strings_path) if strings_path else {}
+
+        # Scan worksheets in workbook order
+        tally = ErrorTally()
+        formula_count = 0
+        for sheet_name, path in sheets:
+            formula_count += scan_worksheet(zf, path, sheet_name, shared_errors, tally.add)
+
+    return tally.summary(formula_count)
+
+
+class ErrorTally:
+    """Counts Excel errors by type, keeping the first locations of each"""
+
+    def __init__(self):
+        self.counts = {err: 0 for err in EXCEL_ERRORS}
+        self.locations = {err: [] for err in EXCEL_ERRORS}
+
+    def add(self, err, location):
+        self.counts[err] += 1
+        if len(self.locations[err]) < 20:  # Show up to 20 locations
+            self.locations[err].append(location)
+
+    def summary(self, formula_count):
+        """Build the JSON result summary"""
+        total_errors = sum(self.counts.values())
         result = {
             'status': 'success' if total_errors == 0 else 'errors_found',
             'total_errors': total_errors,
             'error_summary': {}
         }
-        
+
         # Add non-empty error categories
-        for err_type, locations in error_details.items():
-            if locations:
+        for err_type, count in self.counts.items():
+            if count:
                 result['error_summary'][err_type] = {
-                    'count': len(locations),
-                    'locations': locations[:20]  # Show up to 20 locations
+                    'count': count,
+                    'locations': self.locations[err_type]
                 }
-        
-        # Add formula count for context - also check ALL cells
-        wb_formulas = load_workbook(filename, data_only=False)
-        formula_count = 0
-        for sheet_name in wb_formulas.sheetnames:
-            ws = wb_formulas[sheet_name]
-            for row in ws.iter_rows():
-                for cell in row:
-                    if cell.value and isinstance(cell.value, str) and cell.value.startswith('='):
-                        formula_count += 1
-        wb_formulas.close()
-        
+
+        # Add formula count for context
         result['total_formulas'] = formula_count
-        
+
         return result
-        
-    except Exception as e:
-        return {'error': str(e)}
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python recalc.py <excel_file> [timeout_seconds]")
-        print("\nRecalculates all formulas in an Excel file using LibreOffice")
-        print("\nReturns JSON with error details:")
-        print("  - status: 'success' or 'errors_found'")
-        print("  - total_errors: Total number of Excel errors found")
-        print("  - total_formulas: Number of formulas in the file")
-        print("  - error_summary: Breakdown by error type with locations")
-        print("    - #VALUE!, #DIV/0!, #REF!, #NAME?, #NULL!, #NUM!, #N/A")
-        sys.exit(1)
-    
-    filename = sys.argv[1]
-    timeout = int(sys.argv[2]) if len(sys.argv) > 2 else 30
-    
-    result = recalc(filename, timeout)
+    parser = argparse.ArgumentParser(
+        description='Recalculates all formulas in an Excel file using LibreOffice',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""Returns JSON with error details:
+  - status: 'success' or 'errors_found'
+  - total_errors: Total number of Excel errors found
+  - total_formulas: Number of formulas in the file
+  - error_summary: Breakdown by error type with locations
+    - #VALUE!, #DIV/0!, #REF!, #NAME?, #NULL!, #NUM!, #N/A"""
+    )
+    parser.add_argument('excel_file', nargs='?', help='Excel file to recalculate')
+    parser.add_argument('timeout', nargs='?', type=int, default=30,
+                        help='Maximum time to wait for recalculation in seconds (default: 30)')
+    parser.add_argument('--engine', choices=['libreoffice', 'python'], default='libreoffice',
+                        help='python: check formulas in-process without saving values, '
+                             'falling back to LibreOffice for unsupported formulas')
+    parser.add_argument('--changed', metavar='CELLS',
+                        help='Comma-separated cells or ranges changed since the last run '
+                             '(e.g. "Inputs!B2,Inputs!C2:C10"): evaluate only their dependents '
+                             'in-process and report only new errors')
+    parser.add_argument('--batch', nargs='+', metavar='FILE',
+                        help='Recalculate many files in parallel, printing one JSON line per file '
+                             '({"file": ..., plus the usual result}) as each one finishes')
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS,
+                        help=f'LibreOffice processes to run at once with --batch (default: {BATCH_WORKERS})')
+    parser.add_argument('--file-timeout', type=int, metavar='SECONDS',
+                        help='Per-file timeout with --batch (default: the timeout argument)')
+    parser.add_argument('--retries', type=int, default=1,
+                        help='Retries for a file after LibreOffice crashed with --batch (default: 1)')
+    args = parser.parse_args()
+    
+    if args.retries < 0:
+        parser.error('--retries cannot be negative')
+    if args.batch:
+        if args.changed:
+            parser.error('--changed cannot be combined with --batch')
+        files = ([args.excel_file] if args.excel_file else []) + args.batch
+        timeout = args.file_timeout or args.timeout
+        for filename, result in recalc_batch(files, timeout, args.workers, args.engine, args.retries):
+            print(json.dumps({'file': filename, **result}), flush=True)
+        return
+    if not args.excel_file:
+        parser.error('an Excel file or --batch is required')
+    
+    result = recalc(args.excel_file, args.timeout, args.engine, args.changed)
     print(json.dumps(result, indent=2))
 
 
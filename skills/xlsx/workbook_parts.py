@@ -0,0 +1,148 @@
+"""
+Streaming access to the parts of an .xlsx package
+
+Reads the sheet list, shared strings, and worksheet rows straight from the zip
+with iterparse. Each row is dropped once it has been consumed, so memory use does
+not grow with the number of cells.
+
+Example usage:
+    import zipfile
+    from workbook_parts import cell_text, iter_rows, worksheet_parts
+
+    with zipfile.ZipFile('model.xlsx') as zf:
+        sheets, strings_path = worksheet_parts(zf)
+        for sheet_name, path in sheets:
+            for row, cells in iter_rows(zf, path):
+                for col, cell in cells:
+                    print(sheet_name, row, col, cell.get('t', 'n'), cell_text(cell))
+"""
+
+import posixpath
+import xml.etree.ElementTree as ET
+
+from openpyxl.utils import column_index_from_string
+
+SHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+OFFICE_DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+WORKSHEET_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet'
+SHARED_STRINGS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings'
+
+FORMULA_TAG = SHEET_NS + 'f'
+VALUE_TAG = SHEET_NS + 'v'
+
+
+def read_relationships(zf, part):
+    """Map relationship ids of a package part to (type, target part path)"""
+    base_dir, name = posixpath.split(part)
+    rels_path = posixpath.join(base_dir, '_rels', name + '.rels')
+    if rels_path not in zf.namelist():
+        return {}
+
+    rels = {}
+    for rel in ET.fromstring(zf.read(rels_path)).iter(PKG_REL_NS + 'Relationship'):
+        target = rel.get('Target', '')
+        if rel.get('TargetMode') == 'External':
+            continue
+        if target.startswith('/'):
+            path = target.lstrip('/')
+        else:
+            path = posixpath.normpath(posixpath.join(base_dir, target))
+        rels[rel.get('Id')] = (rel.get('Type'), path)
+    return rels
+
+
+def worksheet_parts(zf):
+    """Find the worksheets and shared strings of a workbook
+
+    Returns:
+        Tuple of ([(sheet name, part path)] in workbook order, shared strings
+        part path or None). Chartsheets and dialog sheets are left out.
+    """
+    package_rels = read_relationships(zf, '')
+    workbook_path = next(
+        (path for rel_type, path in package_rels.values() if rel_type == OFFICE_DOCUMENT_REL),
+        'xl/workbook.xml'
+    )
+    workbook_rels = read_relationships(zf, workbook_path)
+
+    strings_path = None
+    for rel_type, path in workbook_rels.values():
+        if rel_type == SHARED_STRINGS_REL and path in zf.namelist():
+            strings_path = path
+
+    sheets = []
+    workbook = ET.fromstring(zf.read(workbook_path))
+    for sheet in workbook.iter(SHEET_NS + 'sheet'):
+        rel_type, path = workbook_rels.get(sheet.get(REL_NS + 'id'), (None, None))
+        if rel_type == WORKSHEET_REL:
+            sheets.append((sheet.get('name'), path))
+    return sheets, strings_path
+
+
+def iter_shared_strings(zf, path):
+    """Yield the text of each shared string, in index order"""
+    table = None
+    with zf.open(path) as f:
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                if elem.tag == SHEET_NS + 'sst':
+                    table = elem
+                continue
+            if elem.tag != SHEET_NS + 'si':
+                continue
+            # Plain text or rich text runs, without phonetic hints (rPh)
+            yield elem.findtext(SHEET_NS + 't') or ''.join(
+                run.findtext(SHEET_NS + 't') or '' for run in elem.iter(SHEET_NS + 'r')
+            )
+            if table is not None:
+                table.remove(elem)
+
+
+def iter_rows(zf, path):
+    """Stream the rows of a worksheet part
+
+    Yields:
+        (row number, [(column number, <c> element)]) for each row. The elements
+        are only valid until the next row is requested.
+    """
+    row_counter = 0
+    sheet_data = None
+    columns = {}  # Column letters -> number
+    with zf.open(path) as f:
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                if elem.tag == SHEET_NS + 'sheetData':
+                    sheet_data = elem
+                continue
+            if elem.tag != SHEET_NS + 'row':
+                continue
+
+            row_counter = int(elem.get('r', row_counter + 1))
+            col_counter = 0
+            cells = []
+            for cell in elem.iter(SHEET_NS + 'c'):
+                letters = cell.get('r', '').rstrip('0123456789')
+                if not letters:
+                    col_counter += 1
+                elif letters in columns:
+                    col_counter = columns[letters]
+                else:
+                    col_counter = columns[letters] = column_index_from_string(letters)
+                cells.append((col_counter, cell))
+            yield row_counter, cells
+
+            # Drop finished rows so memory does not grow with the sheet
+            if sheet_data is not None:
+                sheet_data.remove(elem)
+
+
+def cell_text(cell):
+    """Raw value text of a <c> element, including inline strings, or None"""
+    if cell.get('t') == 'inlineStr':
+        inline = cell.find(SHEET_NS + 'is')
+        if inline is None:
+            return None
+        return ''.join(t.text or '' for t in inline.iter(SHEET_NS + 't'))
+    return cell.findtext(VALUE_TAG)